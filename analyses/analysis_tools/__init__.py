@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Tools shared between the individual analyses and papers.
+
+The paper `common.py` modules add the `analyses` directory to `sys.path` so that
+this package can be imported alongside the paper-specific code.
+
+"""
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""First-order accumulated local effects (ALE) of `FlatForest` models.
+
+`first_order_ale` computes the same quantities as
+`alepython.ale.first_order_ale_quant`: the samples of each quantile bin of a feature
+are predicted with the feature set to the lower and upper bin edges, and the mean
+differences within each bin are accumulated and centred.
+
+Rather than predicting two modified copies of the training data, both predictions of
+every sample are made in a single `FlatForest.predict_perturbed` call, which only
+looks up the bin edges at nodes splitting on the feature.
+
+"""
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def get_ale_quantiles(values, bins):
+    """Unique quantiles of `values` (actual sample values) used as bin edges."""
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1), method="lower"))
+
+
+def first_order_ale(forest, X, feature, bins=10, engine=None, n_threads=None):
+    """Calculate the first-order ALE of a feature.
+
+    Args:
+        forest (FlatForest): Model.
+        X (pandas DataFrame): Samples, e.g. the training data.
+        feature (str): Column of `X`.
+        bins (int): Maximum number of quantile bins.
+        engine (str or None): Prediction engine, see
+            `analysis_tools.forest_predict.predict_perturbed`.
+        n_threads (int or None): Number of threads used for prediction.
+
+    Returns:
+        quantiles (array): Bin edges.
+        ale (array): Centred ALE at the bin centres.
+
+    """
+    values = X[feature].to_numpy()
+    quantiles = get_ale_quantiles(values, bins)
+    # Index of the lower edge of the bin of every sample, with samples equal to the
+    # smallest edge assigned to the first bin.
+    indices = np.clip(np.digitize(values, quantiles, right=True) - 1, 0, None)
+
+    predictions = forest.predict_perturbed(
+        X,
+        replace={
+            X.columns.get_loc(feature): quantiles[np.stack((indices, indices + 1))]
+        },
+        engine=engine,
+        n_threads=n_threads,
+    )
+    effects = predictions[1] - predictions[0]
+
+    # Every bin contains at least the sample at its upper edge.
+    counts = np.bincount(indices, minlength=quantiles.size - 1)
+    mean_effects = np.bincount(indices, effects, minlength=quantiles.size - 1) / counts
+
+    ale = np.concatenate(([0], np.cumsum(mean_effects)))
+    # Uncentred effects at the bin centres.
+    ale = (ale[1:] + ale[:-1]) / 2
+    # Centre using the mean over all samples.
+    ale -= np.sum(ale * counts) / values.size
+    return quantiles, ale
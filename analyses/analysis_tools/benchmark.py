@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Benchmark helpers: synthetic data, timing and JSON results.
+
+`get_synthetic_data` generates data shaped like the `exog_data` and `endog_data` of
+the analyses (bounded fractions, heavy-tailed positive variables, temperatures and
+groups of correlated 'lagged' variables, with a sparse burned area target), so that
+benchmarks do not depend on any processed data.
+
+`BenchmarkResults` records the timings of a benchmark run along with the commit and
+package versions, and is saved as JSON. `compare_benchmarks` matches the timings of
+two such files, e.g. from different commits, to highlight regressions and speedups.
+
+"""
+import json
+import logging
+import os
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Parameters identifying a timing, in addition to the benchmark name.
+result_keys = ("benchmark", "n_samples", "n_features", "n_threads")
+
+
+def get_synthetic_data(n_samples, n_features, random_state=0):
+    """Generate features and targets shaped like `exog_data` and `endog_data`.
+
+    Args:
+        n_samples (int): Number of samples.
+        n_features (int): Number of features.
+        random_state (int): Seed.
+
+    Returns:
+        X (pandas DataFrame): float64 features.
+        y (pandas Series): Burned area fractions, mostly 0.
+
+    """
+    rng = np.random.default_rng(random_state)
+    kinds = ("fraction", "heavy_tailed", "temperature", "lagged")
+    columns = {}
+    for i in range(n_features):
+        kind = kinds[i % len(kinds)]
+        if kind == "fraction":
+            # E.g. vegetation cover fractions or FAPAR.
+            values = rng.beta(0.5, 2.0, n_samples)
+        elif kind == "heavy_tailed":
+            # E.g. population density.
+            values = rng.lognormal(0.0, 2.0, n_samples)
+        elif kind == "temperature":
+            values = rng.normal(295.0, 10.0, n_samples)
+        else:
+            # E.g. a lagged variable, correlated with the previous feature.
+            previous = columns[f"Feature {i - 1}"]
+            values = previous + rng.normal(0.0, previous.std() / 2 + 1e-9, n_samples)
+        columns[f"Feature {i}"] = values
+    X = pd.DataFrame(columns)
+
+    standardised = ((X - X.mean()) / X.std()).to_numpy()
+    weights = rng.normal(0.0, 1.0, n_features)
+    signal = standardised @ weights / np.sqrt(n_features)
+    if n_features > 1:
+        # Interaction between the first two features.
+        signal += standardised[:, 0] * standardised[:, 1]
+    signal += rng.normal(0.0, 0.5, n_samples)
+    # Sparse target with a long tail.
+    y = np.where(signal > 1.0, 1e-3 * np.expm1(signal - 1.0), 0.0).clip(0, 1)
+    return X, pd.Series(y, name="GFED4 BA")
+
+
+def time_call(func, *args, **kwargs):
+    """Call `func` and return its output and the elapsed time in s."""
+    start = perf_counter()
+    out = func(*args, **kwargs)
+    return out, perf_counter() - start
+
+
+def get_commit():
+    """The current git commit, or None outside of a git repository."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_environment():
+    """Describe the machine and the versions of the main packages."""
+    import shap
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "shap": shap.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+class BenchmarkResults:
+    """Timings of a benchmark run.
+
+    Args:
+        config (dict): Configuration of the run, stored alongside the timings.
+
+    """
+
+    def __init__(self, config):
+        self.data = {
+            "commit": get_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "environment": get_environment(),
+            "config": config,
+            "results": [],
+        }
+
+    def add(self, benchmark, times, **params):
+        """Record the times (in s) of repeated runs of a benchmark.
+
+        Args:
+            benchmark (str): Name of the benchmark.
+            times (list of float): Time of each repetition.
+            **params: `n_samples`, `n_features`, `n_threads` and any other
+                parameters of the benchmark.
+
+        """
+        result = {"benchmark": benchmark, **params, "times": list(times)}
+        result["min_time"] = min(times)
+        self.data["results"].append(result)
+        logger.info(
+            f"{benchmark} ({', '.join(f'{k}={v}' for k, v in params.items())}): "
+            f"{result['min_time']:0.3f} s."
+        )
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump(self.data, f, indent=1)
+        logger.info(f"Saved benchmark results to {path}.")
+
+    def to_frame(self):
+        return pd.DataFrame(self.data["results"]).set_index(list(result_keys))[
+            "min_time"
+        ]
+
+
+def load_benchmark_times(path):
+    """Load the minimum time of each benchmark in a results file."""
+    with Path(path).open() as f:
+        data = json.load(f)
+    return pd.DataFrame(data["results"]).set_index(list(result_keys))["min_time"]
+
+
+def compare_benchmarks(old_path, new_path):
+    """Compare the timings of two results files.
+
+    Returns:
+        pandas DataFrame: The old and new times (in s) of every benchmark run in
+            both files, with their ratio ('new / old').
+
+    """
+    comparison = pd.concat(
+        {
+            "old": load_benchmark_times(old_path),
+            "new": load_benchmark_times(new_path),
+        },
+        axis=1,
+        join="inner",
+    )
+    comparison["new / old"] = comparison["new"] / comparison["old"]
+    return comparison
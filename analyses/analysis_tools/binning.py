@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Quantised (binned) training of random forests.
+
+Exact split search considers every distinct value of a feature as a threshold, which
+is the dominant cost of fitting deep forests on millions of samples. `FeatureBinner`
+instead quantises each feature once into at most 256 bins, using quantiles of a
+subsample as bin edges (or the distinct values themselves for features with few
+distinct values), and the forest is fit on the small integer bin indices.
+
+Trees fit on the bin indices are then mapped back to the original feature values by
+`FeatureBinner.unbin_trees`. A split `bin <= t` is equivalent to `x <= edge` for the
+upper edge of bin `floor(t)`, so the resulting trees predict the original (float32)
+features exactly like the binned trees predict the bin indices. Binned forests can
+therefore be used in place of exactly fit forests, e.g. for SHAP values or ALE
+plots, without binning any data after the fit.
+
+Note that the trees are still grown by the scikit-learn splitter, which sorts the
+(binned) samples in each node rather than accumulating histograms. The speedup
+stems from the reduced number of distinct values per feature.
+
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureBinner:
+    """Quantise features into at most `max_bins` bins.
+
+    Args:
+        max_bins (int): Maximum number of bins per feature (at most 256).
+        subsample (int or None): Number of samples used to determine the bin edges.
+            All samples are used if None.
+        random_state (int): Seed used to draw the subsample.
+
+    """
+
+    def __init__(self, max_bins=256, subsample=200000, random_state=0):
+        if not 2 <= max_bins <= 256:
+            raise ValueError(f"'max_bins' must be in [2, 256], got {max_bins}.")
+        self.max_bins = max_bins
+        self.subsample = subsample
+        self.random_state = random_state
+
+    def fit(self, X):
+        """Determine the bin edges of each column of `X` (a pandas DataFrame)."""
+        n_samples = X.shape[0]
+        indices = slice(None)
+        if self.subsample is not None and n_samples > self.subsample:
+            indices = np.sort(
+                np.random.default_rng(self.random_state).choice(
+                    n_samples, self.subsample, replace=False
+                )
+            )
+        self.bin_edges_ = []
+        for column in X.columns:
+            values = X[column].to_numpy(dtype=np.float32)[indices]
+            unique = np.unique(values)
+            if unique.size <= self.max_bins:
+                # The last distinct value only bounds the last bin.
+                edges = unique[:-1]
+            else:
+                edges = np.unique(
+                    np.quantile(
+                        values, np.linspace(0, 1, self.max_bins + 1)[1:-1]
+                    ).astype(np.float32)
+                )
+            self.bin_edges_.append(edges)
+        logger.info(
+            f"Binned {X.shape[1]} features into at most "
+            f"{max(edges.size for edges in self.bin_edges_) + 1} bins."
+        )
+        return self
+
+    def transform(self, X):
+        """Replace the values of `X` by their bin indices.
+
+        Bin `i` contains the values `x` with `edges[i - 1] < x <= edges[i]`.
+
+        Returns:
+            pandas DataFrame: uint8 bin indices with the index and columns of `X`.
+
+        """
+        return pd.DataFrame(
+            {
+                column: np.searchsorted(
+                    edges, X[column].to_numpy(dtype=np.float32), side="left"
+                ).astype(np.uint8)
+                for column, edges in zip(X.columns, self.bin_edges_)
+            },
+            index=X.index,
+        )
+
+    def unbin_trees(self, estimators):
+        """Map the thresholds of trees fit on binned data to the original values.
+
+        Args:
+            estimators (list of DecisionTreeRegressor): Trees fit on the output of
+                `transform`, modified in place.
+
+        """
+        for estimator in estimators:
+            state = estimator.tree_.__getstate__()
+            nodes = state["nodes"].copy()
+            internal = nodes["left_child"] != -1
+            features = nodes["feature"][internal]
+            bins = np.floor(nodes["threshold"][internal]).astype(np.int64)
+            thresholds = np.empty(features.size, dtype=np.float64)
+            for feature in np.unique(features):
+                selected = features == feature
+                thresholds[selected] = self.bin_edges_[feature][bins[selected]]
+            nodes["threshold"][internal] = thresholds
+            state["nodes"] = nodes
+            estimator.tree_.__setstate__(state)
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""File-based work queue for chunked array jobs, e.g. SHAP value calculation.
+
+A `ChunkManifest` records the state of every chunk of a run as a small JSON file in
+one of the 'pending', 'running', 'done' and 'failed' subdirectories of the manifest
+directory. Chunks change state by renaming their file, which is atomic on a shared
+filesystem, so that any number of workers can pull chunks concurrently without a
+server or locks (only the creation of the manifest and the reset of failed chunks
+are locked, see `ChunkManifest.create` and `ChunkManifest.reset_failed`):
+
+ - `claim` moves a pending chunk to 'running'. Only one worker can succeed.
+ - Running chunks are touched regularly by their worker (a heartbeat). Chunks whose
+   heartbeat stops, e.g. because the job ran out of walltime, are moved back to
+   'pending' by `requeue_stale`.
+ - Chunks that raise an exception are retried up to `max_attempts` times in total,
+   after which they are moved to 'failed' (along with the error) instead.
+
+`run_chunks` pulls chunks until none are left (or the worker's time is up). Array
+jobs therefore no longer map to fixed chunks, and reruns after failures or
+interruptions only process the chunks that are not done.
+
+"""
+import fcntl
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+
+logger = logging.getLogger(__name__)
+
+states = ("pending", "running", "done", "failed")
+
+
+def parse_walltime(walltime):
+    """Convert a PBS walltime 'HH:MM:SS' to seconds."""
+    hours, minutes, seconds = map(int, walltime.split(":"))
+    return 3600 * hours + 60 * minutes + seconds
+
+
+def _write_json(path, data):
+    """Write `data` to `path` atomically."""
+    with NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False) as f:
+        json.dump(data, f)
+    os.replace(f.name, path)
+
+
+class ChunkManifest:
+    """State of the chunks of one run.
+
+    Args:
+        directory (str or Path): Manifest directory, as set up by `create`.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with (self.directory / "manifest.json").open() as f:
+            self.metadata = json.load(f)
+        self.n_chunks = self.metadata["n_chunks"]
+
+    def __repr__(self):
+        return f"ChunkManifest('{self.directory}', {self.get_counts()})"
+
+    @classmethod
+    def create(cls, directory, n_chunks, metadata=None, is_done=None):
+        """Set up the manifest of a run, unless it already exists.
+
+        Only one worker sets up the manifest (calling `is_done` for each chunk),
+        while concurrent workers wait for it using an exclusive lock on a file
+        next to the manifest directory.
+
+        Args:
+            directory (str or Path): Manifest directory.
+            n_chunks (int): Number of chunks, indexed from 0.
+            metadata (dict or None): Additional information on the run, stored in
+                'manifest.json'.
+            is_done (callable or None): Called with each chunk index. Chunks for
+                which it returns True (e.g. since their results were stored by a
+                previous run) are marked as done.
+
+        Returns:
+            ChunkManifest
+
+        """
+        directory = Path(directory)
+        if not (directory / "manifest.json").is_file():
+            with _lock(directory):
+                # The manifest may have been created while waiting for the lock.
+                if not (directory / "manifest.json").is_file():
+                    cls._create(directory, n_chunks, metadata, is_done)
+        manifest = cls(directory)
+        if manifest.n_chunks != n_chunks:
+            raise ValueError(
+                f"Manifest {directory} has {manifest.n_chunks} chunks, "
+                f"expected {n_chunks}."
+            )
+        return manifest
+
+    @staticmethod
+    def _create(directory, n_chunks, metadata, is_done):
+        """Set up the manifest, see `create`."""
+        # Set up the manifest in a temporary directory so that workers not
+        # using `create` never see a partial manifest.
+        tmp_dir = directory.parent / (
+            f".{directory.name}.{socket.gethostname()}.{os.getpid()}.tmp"
+        )
+        for state in states:
+            (tmp_dir / state).mkdir(parents=True, exist_ok=True)
+        n_done = 0
+        for index in range(n_chunks):
+            done = is_done is not None and is_done(index)
+            n_done += done
+            _write_json(
+                tmp_dir / ("done" if done else "pending") / f"{index}.json",
+                {"attempts": 0},
+            )
+        _write_json(
+            tmp_dir / "manifest.json", {**(metadata or {}), "n_chunks": n_chunks}
+        )
+        os.rename(tmp_dir, directory)
+        logger.info(
+            f"Created manifest {directory} with {n_chunks} chunks "
+            f"({n_done} already done)."
+        )
+
+    def _path(self, state, index):
+        return self.directory / state / f"{index}.json"
+
+    def get_indices(self, state):
+        """Sorted indices of the chunks in `state`."""
+        return sorted(
+            int(path.stem) for path in (self.directory / state).glob("*.json")
+        )
+
+    def get_counts(self):
+        return {state: len(self.get_indices(state)) for state in states}
+
+    def _read(self, state, index):
+        with self._path(state, index).open() as f:
+            return json.load(f)
+
+    def _move(self, index, source, target, **info):
+        """Move a chunk from `source` to `target` if it is still in `source`.
+
+        Returns:
+            bool: True if this call moved the chunk.
+
+        """
+        try:
+            os.rename(self._path(source, index), self._path(target, index))
+        except FileNotFoundError:
+            return False
+        if info:
+            try:
+                data = self._read(target, index)
+            except FileNotFoundError:
+                # Already moved on by another worker.
+                return True
+            _write_json(self._path(target, index), {**data, **info})
+        return True
+
+    def claim(self, worker=None):
+        """Claim a pending chunk.
+
+        Args:
+            worker (str or None): Identifier of the worker, stored with the chunk.
+
+        Returns:
+            int or None: Index of the claimed chunk, or None if there are no pending
+                chunks.
+
+        """
+        pending = self.get_indices("pending")
+        # Start at a random position to avoid contention between workers.
+        offset = random.randrange(len(pending)) if pending else 0
+        for index in pending[offset:] + pending[:offset]:
+            if self._move(index, "pending", "running", worker=worker, start=time()):
+                if self._path("done", index).is_file():
+                    # Completed by a worker that was considered stale.
+                    self._path("running", index).unlink()
+                    continue
+                return index
+        return None
+
+    def heartbeat(self, index):
+        """Mark a running chunk as alive."""
+        try:
+            os.utime(self._path("running", index))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, index):
+        """Mark a chunk as done."""
+        if not self._move(index, "running", "done"):
+            # E.g. requeued after a missed heartbeat.
+            _write_json(self._path("done", index), {"attempts": 0})
+            self._path("pending", index).unlink(missing_ok=True)
+
+    def fail(self, index, error, max_attempts=3):
+        """Record a failed attempt, requeueing the chunk if attempts are left."""
+        try:
+            attempts = self._read("running", index).get("attempts", 0) + 1
+        except FileNotFoundError:
+            return
+        target = "pending" if attempts < max_attempts else "failed"
+        self._move(index, "running", target, attempts=attempts, error=error)
+        logger.warning(
+            f"Chunk {index} failed (attempt {attempts} of {max_attempts}), "
+            f"moved to '{target}'."
+        )
+
+    def requeue_stale(self, timeout, max_attempts=3):
+        """Requeue running chunks without a heartbeat for `timeout` seconds.
+
+        Returns:
+            int: The number of chunks moved out of 'running'.
+
+        """
+        n_moved = 0
+        now = time()
+        for index in self.get_indices("running"):
+            try:
+                last_heartbeat = self._path("running", index).stat().st_mtime
+                attempts = self._read("running", index).get("attempts", 0) + 1
+            except FileNotFoundError:
+                continue
+            if now - last_heartbeat < timeout:
+                continue
+            target = "pending" if attempts < max_attempts else "failed"
+            if self._move(
+                index, "running", target, attempts=attempts, error="Timed out."
+            ):
+                logger.warning(f"Chunk {index} timed out, moved to '{target}'.")
+                n_moved += 1
+        return n_moved
+
+    def reset_failed(self):
+        """Move all failed chunks back to 'pending', with their attempts reset.
+
+        The manifest is locked meanwhile, see `create`.
+
+        Returns:
+            int: The number of chunks moved back to 'pending'.
+
+        """
+        n_moved = 0
+        with _lock(self.directory):
+            for index in self.get_indices("failed"):
+                n_moved += self._move(index, "failed", "pending", attempts=0)
+        if n_moved:
+            logger.info(f"Moved {n_moved} failed chunks back to 'pending'.")
+        return n_moved
+
+
+@contextmanager
+def _lock(directory):
+    """Exclusive lock of the manifest `directory` (which need not exist yet)."""
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    with (directory.parent / f".{directory.name}.lock").open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class _Heartbeat:
+    """Touch a running chunk at regular intervals in a background thread."""
+
+    def __init__(self, manifest, index, interval):
+        self.manifest = manifest
+        self.index = index
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.manifest.heartbeat(self.index)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_chunks(
+    manifest,
+    func,
+    max_time=None,
+    timeout=1800,
+    heartbeat_interval=60,
+    max_attempts=3,
+    retry_failed=False,
+):
+    """Process chunks of `manifest` until none are left.
+
+    Args:
+        manifest (ChunkManifest): The chunks to process.
+        func (callable): Called with the index of each chunk. Must store the results
+            itself.
+        max_time (float or None): Time (in s) available to this worker, e.g. the
+            job walltime. No new chunk is claimed unless the longest chunk so far
+            would finish in time.
+        timeout (float): Running chunks without a heartbeat for this long (in s)
+            are requeued, see `ChunkManifest.requeue_stale`.
+        heartbeat_interval (float): Interval (in s) between heartbeats.
+        max_attempts (int): Maximum number of attempts per chunk.
+        retry_failed (bool): If True, chunks which failed `max_attempts` times
+            (e.g. in a previous run) are retried, see `ChunkManifest.reset_failed`.
+            Note that this also applies to chunks failing in concurrent workers
+            until this worker starts.
+
+    Returns:
+        list of int: Indices of the chunks processed successfully by this worker.
+
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    start = time()
+    longest = 0
+    processed = []
+    if retry_failed:
+        manifest.reset_failed()
+    logger.info(f"Worker {worker} starting on {manifest!r}.")
+    while True:
+        if max_time is not None and time() - start + longest > max_time:
+            logger.info("Not enough time left for another chunk.")
+            break
+        index = manifest.claim(worker)
+        if index is None:
+            if manifest.requeue_stale(timeout, max_attempts=max_attempts):
+                continue
+            logger.info("No pending chunks left.")
+            break
+        logger.info(f"Processing chunk {index}.")
+        chunk_start = time()
+        with _Heartbeat(manifest, index, heartbeat_interval):
+            try:
+                func(index)
+            except Exception:
+                manifest.fail(index, traceback.format_exc(), max_attempts=max_attempts)
+                continue
+        manifest.complete(index)
+        processed.append(index)
+        longest = max(longest, time() - chunk_start)
+        logger.info(f"Finished chunk {index} in {time() - chunk_start:0.1f} s.")
+    logger.info(f"Worker {worker} processed {len(processed)} chunks: {manifest!r}.")
+    return processed
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Compact representation of the data used for fitting.
+
+In compact mode the features are stored as float32 and the rows of `endog_data` and
+`exog_data` are indexed by their (uint32) flat index into `master_mask`.
+
+Random forests in scikit-learn convert their input to float32 internally, so models
+trained on compact features are identical to models trained on float64 features,
+while every split, model input and scatter operation takes half the memory.
+
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+feature_dtype = np.float32
+index_dtype = np.uint32
+
+
+def get_compact_index(master_mask):
+    """Return the flat indices of the valid elements of `master_mask`.
+
+    Raises:
+        ValueError: If `master_mask` is too large to be indexed using `index_dtype`.
+
+    """
+    master_mask = np.asarray(master_mask)
+    if master_mask.size > np.iinfo(index_dtype).max:
+        raise ValueError(
+            f"'master_mask' with {master_mask.size} elements cannot be indexed using "
+            f"{np.dtype(index_dtype).name}."
+        )
+    return pd.Index(np.where(~master_mask.ravel())[0].astype(index_dtype))
+
+
+def get_compact_data(endog_data, exog_data, master_mask):
+    """Convert the features to float32 and index rows using `master_mask`.
+
+    Args:
+        endog_data (pandas Series): Target variable.
+        exog_data (pandas DataFrame): Features.
+        master_mask (array): Mask of the valid samples, with one unmasked element
+            per row of `endog_data` and `exog_data`.
+
+    Returns:
+        endog_data, exog_data: Compact copies of the inputs. The values of
+            `endog_data` are unchanged.
+
+    Raises:
+        ValueError: If the number of rows does not match `master_mask`.
+
+    """
+    index = get_compact_index(master_mask)
+    if not len(index) == exog_data.shape[0] == endog_data.shape[0]:
+        raise ValueError(
+            f"Expected {len(index)} rows matching 'master_mask', got "
+            f"{exog_data.shape[0]} (exog_data) and {endog_data.shape[0]} (endog_data)."
+        )
+
+    # Fill a single float32 array column by column to avoid a float64 temporary.
+    values = np.empty(exog_data.shape, dtype=feature_dtype, order="F")
+    for i, column in enumerate(exog_data.columns):
+        values[:, i] = exog_data[column].to_numpy()
+    compact_exog_data = pd.DataFrame(
+        values, index=index, columns=exog_data.columns, copy=False
+    )
+    compact_endog_data = pd.Series(
+        endog_data.to_numpy(), index=index, name=endog_data.name
+    )
+    logger.info(
+        f"Compact features use {values.nbytes / 1e6:0.1f} MB "
+        f"({exog_data.shape[1]} columns)."
+    )
+    return compact_endog_data, compact_exog_data
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""On-disk columnar storage of the processed data used for fitting.
+
+Each column of `exog_data` is stored as a separate `.npy` file so that it can be
+memory-mapped and read independently of all other columns. The target variable,
+`master_mask` and `land_mask` are stored alongside, while the (rarely needed)
+`filled_datasets` and `masked_datasets` are only unpickled once they are used.
+
+Experiments that only use a subset of the features therefore only pay for reading
+the columns they actually use.
+
+"""
+import json
+import logging
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import cloudpickle
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureStore:
+    """Columnar storage of the output of a `get_data`-like function.
+
+    Layout of `directory`:
+        meta.json: Column names, dtypes and other metadata. Written last, so its
+            presence marks a complete store.
+        columns/<i>.npy: The i-th column of `exog_data`.
+        endog.npy, index.pickle: Target variable values and the shared row index.
+        master_mask.npy, land_mask.pickle: Masks.
+        filled_datasets.pickle, masked_datasets.pickle: Pickled `Datasets`.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._meta = None
+        self._index = None
+
+    @property
+    def complete(self):
+        return (self.directory / "meta.json").is_file()
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            with (self.directory / "meta.json").open() as f:
+                self._meta = json.load(f)
+        return self._meta
+
+    @property
+    def columns(self):
+        return pd.Index(self.meta["columns"])
+
+    @property
+    def index(self):
+        if self._index is None:
+            with (self.directory / "index.pickle").open("rb") as f:
+                self._index = pickle.load(f)
+        return self._index
+
+    def write(
+        self,
+        endog_data,
+        exog_data,
+        master_mask,
+        filled_datasets,
+        masked_datasets,
+        land_mask,
+    ):
+        """Write the output of a `get_data`-like function to the store.
+
+        Any existing contents of the store are replaced.
+
+        """
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        (self.directory / "columns").mkdir(parents=True)
+
+        for i, column in enumerate(exog_data.columns):
+            np.save(self.get_column_path(i), exog_data[column].to_numpy())
+        np.save(self.directory / "endog.npy", np.asarray(endog_data))
+        with (self.directory / "index.pickle").open("wb") as f:
+            pickle.dump(exog_data.index, f, protocol=-1)
+
+        np.save(self.directory / "master_mask.npy", np.asarray(master_mask))
+        with (self.directory / "land_mask.pickle").open("wb") as f:
+            pickle.dump(land_mask, f, protocol=-1)
+
+        for name, datasets in (
+            ("filled_datasets", filled_datasets),
+            ("masked_datasets", masked_datasets),
+        ):
+            with (self.directory / f"{name}.pickle").open("wb") as f:
+                cloudpickle.dump(datasets, f, protocol=-1)
+
+        meta = {
+            "columns": list(exog_data.columns),
+            "dtypes": [str(dtype) for dtype in exog_data.dtypes],
+            "n_rows": exog_data.shape[0],
+            "endog_name": getattr(endog_data, "name", None),
+        }
+        with (self.directory / "meta.json.tmp").open("w") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(self.directory / "meta.json.tmp", self.directory / "meta.json")
+        self._meta = None
+        self._index = None
+        logger.info(f"Wrote {len(meta['columns'])} columns to {self.directory}.")
+
+    def get_column_path(self, i):
+        return self.directory / "columns" / f"{i}.npy"
+
+    def get_column(self, column):
+        """Return a read-only memory-mapped array holding `column`."""
+        return np.load(
+            self.get_column_path(self.columns.get_loc(column)), mmap_mode="r"
+        )
+
+    def get_data(self):
+        """Return the stored data using lazy containers where possible.
+
+        Returns:
+            endog_data (pandas Series), exog_data (LazyFrame), master_mask (array),
+            filled_datasets (LazyDatasets), masked_datasets (LazyDatasets),
+            land_mask.
+
+        """
+        endog_data = pd.Series(
+            np.load(self.directory / "endog.npy"),
+            index=self.index,
+            name=self.meta["endog_name"],
+        )
+        master_mask = np.load(self.directory / "master_mask.npy")
+        with (self.directory / "land_mask.pickle").open("rb") as f:
+            land_mask = pickle.load(f)
+        return (
+            endog_data,
+            LazyFrame(self),
+            master_mask,
+            LazyDatasets(self.directory / "filled_datasets.pickle"),
+            LazyDatasets(self.directory / "masked_datasets.pickle"),
+            land_mask,
+        )
+
+
+class LazyFrame:
+    """Read-only DataFrame-like view of a `FeatureStore`.
+
+    No feature data is read until columns are selected. Selecting a single column
+    returns a pandas Series, while selecting a list of columns returns a pandas
+    DataFrame holding only those columns.
+
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __repr__(self):
+        return (
+            f"LazyFrame({self.shape[0]} rows x {self.shape[1]} columns, "
+            f"store='{self.store.directory}')"
+        )
+
+    @property
+    def columns(self):
+        return self.store.columns
+
+    @property
+    def index(self):
+        return self.store.index
+
+    @property
+    def shape(self):
+        return (self.store.meta["n_rows"], len(self.columns))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(
+                np.array(self.store.get_column(key)), index=self.index, name=key
+            )
+        return self.load(key)
+
+    def load(self, columns=None):
+        """Load the given columns (all by default) into a pandas DataFrame.
+
+        The DataFrame is backed by a single array which is filled column by column
+        from the memory-mapped column files.
+
+        """
+        if columns is None:
+            columns = self.columns
+        columns = list(columns)
+        missing = [column for column in columns if column not in self.columns]
+        if missing:
+            raise KeyError(f"Columns {missing} are not in the feature store.")
+
+        dtypes = dict(zip(self.store.meta["columns"], self.store.meta["dtypes"]))
+        values = np.empty(
+            (self.shape[0], len(columns)),
+            dtype=np.result_type(*(dtypes[column] for column in columns)),
+            order="F",
+        )
+        for i, column in enumerate(columns):
+            values[:, i] = self.store.get_column(column)
+        return pd.DataFrame(values, index=self.index, columns=columns, copy=False)
+
+
+class LazyDatasets:
+    """Proxy which only unpickles a `Datasets` instance once it is used.
+
+    Calls to `select_variables()` are recorded and replayed after loading, so that
+    the usual subsetting carried out by the experiments does not trigger loading.
+
+    """
+
+    def __init__(self, path, selections=()):
+        self._path = Path(path)
+        self._selections = tuple(selections)
+        self._datasets = None
+
+    def select_variables(self, *args, **kwargs):
+        return type(self)(self._path, self._selections + ((args, kwargs),))
+
+    def load(self):
+        """Return the underlying `Datasets` instance."""
+        if self._datasets is None:
+            with self._path.open("rb") as f:
+                datasets = cloudpickle.load(f)
+            for args, kwargs in self._selections:
+                datasets = datasets.select_variables(*args, **kwargs)
+            self._datasets = datasets
+        return self._datasets
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            # Avoid recursion e.g. during unpickling.
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
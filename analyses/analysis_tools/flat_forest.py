@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""Flat, memory-mappable representation of fitted random forest regressors.
+
+Unpickling a large scikit-learn forest takes a long time and a lot of memory in
+every process that needs it. A `FlatForest` instead stores the nodes of all trees
+in a handful of contiguous arrays, which are written to a single file and can be
+memory-mapped read-only. Loading is then near-instant, and processes on the same
+node share the underlying pages.
+
+File layout:
+    magic (8 bytes), header length (uint64), JSON header, arrays.
+
+The header records the dtype, shape and offset of each array (aligned to 64 bytes)
+as well as scalar attributes of the forest. Node indices in `children_left` and
+`children_right` are local to each tree, with -1 marking leaves, as in
+`sklearn.tree._tree.Tree`. The nodes of tree `i` are given by
+`tree_offsets[i]:tree_offsets[i + 1]`.
+
+`FlatForest.predict` gives the same predictions as the original forest, see
+`analysis_tools.forest_predict`, so that a `FlatForest` can be used in place of the
+forest for model analyses.
+
+"""
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+from .forest_predict import get_traversal_arrays, predict_perturbed
+
+logger = logging.getLogger(__name__)
+
+magic = b"FLATFRST"
+alignment = 64
+
+node_dtypes = {
+    "children_left": np.int32,
+    "children_right": np.int32,
+    "feature": np.int32,
+    "threshold": np.float64,
+    "value": np.float64,
+    "weighted_n_node_samples": np.float64,
+}
+
+
+class FlatForest:
+    """Array-backed random forest regressor.
+
+    Args:
+        arrays (dict): Node arrays (see `node_dtypes`) and `tree_offsets`.
+        attrs (dict): Scalar attributes, e.g. `n_features_in_`.
+
+    """
+
+    def __init__(self, arrays, attrs):
+        self.arrays = arrays
+        self.attrs = attrs
+
+    def __repr__(self):
+        return (
+            f"FlatForest(n_trees={self.n_trees}, n_nodes={self.n_nodes}, "
+            f"n_features_in_={self.n_features_in_})"
+        )
+
+    def __getattr__(self, name):
+        if name in ("arrays", "attrs"):
+            # Avoid recursion e.g. during unpickling.
+            raise AttributeError(name)
+        if name in self.arrays:
+            return self.arrays[name]
+        if name in self.attrs:
+            return self.attrs[name]
+        raise AttributeError(name)
+
+    @property
+    def n_trees(self):
+        return len(self.tree_offsets) - 1
+
+    @property
+    def n_nodes(self):
+        return int(self.tree_offsets[-1])
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Create a `FlatForest` from a fitted single-output forest regressor."""
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("Only single-output forests are supported.")
+        arrays = {
+            name: np.concatenate(
+                [np.asarray(getattr(tree, name)).reshape(-1) for tree in trees]
+            ).astype(dtype)
+            for name, dtype in node_dtypes.items()
+        }
+        arrays["tree_offsets"] = np.concatenate(
+            ([0], np.cumsum([tree.node_count for tree in trees]))
+        ).astype(np.int64)
+        attrs = {
+            "n_features_in_": int(forest.n_features_in_),
+            "criterion": forest.criterion,
+        }
+        feature_names = getattr(forest, "feature_names_in_", None)
+        if feature_names is not None:
+            attrs["feature_names_in_"] = [str(name) for name in feature_names]
+        return cls(arrays, attrs)
+
+    def save(self, path):
+        """Write the forest to `path` (atomically)."""
+        path = Path(path)
+        header = {"attrs": self.attrs, "arrays": {}}
+        offset = 0
+        for name, array in self.arrays.items():
+            header["arrays"][name] = {
+                "dtype": np.dtype(array.dtype).str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset += -(-array.nbytes // alignment) * alignment
+        header_bytes = json.dumps(header).encode()
+        # Start of the array data, relative to which array offsets are given.
+        data_start = len(magic) + 8 + len(header_bytes)
+        data_start = -(-data_start // alignment) * alignment
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            f.write(magic)
+            f.write(np.uint64(len(header_bytes)).tobytes())
+            f.write(header_bytes)
+            for name, array in self.arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(f.name, path)
+        logger.info(f"Saved {self!r} to {path}.")
+
+    @classmethod
+    def load(cls, path, mmap_mode=True):
+        """Load a forest from `path`.
+
+        Args:
+            path (str or Path): Path to a file written by `save()`.
+            mmap_mode (bool): If True, the arrays are read-only views of a shared,
+                memory-mapped file. Otherwise the arrays are read into memory.
+
+        """
+        with open(path, "rb") as f:
+            if f.read(len(magic)) != magic:
+                raise ValueError(f"'{path}' is not a flat forest file.")
+            header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_length))
+            data_start = len(magic) + 8 + header_length
+            data_start = -(-data_start // alignment) * alignment
+            if mmap_mode:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                buffer = f.read()
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            arrays[name] = np.frombuffer(
+                buffer,
+                dtype=dtype,
+                count=int(np.prod(spec["shape"], dtype=np.int64)),
+                offset=data_start + spec["offset"],
+            ).reshape(spec["shape"])
+        return cls(arrays, header["attrs"])
+
+    def predict(self, X, engine=None, n_threads=None):
+        """Predict `X`, see `analysis_tools.forest_predict.predict_perturbed`."""
+        return self.predict_perturbed(X, engine=engine, n_threads=n_threads)[0]
+
+    def predict_perturbed(self, X, replace=None, engine=None, n_threads=None):
+        """Predict copies of `X` with replaced columns.
+
+        See `analysis_tools.forest_predict.predict_perturbed`.
+
+        """
+        if "_traversal_arrays" not in self.__dict__:
+            self._traversal_arrays = get_traversal_arrays(self)
+        return predict_perturbed(
+            self,
+            X,
+            replace=replace,
+            engine=engine,
+            traversal_arrays=self._traversal_arrays,
+            n_threads=n_threads,
+        )
+
+    def get_tree(self, i):
+        """Return the node arrays of the i-th tree."""
+        nodes = slice(self.tree_offsets[i], self.tree_offsets[i + 1])
+        return {name: self.arrays[name][nodes] for name in node_dtypes}
+
+    def to_shap_model(self):
+        """Return the forest in the dictionary format understood by `shap`."""
+        trees = []
+        for i in range(self.n_trees):
+            tree = self.get_tree(i)
+            trees.append(
+                {
+                    "children_left": tree["children_left"],
+                    "children_right": tree["children_right"],
+                    # There are no missing values.
+                    "children_default": tree["children_left"],
+                    "features": tree["feature"],
+                    "thresholds": tree["threshold"],
+                    # The forest prediction is the mean over all trees.
+                    "values": tree["value"][:, np.newaxis] / self.n_trees,
+                    "node_sample_weight": tree["weighted_n_node_samples"],
+                }
+            )
+        return {
+            "trees": trees,
+            "base_offset": 0,
+            "tree_output": "raw_value",
+            "objective": "squared_error",
+            # As for scikit-learn forests, to match their threshold comparisons.
+            "input_dtype": np.float32,
+            "internal_dtype": np.float64,
+        }
+
+
+def as_flat_forest(model):
+    """Return `model` as a `FlatForest`, converting fitted forests if needed."""
+    if isinstance(model, FlatForest):
+        return model
+    return FlatForest.from_forest(model)
+
+
+def get_flat_forest(path, get_forest_func, mmap_mode=True):
+    """Load the flat forest at `path`, creating it using `get_forest_func` if needed.
+
+    Args:
+        path (str or Path): Location of the flat forest file.
+        get_forest_func (callable): Returns the fitted scikit-learn forest.
+        mmap_mode (bool): See `FlatForest.load()`.
+
+    Returns:
+        FlatForest
+
+    """
+    path = Path(path)
+    if not path.is_file():
+        FlatForest.from_forest(get_forest_func()).save(path)
+    return FlatForest.load(path, mmap_mode=mmap_mode)
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""Batched prediction using `FlatForest` node arrays.
+
+Predictions are identical (bit for bit) to those of a scikit-learn forest regressor
+predicting sequentially (`n_jobs=1`): samples are converted to float32 and compared
+against the float64 thresholds, and the leaf values of each sample are summed in tree
+order before dividing by the number of trees.
+
+Perturbed datasets, i.e. copies of `X` with some columns replaced (as used for ALE,
+PDP and permutation importance), are predicted in a single call without creating the
+copies. The replacement values are looked up whenever a node splits on a replaced
+column instead.
+
+Two engines are available:
+
+ - 'numpy': All trees are traversed simultaneously for chunks of samples, with the
+   number of Python-level operations scaling with the tree depth only. This is
+   mainly a fallback for the 'numba' engine.
+ - 'numba': A JIT-compiled traversal, parallelised over blocks of samples. For each
+   sample and tree, all perturbed sets are traversed together and only split up at
+   nodes splitting on a replaced column, so e.g. a PDP grid costs little more than a
+   single prediction. Only available if `numba` is installed, in which case it is
+   used by default.
+
+"""
+import logging
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of (sample, tree) pairs traversed at once by the 'numpy' engine.
+numpy_chunk_size = 2**20
+
+
+def get_default_engine():
+    return "numba" if numba is not None else "numpy"
+
+
+def get_traversal_arrays(forest):
+    """Return the arrays needed to traverse all trees of `forest` at once.
+
+    Leaves point to themselves and compare feature 0 against an infinite threshold,
+    so that leaves are stable under further traversal steps.
+
+    Returns:
+        children_left, children_right (int64 array): Children of all nodes as
+            indices into the flat node arrays.
+        feature (intp array): Split features.
+        threshold (float64 array): Split thresholds.
+        max_depth (int): Maximum depth of the trees.
+
+    """
+    n_nodes = forest.n_nodes
+    is_leaf = forest.children_left == -1
+    node_indices = np.arange(n_nodes, dtype=np.int64)
+    node_offsets = np.repeat(forest.tree_offsets[:-1], np.diff(forest.tree_offsets))
+    children_left, children_right = (
+        np.where(is_leaf, node_indices, local_children + node_offsets)
+        for local_children in (forest.children_left, forest.children_right)
+    )
+    feature = np.where(is_leaf, 0, forest.feature).astype(np.intp)
+    threshold = np.where(is_leaf, np.inf, forest.threshold)
+
+    max_depth = 0
+    nodes = forest.tree_offsets[:-1]
+    while True:
+        nodes = nodes[~is_leaf[nodes]]
+        if not nodes.size:
+            break
+        nodes = np.concatenate((children_left[nodes], children_right[nodes]))
+        max_depth += 1
+    return children_left, children_right, feature, threshold, max_depth
+
+
+def _as_features(X):
+    """Convert `X` to float32 like scikit-learn forests do for prediction."""
+    return np.asarray(X, dtype=np.float32)
+
+
+def _get_replacements(X, replace):
+    """Check and broadcast the column replacements.
+
+    Args:
+        X (array): Samples of shape (n_samples, n_features).
+        replace (dict or None): Mapping from column index to replacement values
+            broadcastable to (n_sets, n_samples).
+
+    Returns:
+        columns (int64 array): Replaced columns, shape (n_replace,).
+        values (float32 array): Broadcast (read-only) view of the replacement values
+            of shape (n_sets, n_samples, n_replace).
+
+    """
+    n_samples, n_features = X.shape
+    if not replace:
+        return np.zeros(0, dtype=np.int64), np.zeros((1, n_samples, 0), np.float32)
+    columns = np.array(list(replace), dtype=np.int64)
+    if np.any((columns < 0) | (columns >= n_features)):
+        raise ValueError(f"Replaced columns {columns} out of range.")
+    values = [np.atleast_2d(_as_features(value)) for value in replace.values()]
+    n_sets = max(value.shape[0] for value in values)
+    values = np.stack(
+        [np.broadcast_to(value, (n_sets, n_samples)) for value in values], axis=-1
+    )
+    return columns, values
+
+
+def _predict_numpy(X, columns, values, forest, traversal_arrays):
+    children_left, children_right, feature, threshold, max_depth = traversal_arrays
+    roots = forest.tree_offsets[:-1]
+    n_trees = len(roots)
+    n_features = X.shape[1]
+    flat_X = X.ravel()
+
+    n_sets, n_samples = values.shape[:2]
+    n_rows = n_sets * n_samples
+    out = np.empty(n_rows, dtype=np.float64)
+    chunk_size = max(1, numpy_chunk_size // n_trees)
+
+    for start in range(0, n_rows, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, n_rows))
+        # Node of every (tree, row) pair, flattened in tree-major order.
+        nodes = np.repeat(roots, len(rows))
+        samples = np.tile(rows % n_samples, n_trees)
+        if len(columns):
+            sets = np.tile(rows // n_samples, n_trees)
+        sample_offsets = samples * n_features
+        for _ in range(max_depth):
+            node_features = feature[nodes]
+            x = flat_X[sample_offsets + node_features]
+            for j, column in enumerate(columns):
+                replaced = np.nonzero(node_features == column)[0]
+                x[replaced] = values[sets[replaced], samples[replaced], j]
+            nodes = np.where(
+                x <= threshold[nodes], children_left[nodes], children_right[nodes]
+            )
+
+        tree_values = forest.value[nodes].reshape(n_trees, len(rows))
+        # Sum in tree order, like scikit-learn.
+        chunk_out = np.zeros(len(rows), dtype=np.float64)
+        for values_i in tree_values:
+            chunk_out += values_i
+        out[rows] = chunk_out
+
+    out /= n_trees
+    return out.reshape(n_sets, n_samples)
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, nogil=True, cache=True)
+    def _predict_numba_kernel(
+        X,
+        columns,
+        values,
+        children_left,
+        children_right,
+        feature,
+        threshold,
+        leaf_value,
+        roots,
+        max_depth,
+        block_size,
+        out,
+    ):
+        n_sets, n_samples = out.shape
+        n_trees = roots.shape[0]
+        n_blocks = (n_samples + block_size - 1) // block_size
+        for block in numba.prange(n_blocks):
+            start = block * block_size
+            stop = min(start + block_size, n_samples)
+            # Sets of the current sample, partitioned by the path taken.
+            order = np.empty(n_sets, dtype=np.int64)
+            stack_node = np.empty(max_depth + 1, dtype=np.int64)
+            stack_lo = np.empty(max_depth + 1, dtype=np.int64)
+            stack_hi = np.empty(max_depth + 1, dtype=np.int64)
+            for i in range(n_sets):
+                for sample in range(start, stop):
+                    out[i, sample] = 0.0
+            for tree in range(n_trees):
+                for sample in range(start, stop):
+                    for i in range(n_sets):
+                        order[i] = i
+                    stack_node[0] = roots[tree]
+                    stack_lo[0] = 0
+                    stack_hi[0] = n_sets
+                    stack_size = 1
+                    while stack_size:
+                        stack_size -= 1
+                        node = stack_node[stack_size]
+                        lo = stack_lo[stack_size]
+                        hi = stack_hi[stack_size]
+                        while children_left[node] != node:
+                            node_feature = feature[node]
+                            j = -1
+                            for k in range(columns.shape[0]):
+                                if columns[k] == node_feature:
+                                    j = k
+                            if j == -1:
+                                # All sets take the same path.
+                                if X[sample, node_feature] <= threshold[node]:
+                                    node = children_left[node]
+                                else:
+                                    node = children_right[node]
+                                continue
+                            # Partition the sets by their replacement values.
+                            mid = lo
+                            for p in range(lo, hi):
+                                i = order[p]
+                                if values[i, sample, j] <= threshold[node]:
+                                    order[p] = order[mid]
+                                    order[mid] = i
+                                    mid += 1
+                            if mid == lo:
+                                node = children_right[node]
+                            elif mid == hi:
+                                node = children_left[node]
+                            else:
+                                stack_node[stack_size] = children_right[node]
+                                stack_lo[stack_size] = mid
+                                stack_hi[stack_size] = hi
+                                stack_size += 1
+                                node = children_left[node]
+                                hi = mid
+                        for p in range(lo, hi):
+                            out[order[p], sample] += leaf_value[node]
+            for i in range(n_sets):
+                for sample in range(start, stop):
+                    out[i, sample] /= n_trees
+
+
+def _predict_numba(X, columns, values, forest, traversal_arrays):
+    children_left, children_right, feature, threshold, max_depth = traversal_arrays
+    out = np.empty(values.shape[:2], dtype=np.float64)
+    _predict_numba_kernel(
+        np.ascontiguousarray(X),
+        columns,
+        values,
+        children_left,
+        children_right,
+        feature,
+        threshold,
+        forest.value,
+        forest.tree_offsets[:-1],
+        max_depth,
+        # Traverse each tree for as many samples as possible while its nodes are
+        # cached, i.e. use one block of samples per thread.
+        -(-X.shape[0] // numba.get_num_threads()),
+        out,
+    )
+    return out
+
+
+engines = {"numpy": _predict_numpy}
+if numba is not None:
+    engines["numba"] = _predict_numba
+
+
+def predict_perturbed(
+    forest, X, replace=None, engine=None, traversal_arrays=None, n_threads=None
+):
+    """Predict copies of `X` with replaced columns without creating the copies.
+
+    Args:
+        forest (FlatForest): Forest.
+        X (array-like): Samples of shape (n_samples, n_features).
+        replace (dict or None): Mapping from column index to replacement values
+            broadcastable to (n_sets, n_samples). E.g. `{2: grid[:, np.newaxis]}`
+            yields the predictions of `X` with column 2 set to each value of `grid`
+            in turn, as for a PDP. If None, `X` itself is predicted.
+        engine (str or None): 'numpy' or 'numba'. Defaults to
+            `get_default_engine()`.
+        traversal_arrays (tuple or None): Output of `get_traversal_arrays`.
+        n_threads (int or None): Number of threads used by the 'numba' engine.
+            Defaults to `numba.get_num_threads()`.
+
+    Returns:
+        array: Predictions of shape (n_sets, n_samples).
+
+    """
+    X = _as_features(X)
+    if X.ndim != 2 or X.shape[1] != forest.n_features_in_:
+        raise ValueError(
+            f"Expected {forest.n_features_in_} features, got shape {X.shape}."
+        )
+    if engine is None:
+        engine = get_default_engine()
+    if engine not in engines:
+        raise ValueError(f"Unknown engine '{engine}'. Expected one of {list(engines)}.")
+    if traversal_arrays is None:
+        traversal_arrays = get_traversal_arrays(forest)
+
+    columns, values = _get_replacements(X, replace)
+    if engine != "numba" or n_threads is None:
+        return engines[engine](X, columns, values, forest, traversal_arrays)
+    default_threads = numba.get_num_threads()
+    numba.set_num_threads(max(1, min(n_threads, numba.config.NUMBA_NUM_THREADS)))
+    try:
+        return engines[engine](X, columns, values, forest, traversal_arrays)
+    finally:
+        numba.set_num_threads(default_threads)
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""Reuse of cached random forests with a different number of trees.
+
+scikit-learn forests draw the seed of every tree sequentially from `random_state`.
+Given an integer `random_state`, the first `n` trees of a forest with `m > n` trees
+are therefore identical to a forest fit with `n` trees, and growing a forest from
+`n` to `m` trees using `warm_start` yields the same forest as fitting `m` trees.
+
+`get_forest` uses this to serve a request for a forest with `n` trees from a cached
+forest with the same parameters otherwise:
+
+ - If a larger forest is cached, it is truncated to `n` trees.
+ - If a smaller forest is cached, only the missing trees are grown.
+
+The forest sizes stored for each set of parameters are recorded in an index file
+alongside the `CachedResults` cache.
+
+Out-of-bag (OOB) predictions of bootstrapped forests are collected by `get_forest`
+if requested. The OOB sums and counts of the newly grown trees are accumulated right
+after they are fit (in parallel using the active joblib backend) and are stored with
+the forest as `oob_sums_` and `oob_counts_`, so growing a forest only predicts the
+new trees and cached forests need no further prediction pass. The sums of truncated
+forests are derived from those of the larger forest.
+
+"""
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from copy import copy
+from numbers import Integral
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from joblib import hash as joblib_hash
+from sklearn.base import clone
+from sklearn.utils import check_random_state
+
+logger = logging.getLogger(__name__)
+
+# Parameters which do not affect the individual trees of a forest.
+size_params = ("n_estimators", "warm_start", "n_jobs", "verbose")
+
+
+def get_model_key(model):
+    return tuple(sorted(model.get_params().items()))
+
+
+def get_forest_key(model):
+    """Key identifying forests which only differ in their number of trees."""
+    return joblib_hash(
+        sorted(
+            (name, value)
+            for name, value in model.get_params().items()
+            if name not in size_params
+        )
+    )
+
+
+class ForestSizeIndex:
+    """Record of the cached forest sizes for each set of forest parameters."""
+
+    def __init__(self, cache_dir):
+        self.path = Path(cache_dir) / "forest_sizes.json"
+        self.lock_path = self.path.with_suffix(".lock")
+
+    @contextmanager
+    def _lock(self):
+        """Exclusive lock serialising updates of the index across processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        try:
+            with self.path.open() as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def get_sizes(self, forest_key):
+        return sorted(self.load().get(forest_key, []))
+
+    def add(self, forest_key, n_estimators):
+        # The index is replaced atomically, so reads need no lock, but concurrent
+        # read-modify-write cycles would lose entries.
+        with self._lock():
+            index = self.load()
+            index[forest_key] = sorted(set(index.get(forest_key, [])) | {n_estimators})
+            with NamedTemporaryFile(
+                "w", dir=self.path.parent, suffix=".tmp", delete=False
+            ) as f:
+                json.dump(index, f, indent=1)
+            os.replace(f.name, self.path)
+
+
+def truncate_forest(forest, n_estimators):
+    """Return a shallow copy of `forest` using only its first `n_estimators` trees."""
+    if n_estimators > len(forest.estimators_):
+        raise ValueError(
+            f"Cannot truncate a forest with {len(forest.estimators_)} trees to "
+            f"{n_estimators} trees."
+        )
+    truncated = copy(forest)
+    truncated.estimators_ = forest.estimators_[:n_estimators]
+    truncated.n_estimators = n_estimators
+    # Out-of-bag results refer to the original trees.
+    for attr in ("oob_score_", "oob_prediction_", "oob_sums_", "oob_counts_"):
+        truncated.__dict__.pop(attr, None)
+    return truncated
+
+
+def get_forest(
+    cached, index, model, X_train=None, y_train=None, binner=None, oob=False
+):
+    """Load, derive or fit the forest `model`.
+
+    Args:
+        cached (CachedResults): Estimator cache.
+        index (ForestSizeIndex): Index of the forests stored in `cached`.
+        model (forest estimator): Unfitted forest defining the parameters. Its
+            `random_state` must be an integer for cached forests to be reused.
+        X_train, y_train: Training data, only needed if trees need to be fit or OOB
+            sums need to be computed.
+        binner (FeatureBinner or None): If given, new trees are fit on the binned
+            training data and mapped back to the original feature values, see
+            `analysis_tools.binning`. Binned forests should be cached separately
+            from exactly fit forests.
+        oob (bool): If True, collect the OOB sums of the trees as they are grown and
+            set `oob_prediction_`, see `get_oob_prediction`. The OOB sums of cached
+            forests fit without `oob` are computed once and stored.
+
+    Returns:
+        Fitted forest.
+
+    """
+    model_key = get_model_key(model)
+    n_estimators = model.n_estimators
+    forest_key = get_forest_key(model)
+    sizes = index.get_sizes(forest_key)
+    try:
+        forest = cached.get_estimator(model_key)
+    except KeyError:
+        pass
+    else:
+        if n_estimators not in sizes:
+            # E.g. forests stored before the index was introduced.
+            index.add(forest_key, n_estimators)
+        if oob and not hasattr(forest, "oob_sums_"):
+            _add_oob_sums(forest, X_train)
+            cached.store_estimator(model_key, forest)
+        if oob:
+            forest.oob_prediction_ = get_oob_prediction(forest)
+        return forest
+
+    if not isinstance(model.random_state, Integral):
+        # The trees would not be reproducible.
+        sizes = []
+
+    for size in (size for size in sizes if size >= n_estimators):
+        # Derive the forest from a larger forest.
+        try:
+            larger = cached.get_estimator(
+                get_model_key(clone(model).set_params(n_estimators=size))
+            )
+        except KeyError:
+            continue
+        logger.info(f"Truncating cached forest from {size} to {n_estimators} trees.")
+        forest = truncate_forest(larger, n_estimators)
+        if oob:
+            if hasattr(larger, "oob_sums_") and 2 * n_estimators > size:
+                # Fewer trees to remove than to keep.
+                removed_sums, removed_counts = get_oob_sums(
+                    larger, X_train, start=n_estimators
+                )
+                forest.oob_sums_ = larger.oob_sums_ - removed_sums
+                forest.oob_counts_ = larger.oob_counts_ - removed_counts
+            else:
+                _add_oob_sums(forest, X_train)
+            forest.oob_prediction_ = get_oob_prediction(forest)
+        return forest
+
+    for size in (size for size in reversed(sizes) if size < n_estimators):
+        # Grow the missing trees of a smaller forest.
+        try:
+            model = cached.get_estimator(
+                get_model_key(clone(model).set_params(n_estimators=size))
+            )
+        except KeyError:
+            continue
+        logger.info(f"Growing cached forest from {size} to {n_estimators} trees.")
+        model.set_params(warm_start=True, n_estimators=n_estimators)
+        break
+    else:
+        logger.info(f"Fitting forest with {n_estimators} trees.")
+
+    n_fitted = len(getattr(model, "estimators_", []))
+    if binner is None:
+        model.fit(X_train, y_train)
+    else:
+        model.fit(binner.fit(X_train).transform(X_train), y_train)
+        binner.unbin_trees(model.estimators_[n_fitted:])
+    model.set_params(warm_start=False)
+    if oob or hasattr(model, "oob_sums_"):
+        # Only the new trees are predicted. Stored OOB sums are kept up to date even
+        # if they are not requested.
+        _add_oob_sums(model, X_train, start=n_fitted)
+    cached.store_estimator(model_key, model)
+    index.add(forest_key, n_estimators)
+    if oob:
+        model.oob_prediction_ = get_oob_prediction(model)
+    return model
+
+
+def get_n_samples_bootstrap(n_samples, max_samples):
+    """Number of samples drawn for each tree, see `RandomForestRegressor`."""
+    if max_samples is None:
+        return n_samples
+    if isinstance(max_samples, Integral):
+        return max_samples
+    return max(int(max_samples * n_samples), 1)
+
+
+def get_unsampled_indices(random_state, n_samples, n_samples_bootstrap):
+    """Indices of the samples not drawn when fitting a tree seeded by `random_state`.
+
+    This matches the (unweighted) bootstrap sampling used by scikit-learn forests.
+
+    """
+    sample_indices = check_random_state(random_state).randint(
+        0, n_samples, n_samples_bootstrap
+    )
+    return np.where(np.bincount(sample_indices, minlength=n_samples) == 0)[0]
+
+
+def _get_oob_sums(estimators, X, n_samples_bootstrap):
+    """Sum and count the OOB predictions of `estimators` for each sample."""
+    n_samples = X.shape[0]
+    oob_sums = np.zeros(n_samples, dtype=np.float64)
+    oob_counts = np.zeros(n_samples, dtype=np.int64)
+    for estimator in estimators:
+        unsampled = get_unsampled_indices(
+            estimator.random_state, n_samples, n_samples_bootstrap
+        )
+        oob_sums[unsampled] += estimator.predict(X[unsampled], check_input=False)
+        oob_counts[unsampled] += 1
+    return oob_sums, oob_counts
+
+
+def get_oob_sums(forest, X_train, start=0, stop=None, n_jobs=-1):
+    """Sum and count the OOB predictions of the trees `forest.estimators_[start:stop]`.
+
+    Only the OOB samples of each tree are predicted. The trees are split into chunks
+    which are processed in parallel using the active joblib backend (e.g. 'dask').
+
+    Args:
+        forest (forest estimator): Forest fit on `X_train` with `bootstrap=True`.
+        X_train (array-like): Training data used to fit `forest`, in the same order.
+        start, stop (int or None): Range of trees.
+        n_jobs (int): Number of parallel jobs.
+
+    Returns:
+        oob_sums, oob_counts: Sum and number of OOB predictions for each sample.
+
+    Raises:
+        ValueError: If `forest` was not fit using bootstrapping, or if `X_train` is
+            not given.
+
+    """
+    if not forest.bootstrap:
+        raise ValueError("Out-of-bag predictions require 'bootstrap=True'.")
+    if X_train is None:
+        raise ValueError("'X_train' is needed to compute out-of-bag predictions.")
+    X_train = np.asarray(X_train, dtype=np.float32)
+    n_samples_bootstrap = get_n_samples_bootstrap(X_train.shape[0], forest.max_samples)
+    estimators = forest.estimators_[start:stop]
+    if not estimators:
+        return _get_oob_sums([], X_train, n_samples_bootstrap)
+    chunks = np.array_split(
+        np.arange(len(estimators)), min(effective_n_jobs(n_jobs), len(estimators))
+    )
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_get_oob_sums)(
+            [estimators[i] for i in chunk], X_train, n_samples_bootstrap
+        )
+        for chunk in chunks
+    )
+    return (
+        sum(oob_sums for oob_sums, _ in results),
+        sum(oob_counts for _, oob_counts in results),
+    )
+
+
+def _add_oob_sums(forest, X_train, start=0):
+    """Add the OOB sums of the trees `forest.estimators_[start:]` to the forest."""
+    if not hasattr(forest, "oob_sums_"):
+        # The OOB sums of the first trees are not known either.
+        start = 0
+    oob_sums, oob_counts = get_oob_sums(forest, X_train, start=start)
+    if start:
+        oob_sums += forest.oob_sums_
+        oob_counts += forest.oob_counts_
+    forest.oob_sums_ = oob_sums
+    forest.oob_counts_ = oob_counts
+
+
+def get_oob_prediction(forest):
+    """Return the out-of-bag predictions of a forest from its OOB sums.
+
+    Equivalent to `oob_prediction_` of a forest fit with `oob_score=True`, up to the
+    order in which tree predictions are summed.
+
+    Args:
+        forest (forest estimator): Forest with `oob_sums_` and `oob_counts_`, e.g.
+            returned by `get_forest(..., oob=True)`.
+
+    Returns:
+        array: OOB prediction for each training sample. NaN for samples which were
+            used to fit all trees (scikit-learn uses 0 instead).
+
+    """
+    n_missing = np.sum(forest.oob_counts_ == 0)
+    if n_missing:
+        logger.warning(f"{n_missing} samples have no out-of-bag predictions.")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            forest.oob_counts_ > 0, forest.oob_sums_ / forest.oob_counts_, np.nan
+        )
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""Successive halving search over feature combinations.
+
+`dask_fit_combinations` fits every feature combination with the full forest on all
+cross-validation folds. `dask_fit_combinations_halving` instead evaluates all
+combinations cheaply first and only promotes the best ones to more expensive rungs:
+
+ - Rung `r` (of `n_rungs`) uses a fraction `factor ** (r + 1 - n_rungs)` of the
+   trees, training samples and folds (subject to the given minima), so that the final
+   rung uses the full forest, all samples and all `n_splits` folds.
+ - After each rung, the best `1 / factor` of the combinations (by mean R2 over the
+   rung's folds) are promoted to the next rung.
+
+All combinations in a rung share the same folds and subsamples, and the subsamples
+of successive rungs are nested. The scores of the final rung are therefore computed
+exactly like a regular `n_splits`-fold cross-validation of the surviving
+combinations.
+
+The training data is shared with the workers using `WorkerTrainingData`, so that
+fits only receive the indices of their columns.
+
+Fold scores are appended to a results file in `cache_dir` as soon as they are
+available, so that an interrupted search resumes where it left off.
+
+"""
+import json
+import logging
+import math
+from pathlib import Path
+
+import numpy as np
+from dask.distributed import as_completed
+from joblib import hash as joblib_hash
+from joblib import parallel_backend
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+
+from .worker_data import WorkerTrainingData, default_worker_data_dir
+
+logger = logging.getLogger(__name__)
+
+
+def get_halving_schedule(
+    n_candidates,
+    n_estimators,
+    n_samples,
+    n_splits,
+    factor=3,
+    min_estimators=10,
+    min_samples=10000,
+):
+    """Determine the resources used in each rung.
+
+    Args:
+        n_candidates (int): Number of initial candidates.
+        n_estimators (int): Number of trees in the final rung.
+        n_samples (int): Number of samples in the final rung.
+        n_splits (int): Number of folds in the final rung.
+        factor (int): Fraction of candidates promoted to the next rung and resource
+            increase per rung.
+        min_estimators (int): Minimum number of trees.
+        min_samples (int): Minimum number of samples.
+
+    Returns:
+        list of dict: 'n_candidates', 'n_estimators', 'n_samples' and 'n_folds' for
+            each rung.
+
+    Examples:
+        >>> schedule = get_halving_schedule(625, 500, 10**6, 5, factor=5)
+        >>> [rung["n_candidates"] for rung in schedule]
+        [625, 125, 25, 5, 1]
+        >>> len(get_halving_schedule(624, 500, 10**6, 5, factor=5))
+        4
+        >>> len(get_halving_schedule(243, 500, 10**6, 5, factor=3))
+        6
+
+    """
+    # 1 + floor(log(n_candidates, factor)), using integer arithmetic since e.g.
+    # `math.log(243, 3)` is slightly smaller than 5.
+    n_rungs = 1
+    remaining = n_candidates
+    while remaining >= factor:
+        remaining //= factor
+        n_rungs += 1
+    schedule = []
+    for rung in range(n_rungs):
+        fraction = factor ** (rung + 1 - n_rungs)
+        schedule.append(
+            {
+                "n_candidates": math.ceil(n_candidates / factor**rung),
+                "n_estimators": min(
+                    n_estimators,
+                    max(min_estimators, math.ceil(n_estimators * fraction)),
+                ),
+                "n_samples": min(
+                    n_samples, max(min_samples, math.ceil(n_samples * fraction))
+                ),
+                "n_folds": max(1, math.ceil(n_splits * fraction)),
+            }
+        )
+    return schedule
+
+
+def _fit_score(estimator, data, column_indices, indices, n_jobs):
+    """Fit `estimator` on the given columns and rows and score it."""
+    train_indices, test_indices = indices
+    X_fit, y_fit = data.project(column_indices, train_indices)
+    X_test, y_test = data.project(column_indices, test_indices)
+    with parallel_backend("threading", n_jobs=n_jobs):
+        estimator.fit(X_fit, y_fit)
+        predicted = estimator.predict(X_test)
+    return {
+        "r2": r2_score(y_test, predicted),
+        "mse": mean_squared_error(y_test, predicted),
+    }
+
+
+class HalvingResults:
+    """Append-only record of the fold scores of a search.
+
+    Args:
+        path (str or Path or None): JSON lines results file. If None, results are
+            only kept in memory.
+
+    """
+
+    def __init__(self, path=None):
+        self.path = None if path is None else Path(path)
+        self.scores = {}
+        if self.path is not None and self.path.is_file():
+            with self.path.open() as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Incomplete line written during an interruption.
+                        continue
+                    key = (record["rung"], tuple(record["combination"]), record["fold"])
+                    self.scores[key] = record["score"]
+            logger.info(f"Loaded {len(self.scores)} fold scores from {self.path}.")
+
+    def __contains__(self, key):
+        return key in self.scores
+
+    def add(self, rung, combination, fold, score):
+        self.scores[(rung, tuple(combination), fold)] = score
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(
+                    json.dumps(
+                        {
+                            "rung": rung,
+                            "combination": list(combination),
+                            "fold": fold,
+                            "score": score,
+                        }
+                    )
+                    + "\n"
+                )
+
+    def get_test_scores(self, rung, combination, n_folds):
+        return {
+            fold: self.scores[(rung, tuple(combination), fold)]
+            for fold in range(n_folds)
+        }
+
+
+def dask_fit_combinations_halving(
+    estimator,
+    X_train,
+    y_train,
+    client,
+    combinations,
+    n_splits=5,
+    factor=3,
+    min_estimators=10,
+    min_samples=10000,
+    n_jobs=1,
+    random_state=0,
+    cache_dir=None,
+    worker_data_dir=default_worker_data_dir,
+    verbose=False,
+):
+    """Successive halving alternative to `dask_fit_combinations`.
+
+    Args:
+        estimator (forest estimator): Unfitted estimator. Its `n_estimators` are used
+            in the final rung.
+        X_train (pandas DataFrame): Training data.
+        y_train (pandas Series): Training targets.
+        client (dask.distributed.Client): Client used to run the fits.
+        combinations (iterable of tuple of str): Feature combinations.
+        n_splits (int): Number of folds in the final rung.
+        factor (int): See `get_halving_schedule`.
+        min_estimators (int): See `get_halving_schedule`.
+        min_samples (int): See `get_halving_schedule`.
+        n_jobs (int): Number of threads used by each fit.
+        random_state (int): Seed for the folds and subsamples.
+        cache_dir (str or Path or None): Directory used to store fold scores.
+        worker_data_dir (str or Path): Directory used to store the training data
+            for the workers, see `WorkerTrainingData`.
+        verbose (bool): Log the progress of each rung.
+
+    Returns:
+        scores (dict): Mapping from each combination in the final rung to its fold
+            scores `{'test_score': {fold: {'r2': ..., 'mse': ...}}}`, as returned by
+            `dask_fit_combinations`.
+        rungs (list of dict): The schedule of each rung, along with the mean R2 of
+            every combination evaluated in it ('mean_r2').
+
+    """
+    combinations = [tuple(combination) for combination in combinations]
+    n_samples = X_train.shape[0]
+    # Tasks only receive column indices into the shared training data.
+    data = WorkerTrainingData.create(X_train, y_train, cache_dir=worker_data_dir)
+    schedule = get_halving_schedule(
+        len(combinations),
+        estimator.n_estimators,
+        n_samples,
+        n_splits,
+        factor=factor,
+        min_estimators=min_estimators,
+        min_samples=min_samples,
+    )
+
+    results_path = None
+    if cache_dir is not None:
+        search_key = joblib_hash(
+            (
+                sorted(estimator.get_params().items()),
+                combinations,
+                n_splits,
+                schedule,
+                random_state,
+                data.directory.name,
+            )
+        )
+        results_path = Path(cache_dir) / "halving" / f"{search_key}.jsonl"
+    results = HalvingResults(results_path)
+
+    # Nested subsamples: rung subsamples are prefixes of one random permutation.
+    permutation = np.random.default_rng(random_state).permutation(n_samples)
+    folds = list(
+        KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(
+            np.empty((n_samples, 1))
+        )
+    )
+
+    candidates = combinations
+    rungs = []
+    for rung, rung_schedule in enumerate(schedule):
+        in_subsample = np.zeros(n_samples, dtype=np.bool_)
+        in_subsample[permutation[: rung_schedule["n_samples"]]] = True
+        rung_estimator = clone(estimator).set_params(
+            n_estimators=rung_schedule["n_estimators"]
+        )
+        fold_futures = [
+            client.scatter(
+                (
+                    train_indices[in_subsample[train_indices]],
+                    test_indices[in_subsample[test_indices]],
+                )
+            )
+            for train_indices, test_indices in folds[: rung_schedule["n_folds"]]
+        ]
+
+        futures = {}
+        for combination in candidates:
+            for fold in range(rung_schedule["n_folds"]):
+                if (rung, combination, fold) in results:
+                    continue
+                future = client.submit(
+                    _fit_score,
+                    rung_estimator,
+                    data,
+                    data.get_column_indices(combination),
+                    fold_futures[fold],
+                    n_jobs,
+                    pure=False,
+                )
+                futures[future] = (combination, fold)
+        if verbose:
+            logger.info(
+                f"Rung {rung + 1}/{len(schedule)}: {len(candidates)} combinations, "
+                f"{rung_schedule['n_estimators']} trees, "
+                f"{rung_schedule['n_samples']} samples, "
+                f"{rung_schedule['n_folds']} folds, {len(futures)} fits to run."
+            )
+        for future in as_completed(futures):
+            combination, fold = futures[future]
+            results.add(rung, combination, fold, future.result())
+
+        mean_r2 = {
+            combination: np.mean(
+                [
+                    score["r2"]
+                    for score in results.get_test_scores(
+                        rung, combination, rung_schedule["n_folds"]
+                    ).values()
+                ]
+            )
+            for combination in candidates
+        }
+        rungs.append({**rung_schedule, "mean_r2": mean_r2})
+
+        if rung < len(schedule) - 1:
+            candidates = sorted(candidates, key=mean_r2.get, reverse=True)[
+                : schedule[rung + 1]["n_candidates"]
+            ]
+
+    final_rung = len(schedule) - 1
+    scores = {
+        combination: {
+            "test_score": results.get_test_scores(
+                final_rung, combination, schedule[final_rung]["n_folds"]
+            )
+        }
+        for combination in candidates
+    }
+    return scores, rungs
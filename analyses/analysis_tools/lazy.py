@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Helpers for processing cubes with lazy (dask) data.
+
+Operations like `cube.data.mask` or `Dataset.apply_masks` realise the data of a
+cube. The functions here carry out the equivalent operations on the lazy data
+instead, so that the data is only computed chunk by chunk once it is needed.
+
+"""
+import logging
+
+import dask.array as da
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def lazify_cube(cube, time_chunk=12):
+    """Make the data of `cube` lazy, with chunks spanning `time_chunk` time steps.
+
+    Realised data is wrapped without copying it. Existing lazy data is rechunked.
+
+    """
+    if cube.coord_dims("time") != (0,):
+        raise ValueError(f"Expected time as the leading dimension of '{cube.name()}'.")
+    chunks = (time_chunk, *cube.shape[1:])
+    if cube.has_lazy_data():
+        cube.data = cube.lazy_data().rechunk(chunks)
+    else:
+        data = cube.data
+        meta = np.ma.MaskedArray(np.empty((0,) * data.ndim, dtype=data.dtype))
+        cube.data = da.from_array(data, chunks=chunks, asarray=False, meta=meta)
+    return cube
+
+
+def get_lazy_mask(cube):
+    """Return the (lazy) boolean mask of `cube` as a full array."""
+    return da.ma.getmaskarray(cube.lazy_data())
+
+
+def apply_lazy_mask(cube, mask):
+    """Mask the lazy data of `cube` where `mask` is True.
+
+    Args:
+        cube (iris.cube.Cube): Cube to mask in place.
+        mask (array): Mask which is broadcast against the trailing dimensions of
+            `cube`, e.g. a (lat, lon) mask for a (time, lat, lon) cube.
+
+    """
+    data = cube.lazy_data()
+    mask = da.broadcast_to(
+        da.from_array(np.asarray(mask, dtype=np.bool_)), data.shape
+    ).rechunk(data.chunks)
+    cube.data = da.ma.masked_array(data, mask=da.ma.getmaskarray(data) | mask)
+    return cube
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Resumable leave-one-column-out (LOCO) refits.
+
+`dask_fit_loco_resumable` refits a forest without each of the given columns (and
+with all columns for the baseline `""`) on a dask cluster. Unlike a single cached
+call of `dask_fit_loco`, the score of every left-out column is written to a
+`LocoStore` as soon as its fit finishes, and reruns only submit the columns missing
+from the store.
+
+Fits are submitted in order of decreasing number of features, as a proxy for their
+cost, so that the slowest fits do not end up at the tail of the run. Progress is
+reported as each fit finishes, along with its fit time and an estimate of the time
+remaining. The fit times are kept in the store, see `LocoStore.get_fit_times`.
+
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+
+import numpy as np
+import pandas as pd
+from dask.distributed import as_completed
+from joblib import hash as joblib_hash
+from joblib import parallel_backend
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score
+
+from .worker_data import WorkerTrainingData, default_worker_data_dir
+
+logger = logging.getLogger(__name__)
+
+
+def _get_left_out_columns(leave_out):
+    """Columns left out for a `leave_out` entry (a column, a group or `""`)."""
+    if isinstance(leave_out, str):
+        return [leave_out] if leave_out else []
+    return list(leave_out)
+
+
+class LocoStore:
+    """Per-column LOCO results, stored as one JSON file per left-out column.
+
+    Args:
+        directory (str or Path): Directory containing the results of one run.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _get_path(self, leave_out):
+        return self.directory / f"{joblib_hash(leave_out)}.json"
+
+    def __contains__(self, leave_out):
+        return self._get_path(leave_out).is_file()
+
+    def load(self, leave_out):
+        with self._get_path(leave_out).open() as f:
+            return json.load(f)["result"]
+
+    def save(self, leave_out, result):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            json.dump({"leave_out": leave_out, "result": result}, f)
+        os.replace(f.name, self._get_path(leave_out))
+
+    def get_fit_times(self):
+        """Return the fit time (in s) of each stored left-out column."""
+        fit_times = {}
+        for path in self.directory.glob("*.json"):
+            with path.open() as f:
+                data = json.load(f)
+            leave_out = data["leave_out"]
+            if isinstance(leave_out, list):
+                leave_out = tuple(leave_out)
+            fit_times[leave_out] = data["result"]["fit_time"]
+        return pd.Series(fit_times, name="fit_time", dtype=np.float64).sort_values(
+            ascending=False
+        )
+
+
+def _fit_loco(estimator, train_data, test_data, column_indices, n_jobs):
+    """Fit `estimator` using the given columns and score it on the test data."""
+    start = time()
+    X_train, y_train = train_data.project(column_indices)
+    X_test, y_test = test_data.project(column_indices)
+    with parallel_backend("threading", n_jobs=n_jobs):
+        estimator.fit(X_train, y_train)
+        predicted = estimator.predict(X_test)
+    return {
+        "r2": r2_score(y_test, predicted),
+        "mse": mean_squared_error(y_test, predicted),
+        "fit_time": time() - start,
+    }
+
+
+def dask_fit_loco_resumable(
+    estimator,
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    client,
+    leave_out,
+    cache_dir,
+    n_jobs=1,
+    worker_data_dir=default_worker_data_dir,
+    verbose=False,
+):
+    """Refit `estimator` leaving out each entry of `leave_out` in turn.
+
+    Args:
+        estimator (forest estimator): Estimator whose parameters are used for the
+            refits.
+        X_train, y_train: Training data.
+        X_test, y_test: Data used to score the refits.
+        client (dask.distributed.Client): Client used to run the fits.
+        leave_out (iterable): Columns to leave out. Entries may also be tuples of
+            columns to leave out together, or `""` for the baseline with all
+            columns.
+        cache_dir (str or Path): Directory containing the `LocoStore` of each run.
+        n_jobs (int): Number of threads used by each fit.
+        worker_data_dir (str or Path): See `WorkerTrainingData`.
+        verbose (bool): Log the progress of the fits.
+
+    Returns:
+        dict: Mapping from each entry of `leave_out` to its 'r2', 'mse' and
+            'fit_time'.
+
+    Raises:
+        ValueError: If `leave_out` contains columns which are not in `X_train`.
+
+    """
+    leave_out = [
+        entry if isinstance(entry, str) else tuple(entry) for entry in leave_out
+    ]
+    unknown = sorted(
+        {column for entry in leave_out for column in _get_left_out_columns(entry)}
+        - set(X_train.columns)
+    )
+    if unknown:
+        raise ValueError(f"Unknown columns to leave out: {unknown}.")
+    train_data = WorkerTrainingData.create(X_train, y_train, cache_dir=worker_data_dir)
+    test_data = WorkerTrainingData.create(X_test, y_test, cache_dir=worker_data_dir)
+    if test_data.columns != train_data.columns:
+        raise ValueError("The training and test data must have the same columns.")
+    store = LocoStore(
+        Path(cache_dir)
+        / "loco"
+        / joblib_hash(
+            (
+                sorted(clone(estimator).get_params().items()),
+                train_data.directory.name,
+                test_data.directory.name,
+            )
+        )
+    )
+
+    columns = {
+        entry: [
+            column
+            for column in train_data.columns
+            if column not in _get_left_out_columns(entry)
+        ]
+        for entry in leave_out
+    }
+    missing = [entry for entry in leave_out if entry not in store]
+    # Most features (i.e. the most expensive fits) first.
+    missing.sort(key=lambda entry: len(columns[entry]), reverse=True)
+    logger.info(
+        f"LOCO: {len(leave_out) - len(missing)} of {len(leave_out)} results stored "
+        f"in {store.directory}, {len(missing)} to fit."
+    )
+
+    futures = {}
+    for entry in missing:
+        future = client.submit(
+            _fit_loco,
+            clone(estimator),
+            train_data,
+            test_data,
+            train_data.get_column_indices(columns[entry]),
+            n_jobs,
+            pure=False,
+        )
+        futures[future] = entry
+
+    start = time()
+    total_cost = sum(len(columns[entry]) for entry in missing)
+    done_cost = 0
+    for i, future in enumerate(as_completed(futures)):
+        entry = futures[future]
+        result = future.result()
+        store.save(entry, result)
+        done_cost += len(columns[entry])
+        if verbose:
+            elapsed = time() - start
+            eta = elapsed * (total_cost - done_cost) / done_cost
+            logger.info(
+                f"LOCO {i + 1}/{len(missing)}: '{entry}' fit in "
+                f"{result['fit_time']:0.1f} s (R2: {result['r2']:0.4f}). "
+                f"Elapsed: {elapsed:0.0f} s, ETA: {eta:0.0f} s."
+            )
+
+    return {entry: store.load(entry) for entry in leave_out}
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Construction of the offset features used by `get_offset_data`.
+
+Features shifted by 12 or more months (e.g. 'FAPAR -18 Month') are replaced by their
+difference to the feature at the same point in the annual cycle within the last 12
+months (e.g. 'FAPAR -18 - -6 Month' = 'FAPAR -18 Month' - 'FAPAR -6 Month').
+
+"""
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def get_offset_columns(columns):
+    """Determine the offset features derived from `columns`.
+
+    Args:
+        columns (iterable of str): Feature names.
+
+    Returns:
+        list of tuple: `(column, comp_column, new_column)` for each feature to be
+            replaced by the difference `column - comp_column`, named `new_column`.
+
+    """
+    offset_columns = []
+    for column in columns:
+        match = re.search(r"-\d{1,2}", column)
+        if not match:
+            continue
+        span = match.span()
+        # Change the string to reflect the shift.
+        original_offset = int(column[slice(*span)])
+        if original_offset > -12:
+            # Only shift months that are 12 or more months before the current month.
+            continue
+        comp = -(-original_offset % 12)
+        new_column = " ".join(
+            (
+                column[: span[0] - 1],
+                f"{original_offset} - {comp}",
+                column[span[1] + 1 :],
+            )
+        )
+        if comp == 0:
+            comp_column = column[: span[0] - 1]
+        else:
+            comp_column = " ".join(
+                (column[: span[0] - 1], f"{comp}", column[span[1] + 1 :])
+            )
+        offset_columns.append((column, comp_column, new_column))
+    return offset_columns
+
+
+def get_offset_features(exog_data):
+    """Replace features shifted by 12 or more months by their offsets.
+
+    The output is backed by a single newly allocated array, which is filled column
+    by column.
+
+    Args:
+        exog_data (pandas DataFrame): Features.
+
+    Returns:
+        pandas DataFrame: The unchanged features, followed by the offset features.
+
+    """
+    offset_columns = get_offset_columns(exog_data.columns)
+    for column, comp_column, new_column in offset_columns:
+        logger.debug(f"Offset feature '{new_column}' = '{column}' - '{comp_column}'.")
+
+    replaced = {column for column, _, _ in offset_columns}
+    keep_columns = [column for column in exog_data.columns if column not in replaced]
+
+    values = np.empty(
+        (exog_data.shape[0], len(keep_columns) + len(offset_columns)),
+        dtype=np.result_type(*exog_data.dtypes),
+        order="F",
+    )
+    # Fill column by column to avoid temporary copies of (subsets of) the features.
+    for i, column in enumerate(keep_columns):
+        values[:, i] = exog_data[column].to_numpy()
+    for i, (column, comp_column, _) in enumerate(
+        offset_columns, start=len(keep_columns)
+    ):
+        np.subtract(
+            exog_data[column].to_numpy(),
+            exog_data[comp_column].to_numpy(),
+            out=values[:, i],
+        )
+    return pd.DataFrame(
+        values,
+        index=exog_data.index,
+        columns=keep_columns + [new_column for _, _, new_column in offset_columns],
+        copy=False,
+    )
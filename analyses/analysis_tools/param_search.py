@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""Streaming, resumable hyperparameter search on a dask cluster.
+
+`dask_param_search` keeps a limited number of cross-validation tasks in flight.
+Whenever one finishes, its scores are appended to a JSON lines results file and the
+next configuration is proposed, taking all results so far into account. A restarted
+search loads the results file and skips the configurations it already contains.
+
+Configurations are drawn from a discrete parameter space (as used by
+`ParameterGrid`), either exhaustively in grid order (`proposer='grid'`) or
+adaptively (`proposer='adaptive'`). The adaptive proposer evaluates
+`n_initial` random configurations first. It then fits a random forest surrogate to
+the mean scores so far and proposes the unevaluated configuration with the highest
+expected improvement, with the spread of the surrogate's trees as the uncertainty.
+
+Each task uses the threads of one worker (or the 'threads' resource of the workers,
+if defined), which are passed on as `n_jobs` to the estimator.
+
+"""
+import json
+import logging
+from pathlib import Path
+from time import time
+
+import numpy as np
+from dask.distributed import as_completed
+from joblib import hash as joblib_hash
+from joblib import parallel_backend
+from scipy.stats import norm
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import ParameterGrid, cross_val_score
+
+logger = logging.getLogger(__name__)
+
+
+def get_task_threads(client):
+    """Number of threads available to each task.
+
+    Returns:
+        n_threads (int): The smallest 'threads' resource of any worker, or the
+            smallest number of threads of any worker if no such resource is defined.
+        resources (dict or None): Resources to request for each task.
+
+    """
+    workers = client.scheduler_info()["workers"].values()
+    if not workers:
+        raise ValueError("The client has no workers.")
+    resource_threads = [
+        worker.get("resources", {}).get("threads") for worker in workers
+    ]
+    if all(threads is not None for threads in resource_threads):
+        n_threads = int(min(resource_threads))
+        return n_threads, {"threads": n_threads}
+    return min(worker["nthreads"] for worker in workers), None
+
+
+def _cross_val_score(estimator_class, training_data, params, cv, n_jobs):
+    """Cross-validate an estimator using the shared training data."""
+    start = time()
+    X, y = training_data.project(range(len(training_data.columns)))
+    estimator = estimator_class(**params, n_jobs=n_jobs)
+    with parallel_backend("threading", n_jobs=n_jobs):
+        scores = cross_val_score(estimator, X, y, cv=cv)
+    return {"scores": scores.tolist(), "fit_time": time() - start}
+
+
+class ParamSearchResults:
+    """Append-only JSON lines record of evaluated configurations."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.results = {}
+        # Configurations whose tasks failed in this session, with their errors.
+        self.failed = {}
+        if self.path.is_file():
+            with self.path.open() as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Incomplete line written during an interruption.
+                        continue
+                    self.results[self.get_key(record["params"])] = record
+            logger.info(f"Loaded {len(self.results)} results from {self.path}.")
+
+    @staticmethod
+    def get_key(params):
+        # Normalise as stored in the results file, e.g. tuples become lists.
+        return joblib_hash(sorted(json.loads(json.dumps(params)).items()))
+
+    def __contains__(self, params):
+        return self.get_key(params) in self.results
+
+    def __len__(self):
+        return len(self.results)
+
+    def add(self, params, result):
+        record = {
+            "params": params,
+            **result,
+            "mean_score": float(np.mean(result["scores"])),
+        }
+        self.results[self.get_key(params)] = record
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def add_failure(self, params, error):
+        self.failed[self.get_key(params)] = {"params": params, "error": repr(error)}
+
+    def get_best(self):
+        return max(self.results.values(), key=lambda record: record["mean_score"])
+
+
+class _PendingParams:
+    """Membership test for the configurations of pending (or failed) tasks."""
+
+    def __init__(self, pending, failed=()):
+        self.keys = {ParamSearchResults.get_key(params) for params in pending.values()}
+        self.keys.update(failed)
+
+    def __contains__(self, params):
+        return ParamSearchResults.get_key(params) in self.keys
+
+
+class GridProposer:
+    """Propose the configurations of a parameter grid in order."""
+
+    def __init__(self, candidates, random_state=0):
+        self.candidates = candidates
+
+    def propose(self, evaluated, pending):
+        for params in self.candidates:
+            if params not in evaluated and params not in pending:
+                return params
+        return None
+
+
+class AdaptiveProposer:
+    """Propose configurations by expected improvement under a forest surrogate.
+
+    Args:
+        candidates (list of dict): All configurations.
+        n_initial (int): Number of random configurations proposed before the
+            surrogate is used.
+        random_state (int): Seed.
+
+    """
+
+    def __init__(self, candidates, n_initial=10, random_state=0):
+        self.candidates = candidates
+        self.n_initial = n_initial
+        self.rng = np.random.default_rng(random_state)
+        self.encoded = self._encode(candidates)
+
+    @staticmethod
+    def _encode(candidates):
+        """Encode each parameter by the index of its value among all values."""
+        names = sorted({name for params in candidates for name in params})
+        columns = []
+        for name in names:
+            values = [repr(params.get(name)) for params in candidates]
+            unique = sorted(set(values))
+            columns.append([unique.index(value) for value in values])
+        return np.array(columns, dtype=np.float64).T
+
+    def propose(self, evaluated, pending):
+        available = [
+            i
+            for i, params in enumerate(self.candidates)
+            if params not in evaluated and params not in pending
+        ]
+        if not available:
+            return None
+        observed = [
+            i for i, params in enumerate(self.candidates) if params in evaluated
+        ]
+        if len(observed) < self.n_initial:
+            return self.candidates[self.rng.choice(available)]
+
+        scores = np.array(
+            [
+                evaluated.results[evaluated.get_key(self.candidates[i])]["mean_score"]
+                for i in observed
+            ]
+        )
+        surrogate = RandomForestRegressor(
+            n_estimators=50, min_samples_leaf=1, random_state=0
+        ).fit(self.encoded[observed], scores)
+        tree_predictions = np.array(
+            [tree.predict(self.encoded[available]) for tree in surrogate.estimators_]
+        )
+        mean = tree_predictions.mean(axis=0)
+        std = np.maximum(tree_predictions.std(axis=0), 1e-9)
+        z = (mean - scores.max()) / std
+        expected_improvement = (mean - scores.max()) * norm.cdf(z) + std * norm.pdf(z)
+        return self.candidates[available[int(np.argmax(expected_improvement))]]
+
+
+proposers = {"grid": GridProposer, "adaptive": AdaptiveProposer}
+
+
+def dask_param_search(
+    client,
+    estimator_class,
+    training_data,
+    param_space,
+    results_path,
+    n_iter=None,
+    proposer="adaptive",
+    cv=5,
+    max_pending=None,
+    random_state=0,
+):
+    """Run a streaming, resumable hyperparameter search.
+
+    Args:
+        client (dask.distributed.Client): Client used to run the tasks.
+        estimator_class (type): Estimator class, e.g. `RandomForestRegressor`.
+        training_data (WorkerTrainingData): Training data.
+        param_space (dict): Mapping from parameter names to lists of values, see
+            `ParameterGrid`.
+        results_path (str or Path): JSON lines file storing the results.
+        n_iter (int or None): Total number of configurations to evaluate
+            (including previous results). Defaults to all configurations.
+        proposer (str): 'grid' or 'adaptive'.
+        cv (int): Number of cross-validation folds.
+        max_pending (int or None): Maximum number of tasks in flight. Defaults to
+            the number of workers.
+        random_state (int): Seed of the proposer.
+
+    Returns:
+        ParamSearchResults: All results, including previous ones. Configurations
+            whose tasks failed are logged and recorded in its `failed` attribute
+            (but not in the results file, so that they are retried by a restarted
+            search). They count towards `n_iter`.
+
+    """
+    candidates = list(ParameterGrid(param_space))
+    if n_iter is None:
+        n_iter = len(candidates)
+    n_iter = min(n_iter, len(candidates))
+    results = ParamSearchResults(results_path)
+    config_proposer = proposers[proposer](candidates, random_state=random_state)
+
+    n_threads, resources = get_task_threads(client)
+    if max_pending is None:
+        max_pending = len(client.scheduler_info()["workers"])
+    logger.info(
+        f"Searching {n_iter} of {len(candidates)} configurations "
+        f"({len(results)} done) using {n_threads} threads per task."
+    )
+
+    pending = {}
+
+    def submit():
+        params = config_proposer.propose(
+            results, _PendingParams(pending, results.failed)
+        )
+        if params is None:
+            return False
+        future = client.submit(
+            _cross_val_score,
+            estimator_class,
+            training_data,
+            params,
+            cv,
+            n_threads,
+            resources=resources,
+            pure=False,
+        )
+        pending[future] = params
+        futures.add(future)
+        return True
+
+    def n_started():
+        return len(results) + len(results.failed) + len(pending)
+
+    futures = as_completed()
+    while n_started() < n_iter and len(pending) < max_pending:
+        if not submit():
+            break
+    for future in futures:
+        params = pending.pop(future)
+        try:
+            result = future.result()
+        except Exception as error:
+            # Keep the search (and the other tasks) going.
+            logger.exception(f"Task failed for {params}.")
+            results.add_failure(params, error)
+        else:
+            record = results.add(params, result)
+            logger.info(
+                f"{len(results)}/{n_iter}: mean score {record['mean_score']:0.4f} "
+                f"in {record['fit_time']:0.0f} s for {params}. "
+                f"Best: {results.get_best()['mean_score']:0.4f}."
+            )
+        if n_started() < n_iter:
+            submit()
+    if results.failed:
+        logger.warning(f"{len(results.failed)} configurations failed.")
+    return results
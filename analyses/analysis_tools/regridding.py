@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+"""Parallel regridding of datasets with shared regridding weights.
+
+By default regridding is carried out using `wildfires.data.regrid`. The regridder
+(which holds the interpolation weights) returned for the first cube on a given source
+grid is reused for all other cubes on the same grid, and independent cubes are
+regridded concurrently.
+
+Alternatively, a `RegridWeightCache` can be used. This stores the regridding weights
+between two rectilinear latitude-longitude grids as a sparse matrix on disk, keyed by
+the source grid, the target grid and the regridding scheme. Regridding a cube then
+amounts to a single sparse matrix product covering all of its time steps, and the
+weights are shared between all analyses using the same cache directory.
+
+"""
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import dask.array as da
+import iris
+import iris.analysis
+import iris.coords
+import iris.cube
+import numpy as np
+import scipy.sparse
+from joblib import hash as joblib_hash
+from wildfires.data import DATA_DIR, regrid
+from wildfires.qstat import get_ncpus
+from wildfires.utils import get_centres
+
+logger = logging.getLogger(__name__)
+
+# Cache directory shared by all analyses.
+default_weight_cache_dir = Path(DATA_DIR) / ".pickle" / "regrid_weights"
+
+
+def get_grid_key(cube):
+    """Return a key identifying the horizontal grid of `cube`.
+
+    Cubes with the same key can be regridded using the same regridder.
+
+    """
+    grid = []
+    for name in ("latitude", "longitude"):
+        coord = cube.coord(name)
+        grid.append(
+            (
+                name,
+                cube.coord_dims(coord),
+                np.asarray(coord.points),
+                None if coord.bounds is None else np.asarray(coord.bounds),
+                str(coord.units),
+                repr(coord.coord_system),
+            )
+        )
+    return joblib_hash(grid)
+
+
+def get_target_grid(
+    new_latitudes=get_centres(np.linspace(-90, 90, 721)),
+    new_longitudes=get_centres(np.linspace(-180, 180, 1441)),
+):
+    """Return latitude and longitude coordinates describing a target grid.
+
+    The defaults correspond to the 0.25 degree grid used throughout.
+
+    """
+    lat = iris.coords.DimCoord(new_latitudes, standard_name="latitude", units="degrees")
+    lon = iris.coords.DimCoord(
+        new_longitudes, standard_name="longitude", units="degrees", circular=True
+    )
+    for coord in (lat, lon):
+        coord.guess_bounds()
+    return lat, lon
+
+
+def _get_bounds(coord):
+    if coord.bounds is None:
+        coord = coord.copy()
+        coord.guess_bounds()
+    return np.sort(np.asarray(coord.bounds, dtype=np.float64), axis=1)
+
+
+def _interval_overlaps(new_bounds, old_bounds):
+    """Return a sparse matrix of the overlap lengths between two sets of intervals.
+
+    The intervals in each set are assumed not to overlap each other.
+
+    """
+    order = np.argsort(old_bounds[:, 0])
+    sorted_old = old_bounds[order]
+    # Old intervals overlapping a new interval form a contiguous range.
+    starts = np.searchsorted(sorted_old[:, 1], new_bounds[:, 0], side="right")
+    ends = np.searchsorted(sorted_old[:, 0], new_bounds[:, 1], side="left")
+
+    rows, cols, values = [], [], []
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        k = np.arange(start, end)
+        overlap = np.minimum(new_bounds[i, 1], sorted_old[k, 1]) - np.maximum(
+            new_bounds[i, 0], sorted_old[k, 0]
+        )
+        valid = overlap > 0
+        rows.append(np.full(np.sum(valid), i))
+        cols.append(order[k[valid]])
+        values.append(overlap[valid])
+    return scipy.sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(new_bounds.shape[0], old_bounds.shape[0]),
+    )
+
+
+def _linear_weights(new_points, old_points, circular=False):
+    """Return a sparse matrix of 1D linear interpolation weights.
+
+    Points outside of the old points are linearly extrapolated from the two closest
+    points (as for `iris.analysis.Linear(extrapolation_mode='linear')`), unless
+    `circular` is True, in which case the points are wrapped around (e.g. for
+    longitudes).
+
+    """
+    order = np.argsort(old_points)
+    points = np.asarray(old_points, dtype=np.float64)[order]
+    new_points = np.asarray(new_points, dtype=np.float64)
+    if circular:
+        new_points = (new_points - points[0]) % 360 + points[0]
+        points = np.concatenate((points[-1:] - 360, points, points[:1] + 360))
+        order = np.concatenate((order[-1:], order, order[:1]))
+
+    lower = np.clip(np.searchsorted(points, new_points) - 1, 0, len(points) - 2)
+    frac = (new_points - points[lower]) / (points[lower + 1] - points[lower])
+
+    n_new = len(new_points)
+    return scipy.sparse.csr_matrix(
+        (
+            np.concatenate((1 - frac, frac)),
+            (
+                np.tile(np.arange(n_new), 2),
+                np.concatenate((order[lower], order[lower + 1])),
+            ),
+        ),
+        shape=(n_new, len(old_points)),
+    )
+
+
+def get_weights(src_lat, src_lon, tgt_lat, tgt_lon, scheme):
+    """Compute the weights for regridding between two rectilinear grids.
+
+    Args:
+        src_lat, src_lon, tgt_lat, tgt_lon (iris.coords.Coord): 1D source and
+            target grid coordinates.
+        scheme ({'area_weighted', 'linear'}): First-order conservative or bilinear
+            regridding.
+
+    Returns:
+        scipy.sparse.csr_matrix: Matrix of shape (n_tgt_lat * n_tgt_lon, n_src_lat
+            * n_src_lon) operating on (lat, lon) grids flattened in C order.
+
+    """
+    if scheme == "area_weighted":
+        # On a sphere, the cell area is proportional to the product of the
+        # longitude extent and the difference of the sines of the latitude bounds.
+        lat_weights = _interval_overlaps(
+            *(
+                np.sin(np.radians(np.clip(_get_bounds(coord), -90, 90)))
+                for coord in (tgt_lat, src_lat)
+            )
+        )
+        src_lon_bounds = _get_bounds(src_lon)
+        n_src_lon = src_lon_bounds.shape[0]
+        # Account for all possible longitude wraparounds.
+        lon_overlaps = _interval_overlaps(
+            _get_bounds(tgt_lon),
+            np.concatenate([src_lon_bounds + offset for offset in (-360, 0, 360)]),
+        ).tocoo()
+        lon_weights = scipy.sparse.csr_matrix(
+            (lon_overlaps.data, (lon_overlaps.row, lon_overlaps.col % n_src_lon)),
+            shape=(lon_overlaps.shape[0], n_src_lon),
+        )
+    elif scheme == "linear":
+        lat_weights = _linear_weights(tgt_lat.points, src_lat.points)
+        lon_weights = _linear_weights(
+            tgt_lon.points,
+            src_lon.points,
+            circular=bool(getattr(src_lon, "circular", False))
+            or np.isclose(np.ptp(_get_bounds(src_lon)), 360),
+        )
+    else:
+        raise ValueError(f"Unknown scheme '{scheme}'.")
+    return scipy.sparse.kron(lat_weights, lon_weights, format="csr")
+
+
+def get_default_scheme(src_lat, src_lon, tgt_lat, tgt_lon):
+    """Use area weighting when reducing the resolution, linear interpolation otherwise."""
+    src_res = [np.median(np.abs(np.diff(c.points))) for c in (src_lat, src_lon)]
+    tgt_res = [np.median(np.abs(np.diff(c.points))) for c in (tgt_lat, tgt_lon)]
+    if all(src <= tgt for src, tgt in zip(src_res, tgt_res)):
+        return "area_weighted"
+    return "linear"
+
+
+def _regrid_grid_last(data, weights, scheme, mdtol, new_grid_shape, dtype):
+    """Regrid `data` whose last two dimensions are latitude and longitude.
+
+    All leading (e.g. time) dimensions are regridded using a single sparse matrix
+    product. See `RegridWeightCache.regrid`.
+
+    """
+    other_shape = data.shape[:-2]
+    flat = data.reshape(-1, data.shape[-2] * data.shape[-1]).T
+    mask = np.ma.getmaskarray(flat)
+
+    masked_weights = weights @ mask.astype(np.float64)
+    if scheme == "area_weighted":
+        regridded = weights @ np.where(mask, 0, np.ma.getdata(flat))
+        total_weights = np.asarray(weights.sum(axis=1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            regridded /= total_weights - masked_weights
+        new_mask = (masked_weights > mdtol * total_weights) | (total_weights == 0)
+    else:
+        # As for `iris.analysis.Linear`, the underlying data of masked points is
+        # used. This only matters where extrapolation weights are negative, which
+        # can cancel the contributions of masked points to `masked_weights`.
+        regridded = weights @ np.ma.getdata(flat)
+        new_mask = masked_weights > 0
+
+    new_shape = (*other_shape, *new_grid_shape)
+    return np.ma.MaskedArray(
+        regridded.T.reshape(new_shape), mask=new_mask.T.reshape(new_shape)
+    ).astype(dtype)
+
+
+class RegridWeightCache:
+    """Persistent cache of sparse regridding weight matrices.
+
+    Weights are stored as `cache_dir / <key>.npz`, with the key derived from the
+    source grid coordinates, the target grid coordinates and the scheme. Weights are
+    also kept in memory, and computing the weights for a given key is only ever
+    carried out by one thread at a time.
+
+    """
+
+    def __init__(self, cache_dir=default_weight_cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self._weights = {}
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled (e.g. for use with a process pool).
+        return {"cache_dir": self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_dir"])
+
+    def get_weights(self, src_lat, src_lon, tgt_lat, tgt_lon, scheme):
+        """Load or compute (and store) the weights, see `get_weights`."""
+        key = joblib_hash(
+            (
+                [
+                    (np.asarray(coord.points), _get_bounds(coord))
+                    for coord in (src_lat, src_lon, tgt_lat, tgt_lon)
+                ],
+                scheme,
+            )
+        )
+        with self._locks_lock:
+            lock = self._locks[key]
+        with lock:
+            if key not in self._weights:
+                path = self.cache_dir / f"{key}.npz"
+                if path.is_file():
+                    self._weights[key] = scipy.sparse.load_npz(path)
+                else:
+                    logger.info(f"Computing '{scheme}' regridding weights ({key}).")
+                    weights = get_weights(src_lat, src_lon, tgt_lat, tgt_lon, scheme)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with NamedTemporaryFile(
+                        dir=path.parent, suffix=".npz", delete=False
+                    ) as f:
+                        scipy.sparse.save_npz(f, weights)
+                    os.replace(f.name, path)
+                    self._weights[key] = weights
+        return self._weights[key]
+
+    def regrid(self, cube, target_grid=None, scheme=None, mdtol=0):
+        """Regrid `cube` using cached weights.
+
+        Args:
+            cube (iris.cube.Cube): Cube with 1D latitude and longitude dimension
+                coordinates.
+            target_grid ((DimCoord, DimCoord)): Target latitudes and longitudes.
+                Defaults to `get_target_grid()`.
+            scheme ({'area_weighted', 'linear', None}): Regridding scheme. If None,
+                `get_default_scheme()` is used.
+            mdtol (float): For area weighting, the tolerated fraction of masked
+                source data contributing to a target cell before it is masked.
+                For linear regridding, target cells are masked where the
+                interpolated mask is positive, as for `iris.analysis.Linear`.
+
+        Returns:
+            iris.cube.Cube: The regridded cube.
+
+        """
+        if target_grid is None:
+            target_grid = get_target_grid()
+        tgt_lat, tgt_lon = target_grid
+        src_lat, src_lon = cube.coord("latitude"), cube.coord("longitude")
+        lat_dim, lon_dim = cube.coord_dims(src_lat)[0], cube.coord_dims(src_lon)[0]
+        if scheme is None:
+            scheme = get_default_scheme(src_lat, src_lon, tgt_lat, tgt_lon)
+        weights = self.get_weights(src_lat, src_lon, tgt_lat, tgt_lon, scheme)
+
+        # Move the grid dimensions to the end.
+        data = cube.core_data()
+        data = (da if cube.has_lazy_data() else np).moveaxis(
+            data, (lat_dim, lon_dim), (-2, -1)
+        )
+        dtype = cube.dtype if np.issubdtype(cube.dtype, np.floating) else np.float64
+        regrid_kwargs = dict(
+            weights=weights,
+            scheme=scheme,
+            mdtol=mdtol,
+            new_grid_shape=(len(tgt_lat.points), len(tgt_lon.points)),
+            dtype=dtype,
+        )
+        if cube.has_lazy_data():
+            # Regrid each chunk (spanning the entire grid) separately.
+            data = data.rechunk({-2: -1, -1: -1})
+            new_data = data.map_blocks(
+                partial(_regrid_grid_last, **regrid_kwargs),
+                chunks=data.chunks[:-2]
+                + tuple((n,) for n in regrid_kwargs["new_grid_shape"]),
+                dtype=dtype,
+                meta=np.ma.MaskedArray(np.empty((0,) * data.ndim, dtype=dtype)),
+            )
+            new_data = da.moveaxis(new_data, (-2, -1), (lat_dim, lon_dim))
+        else:
+            new_data = np.moveaxis(
+                _regrid_grid_last(data, **regrid_kwargs), (-2, -1), (lat_dim, lon_dim)
+            )
+
+        new_cube = iris.cube.Cube(new_data)
+        new_cube.metadata = cube.metadata
+        for coord in cube.dim_coords:
+            (dim,) = cube.coord_dims(coord)
+            if dim not in (lat_dim, lon_dim):
+                new_cube.add_dim_coord(coord.copy(), dim)
+        for coord, dim in ((tgt_lat, lat_dim), (tgt_lon, lon_dim)):
+            coord = coord.copy()
+            coord.coord_system = cube.coord(coord.standard_name).coord_system
+            new_cube.add_dim_coord(coord, dim)
+        for coord in cube.aux_coords:
+            dims = cube.coord_dims(coord)
+            if lat_dim not in dims and lon_dim not in dims:
+                new_cube.add_aux_coord(coord.copy(), dims)
+        return new_cube
+
+
+def _regrid_cube(cube, regridder=None, weight_cache=None, **regrid_kwargs):
+    """Regrid `cube`, returning the regridded cube and the regridder used."""
+    if weight_cache is not None:
+        return weight_cache.regrid(cube, **regrid_kwargs), None
+    if regridder is None:
+        return regrid(cube, return_regridder=True, **regrid_kwargs)
+    return regrid(cube, regridder=regridder, **regrid_kwargs), regridder
+
+
+def regrid_datasets(
+    datasets, n_workers=None, processes=False, weight_cache=None, **regrid_kwargs
+):
+    """Regrid all cubes in `datasets` in place.
+
+    The first cube on each source grid is regridded first, after which all other
+    cubes on this grid are regridded using the resulting regridder (or the weights
+    stored in `weight_cache`). This means that regridding weights are only computed
+    once per source grid.
+
+    Args:
+        datasets (iterable of Dataset): Datasets to regrid.
+        n_workers (int or None): Number of workers. Defaults to `get_ncpus()`.
+        processes (bool): If True, use a process pool. Otherwise a thread pool is
+            used, which avoids copying the data between processes and is efficient
+            as long as the regridding releases the GIL.
+        weight_cache (RegridWeightCache or None): If given, regrid using
+            `weight_cache.regrid` instead of `wildfires.data.regrid`.
+        **regrid_kwargs: Additional keyword arguments for the regridding function
+            which are common to all cubes.
+
+    Returns:
+        list of Dataset: The regridded datasets.
+
+    """
+    datasets = list(datasets)
+    if n_workers is None:
+        n_workers = get_ncpus()
+    if weight_cache is not None:
+        regrid_kwargs["weight_cache"] = weight_cache
+
+    # Group cubes (identified by their dataset and cube index) by their grid.
+    grid_groups = defaultdict(list)
+    for i, dataset in enumerate(datasets):
+        for j, cube in enumerate(dataset.cubes):
+            grid_groups[get_grid_key(cube)].append((i, j))
+
+    logger.info(
+        f"Regridding {sum(map(len, grid_groups.values()))} cubes on "
+        f"{len(grid_groups)} grids using {n_workers} workers."
+    )
+
+    regridded = {}
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=n_workers) as executor:
+        # Regrid the first cube of each group, yielding the group's regridder.
+        futures = {
+            executor.submit(
+                _regrid_cube, datasets[i].cubes[j], **regrid_kwargs
+            ): grid_key
+            for grid_key, ((i, j), *_) in grid_groups.items()
+        }
+        remaining = {}
+        for future in as_completed(futures):
+            grid_key = futures[future]
+            first, *others = grid_groups[grid_key]
+            regridded[first], regridder = future.result()
+            for i, j in others:
+                remaining[
+                    executor.submit(
+                        _regrid_cube,
+                        datasets[i].cubes[j],
+                        regridder=regridder,
+                        **regrid_kwargs,
+                    )
+                ] = (i, j)
+        for future in as_completed(remaining):
+            regridded[remaining[future]] = future.result()[0]
+
+    for i, dataset in enumerate(datasets):
+        dataset.cubes = iris.cube.CubeList(
+            regridded[(i, j)] for j in range(len(dataset.cubes))
+        )
+    return datasets
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""Tiled, parallel persistent minimum and season-trend gap filling.
+
+Gaps are filled in two steps, following `Dataset.get_persistent_season_trend_dataset`:
+
+ 1. Persistent gaps, i.e. months of the year which are missing in at least
+    `persistent_perc` % of years at a given location, are filled with the minimum
+    observed value at that location.
+ 2. All remaining gaps at locations with some valid data are filled using a
+    season-trend model (offset, linear trend and `k` harmonics of the annual cycle)
+    which is fit to the valid data at each location.
+
+The season-trend model is linear in its parameters, so the fit at every location
+reduces to a small least squares problem. These are solved for entire tiles of the
+grid at once, with tiles being distributed across a process pool. Tiles without any
+gaps to fill at locations with valid data (e.g. ocean tiles) are skipped entirely.
+
+Several `(persistent_perc, k)` combinations can be computed in one pass over the
+data using `get_persistent_season_trend_sweep`. The monthly missing fractions and
+minima are shared between all combinations, and the model basis for a smaller `k`
+is a prefix of the basis for the largest `k`, so a single set of normal equations
+per `persistent_perc` serves every `k`.
+
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from itertools import product
+
+import iris
+import numpy as np
+from wildfires.qstat import get_ncpus
+
+logger = logging.getLogger(__name__)
+
+
+def get_season_trend_basis(n_times, k):
+    """Return the season-trend model design matrix.
+
+    Args:
+        n_times (int): Number of (monthly) time steps.
+        k (int): Number of harmonics of the annual cycle.
+
+    Returns:
+        array of shape (n_times, 2 + 2 * k): Columns are the offset, the linear trend
+            and the sine and cosine of each harmonic in order. The basis for a smaller
+            `k` is therefore given by the leading columns.
+
+    """
+    t = np.arange(n_times, dtype=np.float64)
+    columns = [np.ones_like(t), t]
+    for j in range(1, k + 1):
+        columns.append(np.sin(2 * np.pi * j * t / 12))
+        columns.append(np.cos(2 * np.pi * j * t / 12))
+    return np.stack(columns, axis=1)
+
+
+def _persistent_fill(data, mask, month_numbers, persistent_perc, minima, month_frac):
+    """Fill persistent gaps with the minimum at each location.
+
+    Returns:
+        data, mask: Filled copies of `data` and `mask`.
+
+    """
+    data = data.copy()
+    mask = mask.copy()
+    has_valid = ~np.all(mask, axis=0)
+    for month_number, missing_frac in month_frac.items():
+        persistent = ((missing_frac + 1e-5) >= persistent_perc / 100) & has_valid
+        for month_index in np.where(month_numbers == month_number)[0]:
+            fill_mask = persistent & mask[month_index]
+            data[month_index][fill_mask] = minima[fill_mask]
+            mask[month_index][fill_mask] = False
+    return data, mask
+
+
+def _season_trend_fill_tile(data, mask, month_numbers, params):
+    """Carry out persistent and season-trend filling for a single tile.
+
+    Args:
+        data (array of shape (time, lat, lon)): Data with arbitrary values at masked
+            locations.
+        mask (array of shape (time, lat, lon)): Data mask.
+        month_numbers (array of shape (time,)): Month numbers in [1, 12].
+        params (iterable of tuple): `(persistent_perc, k)` combinations.
+
+    Returns:
+        dict: Mapping from `(persistent_perc, k)` to the filled data and mask.
+
+    """
+    n_times = data.shape[0]
+    valid = ~mask
+    # Shared between all combinations.
+    minima = np.where(valid, data, np.inf).min(axis=0)
+    month_frac = {
+        month_number: np.mean(mask[month_numbers == month_number], axis=0)
+        for month_number in np.unique(month_numbers)
+    }
+    params = list(params)
+    max_k = max(k for _, k in params)
+    basis = get_season_trend_basis(n_times, max_k)
+
+    results = {}
+    for persistent_perc in sorted(set(perc for perc, _ in params)):
+        filled, filled_mask = _persistent_fill(
+            data, mask, month_numbers, persistent_perc, minima, month_frac
+        )
+        # Fit where there is some valid data, but not only valid data, since there
+        # would be nothing to fill in the latter case.
+        fill_locs = np.any(~filled_mask, axis=0) & np.any(filled_mask, axis=0)
+        weights = (~filled_mask[:, fill_locs]).astype(np.float64)
+        values = np.where(filled_mask, 0, filled)[:, fill_locs].astype(np.float64)
+
+        # Normal equations for the largest `k` at all locations to fit.
+        gram = np.einsum("tm,tn,tp->pmn", basis, basis, weights, optimize=True)
+        moments = np.einsum("tm,tp->pm", basis, values, optimize=True)
+
+        for k in sorted(k for perc, k in params if perc == persistent_perc):
+            n_params = 2 + 2 * k
+            coefs = np.einsum(
+                "pmn,pn->pm",
+                np.linalg.pinv(gram[:, :n_params, :n_params], hermitian=True),
+                moments[:, :n_params],
+            )
+            fitted = basis[:, :n_params] @ coefs.T
+
+            combination_data = filled.copy()
+            loc_data = combination_data[:, fill_locs]
+            loc_mask = filled_mask[:, fill_locs]
+            loc_data[loc_mask] = fitted[loc_mask]
+            combination_data[:, fill_locs] = loc_data
+
+            combination_mask = filled_mask.copy()
+            combination_mask[:, fill_locs] = False
+            results[(persistent_perc, k)] = (combination_data, combination_mask)
+    return results
+
+
+def _get_tiles(shape, tile_shape):
+    for lat_start, lon_start in product(
+        range(0, shape[0], tile_shape[0]), range(0, shape[1], tile_shape[1])
+    ):
+        yield (
+            slice(lat_start, lat_start + tile_shape[0]),
+            slice(lon_start, lon_start + tile_shape[1]),
+        )
+
+
+def _season_trend_fill_block(block, month_numbers, combination):
+    """Fill a (masked) block spanning all times, see `_season_trend_fill_tile`."""
+    data = np.ma.getdata(block)
+    mask = np.ma.getmaskarray(block)
+    if not np.any(np.any(~mask, axis=0) & np.any(mask, axis=0)):
+        # Nothing to fill.
+        return np.ma.MaskedArray(data, mask=mask)
+    filled_data, filled_mask = _season_trend_fill_tile(
+        data, mask, month_numbers, [combination]
+    )[combination]
+    return np.ma.MaskedArray(filled_data, mask=filled_mask)
+
+
+def _season_trend_fill_lazy(cube, params, tile_shape):
+    """Lazy equivalent of `season_trend_fill_cube`.
+
+    Each tile is filled separately once it is computed, e.g. by the dask scheduler.
+    Different parameter combinations do not share any computations in this case.
+
+    """
+    month_numbers = np.array([cell.point.month for cell in cube.coord("time").cells()])
+    data = cube.lazy_data().rechunk((-1, *tile_shape))
+    logger.info(
+        f"Filling '{cube.name()}' lazily for {len(params)} parameter combinations "
+        f"using {data.npartitions} tiles."
+    )
+    return {
+        combination: data.map_blocks(
+            partial(
+                _season_trend_fill_block,
+                month_numbers=month_numbers,
+                combination=combination,
+            ),
+            dtype=data.dtype,
+            meta=np.ma.MaskedArray(np.empty((0, 0, 0), dtype=data.dtype)),
+        )
+        for combination in params
+    }
+
+
+def season_trend_fill_cube(cube, params, tile_shape=(90, 180), n_workers=None):
+    """Carry out persistent and season-trend filling of `cube`.
+
+    If `cube` has lazy data, the filling is deferred until the returned (dask)
+    arrays are computed and `n_workers` is ignored.
+
+    Args:
+        cube (iris.cube.Cube): Monthly cube with dimensions (time, lat, lon).
+        params (iterable of tuple): `(persistent_perc, k)` combinations.
+        tile_shape (tuple of int): Number of latitudes and longitudes per tile.
+        n_workers (int or None): Number of worker processes. Defaults to
+            `get_ncpus()`.
+
+    Returns:
+        dict: Mapping from `(persistent_perc, k)` to the filled masked array.
+
+    """
+    params = [(persistent_perc, k) for persistent_perc, k in params]
+    if cube.has_lazy_data():
+        return _season_trend_fill_lazy(cube, params, tile_shape)
+    if n_workers is None:
+        n_workers = get_ncpus()
+
+    data = np.ma.getdata(cube.data)
+    mask = np.ma.getmaskarray(cube.data)
+    month_numbers = np.array([cell.point.month for cell in cube.coord("time").cells()])
+
+    # Only locations with some valid and some missing data are changed.
+    any_valid = np.any(~mask, axis=0)
+    any_missing = np.any(mask, axis=0)
+    to_fill = any_valid & any_missing
+
+    results = {combination: (data.copy(), mask.copy()) for combination in params}
+    tiles = [
+        tile for tile in _get_tiles(to_fill.shape, tile_shape) if to_fill[tile].any()
+    ]
+    logger.info(
+        f"Filling '{cube.name()}' for {len(params)} parameter combinations using "
+        f"{len(tiles)} tiles and {n_workers} workers."
+    )
+
+    # Workers are started by a fork server, since forking the current process is
+    # unsafe once it runs threads (e.g. those of dask or numba).
+    with ProcessPoolExecutor(
+        max_workers=n_workers, mp_context=multiprocessing.get_context("forkserver")
+    ) as executor:
+        futures = {
+            executor.submit(
+                _season_trend_fill_tile,
+                data[(slice(None), *tile)],
+                mask[(slice(None), *tile)],
+                month_numbers,
+                params,
+            ): tile
+            for tile in tiles
+        }
+        for future in as_completed(futures):
+            tile = (slice(None), *futures[future])
+            for combination, (tile_data, tile_mask) in future.result().items():
+                results[combination][0][tile] = tile_data
+                results[combination][1][tile] = tile_mask
+
+    return {
+        combination: np.ma.MaskedArray(combination_data, mask=combination_mask)
+        for combination, (combination_data, combination_mask) in results.items()
+    }
+
+
+def get_persistent_season_trend_sweep(dataset, params, **kwargs):
+    """Carry out persistent and season-trend filling for multiple parameters.
+
+    Args:
+        dataset (Dataset): Dataset containing monthly cubes to fill.
+        params (iterable of tuple): `(persistent_perc, k)` combinations.
+        **kwargs: Passed to `season_trend_fill_cube`.
+
+    Returns:
+        dict: Mapping from `(persistent_perc, k)` to the filled Dataset. Variable
+            names are suffixed with ' {persistent_perc}P {k}k'.
+
+    """
+    params = list(params)
+    filled_cubes = {combination: [] for combination in params}
+    for cube in dataset.cubes:
+        for (persistent_perc, k), filled_data in season_trend_fill_cube(
+            cube, params, **kwargs
+        ).items():
+            filled_cube = cube.copy(data=filled_data.astype(cube.dtype, copy=False))
+            filled_cube.rename(f"{cube.name()} {persistent_perc}P {k}k")
+            filled_cubes[(persistent_perc, k)].append(filled_cube)
+
+    filled_datasets = {}
+    for combination, cubes in filled_cubes.items():
+        filled_dataset = dataset.copy(deep=False)
+        filled_dataset.cubes = iris.cube.CubeList(cubes)
+        filled_datasets[combination] = filled_dataset
+    return filled_datasets
+
+
+def get_persistent_season_trend_dataset(dataset, persistent_perc=50, k=4, **kwargs):
+    """Tiled, parallel equivalent of `Dataset.get_persistent_season_trend_dataset`.
+
+    Args:
+        dataset (Dataset): Dataset containing monthly cubes to fill.
+        persistent_perc (int): Percentage of years a given month has to be missing
+            in for it to be filled using the minimum.
+        k (int): Number of harmonics used in the season-trend model.
+        **kwargs: Passed to `season_trend_fill_cube`.
+
+    Returns:
+        Dataset: The filled dataset.
+
+    """
+    return get_persistent_season_trend_sweep(dataset, [(persistent_perc, k)], **kwargs)[
+        (persistent_perc, k)
+    ]
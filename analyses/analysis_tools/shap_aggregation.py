@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""Streaming aggregation of SHAP values per grid cell.
+
+`ShapMapAggregator` maintains, for every grid cell and feature, running moments of
+the SHAP values and their absolute values (using the parallel variant of Welford's
+algorithm by Chan et al.) along with the value of maximum magnitude over time. It
+consumes samples in any order and in batches of any size, e.g. SHAP chunks as they
+are written by array jobs, so that the full `(n_samples, n_features)` array is never
+needed in memory.
+
+Aggregators are mergeable (`merge`), and can be saved to and loaded from a
+checkpoint file (`save`, `load`). The indices of the chunks which have been added
+are recorded, so that chunks are never counted twice.
+
+Samples are identified by their flat index into the `(time, lat, lon)` grid, as
+used with `master_mask`. Only the grid cells given at construction (e.g. the cells
+with any valid samples) are stored.
+
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from types import SimpleNamespace
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Running statistics, along with their dtypes.
+_state_arrays = {
+    "count": np.int64,
+    "mean": np.float64,
+    "m2": np.float64,
+    "abs_mean": np.float64,
+    "abs_m2": np.float64,
+    "max_value": np.float64,
+    "max_time": np.int64,
+}
+
+# Time index of cells without samples, larger than any valid time index.
+_no_time = np.iinfo(np.int64).max
+
+
+class ShapMapAggregator:
+    """Running per-grid-cell statistics of SHAP values.
+
+    Args:
+        grid_shape (tuple of int): Shape of the `(time, lat, lon)` grid.
+        cells (array of int): Flat spatial (`(lat, lon)`) indices of the cells to
+            aggregate.
+        n_features (int): Number of features.
+
+    """
+
+    def __init__(self, grid_shape, cells, n_features):
+        self.grid_shape = tuple(int(n) for n in grid_shape)
+        self.n_cells = int(np.prod(self.grid_shape[1:]))
+        self.cells = np.unique(np.asarray(cells, dtype=np.int64))
+        self.n_features = int(n_features)
+        self.chunks = set()
+        shape = (self.cells.size, self.n_features)
+        for name, dtype in _state_arrays.items():
+            setattr(
+                self,
+                name,
+                np.zeros(self.cells.size if name == "count" else shape, dtype),
+            )
+        self.max_time[:] = _no_time
+
+    def __repr__(self):
+        return (
+            f"ShapMapAggregator(cells={self.cells.size}, features={self.n_features}, "
+            f"samples={self.n_samples}, chunks={len(self.chunks)})"
+        )
+
+    @property
+    def n_samples(self):
+        return int(np.sum(self.count))
+
+    def _merge_cells(self, sel, other, other_sel):
+        """Merge the statistics of `other_sel` in `other` into the cells `sel`."""
+        count_a = self.count[sel][:, None].astype(np.float64)
+        count_b = other.count[other_sel][:, None].astype(np.float64)
+        count = count_a + count_b
+        # Cells without any samples in either aggregator are left unchanged.
+        frac_b = np.divide(count_b, count, out=np.zeros_like(count), where=count > 0)
+        prod = np.divide(
+            count_a * count_b, count, out=np.zeros_like(count), where=count > 0
+        )
+        for mean_name, m2_name in (("mean", "m2"), ("abs_mean", "abs_m2")):
+            mean_a = getattr(self, mean_name)[sel]
+            delta = getattr(other, mean_name)[other_sel] - mean_a
+            getattr(self, mean_name)[sel] = mean_a + delta * frac_b
+            getattr(self, m2_name)[sel] = (
+                getattr(self, m2_name)[sel]
+                + getattr(other, m2_name)[other_sel]
+                + delta**2 * prod
+            )
+        self.count[sel] += other.count[other_sel]
+
+        # Largest magnitude, preferring the earliest time for ties (as `np.argmax`).
+        abs_a = np.abs(self.max_value[sel])
+        abs_b = np.abs(other.max_value[other_sel])
+        time_a = self.max_time[sel]
+        time_b = other.max_time[other_sel]
+        replace = (time_b != _no_time) & (
+            (time_a == _no_time)
+            | (abs_b > abs_a)
+            | ((abs_b == abs_a) & (time_b < time_a))
+        )
+        self.max_value[sel] = np.where(
+            replace, other.max_value[other_sel], self.max_value[sel]
+        )
+        self.max_time[sel] = np.where(replace, time_b, time_a)
+
+    def update(self, flat_indices, values, chunk=None):
+        """Add samples.
+
+        Args:
+            flat_indices (array of int): Flat `(time, lat, lon)` grid index of each
+                sample.
+            values (array): `(n_samples, n_features)` SHAP values.
+            chunk (int or None): Index of the chunk containing the samples. Chunks
+                which have already been added are ignored.
+
+        Returns:
+            bool: True if the samples were added.
+
+        Raises:
+            ValueError: If samples fall outside of the aggregated cells.
+
+        """
+        if chunk is not None and chunk in self.chunks:
+            logger.debug(f"Chunk {chunk} has already been added.")
+            return False
+        flat_indices = np.asarray(flat_indices, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if not flat_indices.size:
+            if chunk is not None:
+                self.chunks.add(chunk)
+            return True
+        times, cells = np.divmod(flat_indices, self.n_cells)
+        positions = np.searchsorted(self.cells, cells)
+        if np.any(positions >= self.cells.size) or np.any(
+            self.cells[np.minimum(positions, self.cells.size - 1)] != cells
+        ):
+            raise ValueError("Samples outside of the aggregated cells.")
+
+        # Statistics of the samples in each of their cells.
+        batch_cells, inverse, counts = np.unique(
+            positions, return_inverse=True, return_counts=True
+        )
+        batch = SimpleNamespace(count=counts)
+        for mean_name, m2_name, sample_values in (
+            ("mean", "m2", values),
+            ("abs_mean", "abs_m2", np.abs(values)),
+        ):
+            mean = np.empty((batch_cells.size, self.n_features))
+            m2 = np.empty((batch_cells.size, self.n_features))
+            for i in range(self.n_features):
+                mean[:, i] = np.bincount(inverse, sample_values[:, i]) / counts
+                m2[:, i] = np.bincount(
+                    inverse, (sample_values[:, i] - mean[inverse, i]) ** 2
+                )
+            setattr(batch, mean_name, mean)
+            setattr(batch, m2_name, m2)
+
+        # Value of the largest magnitude (earliest for ties) in each cell.
+        batch.max_value = np.empty((batch_cells.size, self.n_features))
+        batch.max_time = np.empty((batch_cells.size, self.n_features), dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for i in range(self.n_features):
+            order = np.lexsort((times, -np.abs(values[:, i]), inverse))
+            batch.max_value[:, i] = values[order[starts], i]
+            batch.max_time[:, i] = times[order[starts]]
+
+        self._merge_cells(batch_cells, batch, slice(None))
+        if chunk is not None:
+            self.chunks.add(chunk)
+        return True
+
+    def merge(self, other):
+        """Merge the statistics of another aggregator of the same cells into this one.
+
+        Raises:
+            ValueError: If the aggregators are incompatible or share chunks.
+
+        """
+        if (
+            other.grid_shape != self.grid_shape
+            or other.n_features != self.n_features
+            or not np.array_equal(other.cells, self.cells)
+        ):
+            raise ValueError("Incompatible aggregators.")
+        if self.chunks & other.chunks:
+            raise ValueError(
+                f"Chunks {sorted(self.chunks & other.chunks)} would be counted twice."
+            )
+        self._merge_cells(slice(None), other, slice(None))
+        self.chunks |= other.chunks
+        return self
+
+    def save(self, path):
+        """Save the state to `path` (.npz) atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            np.savez(
+                f,
+                cells=self.cells,
+                metadata=json.dumps(
+                    {
+                        "grid_shape": self.grid_shape,
+                        "n_features": self.n_features,
+                        "chunks": sorted(self.chunks),
+                    }
+                ),
+                **{name: getattr(self, name) for name in _state_arrays},
+            )
+        os.replace(f.name, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an aggregator saved using `save`."""
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            aggregator = cls(
+                metadata["grid_shape"], data["cells"], metadata["n_features"]
+            )
+            for name in _state_arrays:
+                setattr(aggregator, name, data[name])
+        aggregator.chunks = set(metadata["chunks"])
+        return aggregator
+
+    def _to_map(self, values):
+        """Scatter per-cell values into masked `(lat, lon)` arrays."""
+        out = np.ma.MaskedArray(
+            np.zeros(self.n_cells, dtype=values.dtype),
+            mask=np.ones(self.n_cells, dtype=np.bool_),
+        )
+        valid = self.count > 0
+        out[self.cells[valid]] = values[valid]
+        return out.reshape(self.grid_shape[1:])
+
+    def get_maps(self, feature):
+        """Maps of the aggregated SHAP values of a feature (by index).
+
+        Returns:
+            dict of masked arrays: `(lat, lon)` maps of the 'mean', 'std' (as
+                `np.std`, i.e. with `ddof=0`), 'abs_mean', 'abs_std' and 'abs_max'
+                (the value with the largest magnitude) of the SHAP values over time.
+                Cells without samples are masked.
+
+        """
+        count = np.maximum(self.count, 1)
+        return {
+            "mean": self._to_map(self.mean[:, feature]),
+            "std": self._to_map(np.sqrt(self.m2[:, feature] / count)),
+            "abs_mean": self._to_map(self.abs_mean[:, feature]),
+            "abs_std": self._to_map(np.sqrt(self.abs_m2[:, feature] / count)),
+            "abs_max": self._to_map(self.max_value[:, feature]),
+        }
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""Compact storage of SHAP interaction values.
+
+SHAP interaction values form a symmetric `(n_features, n_features)` matrix for every
+sample, with the main effects on the diagonal and each interaction effect split
+equally between `[i, j]` and `[j, i]`. Only the upper triangle (including the
+diagonal) is therefore stored, i.e. `n_features * (n_features + 1) / 2` values per
+sample in the order of `np.triu_indices(n_features)`, optionally as float32. For
+~50 features this reduces the size of the values by a factor of ~2 (~4 for float32).
+The matrices calculated by `shap` are symmetric up to round-off errors, which are
+discarded along with the lower triangles.
+
+`PackedInteractionValues` wraps such packed values (e.g. memory-mapped from a
+`ShapStore`) and provides main effects, per-pair values, per-feature slices and
+reductions without materialising the dense `(n_samples, n_features, n_features)`
+tensor. Dense matrices can be reconstructed for selected samples or blocks of
+samples. `interaction_summary_plot` reproduces `shap.summary_plot` for interaction
+values from packed values.
+
+"""
+import logging
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import shap
+
+logger = logging.getLogger(__name__)
+
+
+def get_n_packed(n_features):
+    """Number of packed values per sample."""
+    return n_features * (n_features + 1) // 2
+
+
+def get_n_features(n_packed):
+    """Number of features given the number of packed values per sample."""
+    n_features = int(round((np.sqrt(8 * n_packed + 1) - 1) / 2))
+    if get_n_packed(n_features) != n_packed:
+        raise ValueError(f"{n_packed} is not a valid number of packed values.")
+    return n_features
+
+
+def pack_interactions(values, dtype=None):
+    """Pack dense `(n_samples, n_features, n_features)` SHAP interaction values.
+
+    Args:
+        values (array): Dense interaction values, as returned by
+            `shap.TreeExplainer.shap_interaction_values`.
+        dtype (numpy dtype or None): Data type of the packed values. Defaults to the
+            data type of `values`.
+
+    Returns:
+        array: `(n_samples, n_features * (n_features + 1) / 2)` upper triangles.
+
+    """
+    values = np.asarray(values)
+    if values.ndim != 3 or values.shape[1] != values.shape[2]:
+        raise ValueError(f"Expected interaction values, got shape {values.shape}.")
+    rows, cols = np.triu_indices(values.shape[1])
+    return values[:, rows, cols].astype(dtype or values.dtype, copy=False)
+
+
+class PackedInteractionValues:
+    """Read-only view of packed SHAP interaction values.
+
+    Args:
+        packed (array): `(n_samples, n_packed)` packed values, see
+            `pack_interactions`. May be memory-mapped.
+        columns (list of str or None): Feature names.
+
+    """
+
+    def __init__(self, packed, columns=None):
+        self.packed = packed
+        self.n_features = get_n_features(packed.shape[1])
+        self.columns = None if columns is None else list(columns)
+        # Column of the packed values for each (i, j) pair.
+        self._pair_cols = np.empty((self.n_features, self.n_features), dtype=np.int64)
+        rows, cols = np.triu_indices(self.n_features)
+        self._pair_cols[rows, cols] = np.arange(rows.size)
+        self._pair_cols[cols, rows] = np.arange(rows.size)
+
+    def __repr__(self):
+        return f"PackedInteractionValues(shape={self.shape}, dtype={self.dtype})"
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def n_samples(self):
+        return self.packed.shape[0]
+
+    @property
+    def shape(self):
+        """Shape of the equivalent dense values."""
+        return (self.n_samples, self.n_features, self.n_features)
+
+    @property
+    def dtype(self):
+        return self.packed.dtype
+
+    def _index(self, feature):
+        if isinstance(feature, str):
+            if self.columns is None:
+                raise ValueError("Feature names are not available.")
+            return self.columns.index(feature)
+        return feature
+
+    @property
+    def main_effects(self):
+        """`(n_samples, n_features)` main effects (the diagonals)."""
+        return self.packed[:, np.diag(self._pair_cols)]
+
+    def pair(self, i, j):
+        """`(n_samples,)` values of `[i, j]` (equal to `[j, i]`), a view.
+
+        The full interaction effect of the pair is twice this for `i != j`.
+
+        """
+        return self.packed[:, self._pair_cols[self._index(i), self._index(j)]]
+
+    def feature(self, i):
+        """`(n_samples, n_features)` values `[:, i, :]` of feature `i`."""
+        return self.packed[:, self._pair_cols[self._index(i)]]
+
+    def to_dense(self, rows=slice(None)):
+        """Reconstruct the dense `(n, n_features, n_features)` values of `rows`."""
+        return self.packed[rows][..., self._pair_cols]
+
+    def iter_dense(self, block_size=1000):
+        """Yield `(start, dense_block)` for blocks of `block_size` samples."""
+        for start in range(0, self.n_samples, block_size):
+            yield start, self.to_dense(slice(start, start + block_size))
+
+    def unpack_matrix(self, packed_matrix):
+        """Symmetric `(n_features, n_features)` matrix from a packed vector."""
+        return np.asarray(packed_matrix)[self._pair_cols]
+
+    def mean_abs(self, block_size=10000):
+        """`(n_features, n_features)` mean absolute values over all samples.
+
+        Equivalent to `np.mean(np.abs(dense_values), axis=0)`.
+
+        """
+        total = np.zeros(self.packed.shape[1], dtype=np.float64)
+        for start in range(0, self.n_samples, block_size):
+            total += np.sum(
+                np.abs(self.packed[start : start + block_size]),
+                axis=0,
+                dtype=np.float64,
+            )
+        return self.unpack_matrix(total / self.n_samples)
+
+    def abs_feature_sums(self, block_size=1000):
+        """Sum of `|sum_j [:, j, k]|` over all samples for every feature `k`."""
+        total = np.zeros(self.n_features, dtype=np.float64)
+        for start, block in self.iter_dense(block_size):
+            total += np.abs(block.sum(axis=1, dtype=np.float64)).sum(axis=0)
+        return total
+
+    def _iter_keys(self, block_size):
+        """Yield sortable keys (see `_get_sort_keys`) and dense counts of blocks.
+
+        NaN values are skipped. Off-diagonal values occur twice in the dense values,
+        so their count is 2.
+
+        """
+        rows, cols = np.triu_indices(self.n_features)
+        col_counts = np.where(rows == cols, 1, 2).astype(np.uint8)
+        for start in range(0, self.n_samples, block_size):
+            block = np.asarray(self.packed[start : start + block_size])
+            valid = ~np.isnan(block)
+            counts = np.broadcast_to(col_counts, block.shape)[valid]
+            yield _get_sort_keys(block[valid]), counts
+
+    def percentile(self, q, block_size=1000):
+        """Percentiles of the dense values, equal to `np.nanpercentile(dense, q)`.
+
+        The values are never loaded at once. Instead, the dense values at the ranks
+        needed for linear interpolation (as in numpy) are selected exactly by a
+        radix selection on their bit patterns, 16 bits per pass over the packed
+        values (i.e. 2 passes for float32, 4 for float64, after a pass counting the
+        values). Off-diagonal values occur twice in the dense values, which is
+        accounted for by counting them twice.
+
+        Args:
+            q (float or array): Percentiles in [0, 100].
+            block_size (int): Number of samples read at a time.
+
+        """
+        q = np.asarray(q, dtype=np.float64)
+        n_values = sum(int(np.sum(counts)) for _, counts in self._iter_keys(block_size))
+        if not n_values:
+            return np.full(q.shape, np.nan)
+        position = q / 100 * (n_values - 1)
+        ranks = np.unique(
+            np.concatenate((np.floor(position), np.ceil(position)), axis=None)
+        ).astype(np.int64)
+
+        key_dtype = np.dtype(f"u{self.dtype.itemsize}")
+        n_bits = 8 * key_dtype.itemsize
+        # Bits of the key of the value at each rank found so far, and the rank of
+        # the value among the values with these leading bits.
+        prefixes = np.zeros(ranks.size, dtype=key_dtype)
+        remaining = ranks.copy()
+        for shift in range(n_bits - _radix_bits, -1, -_radix_bits):
+            counts = np.zeros((ranks.size, 2**_radix_bits), dtype=np.int64)
+            for keys, key_counts in self._iter_keys(block_size):
+                digits = (keys >> shift) & (2**_radix_bits - 1)
+                for i, prefix in enumerate(prefixes):
+                    rank_digits, rank_counts = digits, key_counts
+                    if shift + _radix_bits < n_bits:
+                        # Only values sharing the leading bits found so far.
+                        selected = (keys >> (shift + _radix_bits)) == (
+                            prefix >> (shift + _radix_bits)
+                        )
+                        rank_digits = digits[selected]
+                        rank_counts = key_counts[selected]
+                    counts[i] += np.bincount(
+                        rank_digits, rank_counts, minlength=2**_radix_bits
+                    ).astype(np.int64)
+            cumulative = np.cumsum(counts, axis=1)
+            for i in range(ranks.size):
+                digit = np.searchsorted(cumulative[i], remaining[i], side="right")
+                if digit:
+                    remaining[i] -= cumulative[i, digit - 1]
+                prefixes[i] |= key_dtype.type(digit) << key_dtype.type(shift)
+
+        rank_values = _from_sort_keys(prefixes, self.dtype)
+        lower = rank_values[np.searchsorted(ranks, np.floor(position))]
+        upper = rank_values[np.searchsorted(ranks, np.ceil(position))]
+        # Linear interpolation as in numpy.
+        t = position - np.floor(position)
+        diff = upper - lower
+        return np.where(t >= 0.5, upper - diff * (1 - t), lower + diff * t)
+
+
+# Number of bits of the sort keys selected per pass by `percentile`.
+_radix_bits = 16
+
+
+def _get_sort_keys(values):
+    """Unsigned integers with the same order as the (non-NaN) floats `values`."""
+    key_dtype = np.dtype(f"u{values.dtype.itemsize}")
+    keys = values.view(key_dtype)
+    sign = key_dtype.type(1) << key_dtype.type(8 * key_dtype.itemsize - 1)
+    # Negative values are ordered by their inverted bits, below all positive values.
+    return np.where(keys & sign, ~keys, keys | sign)
+
+
+def _from_sort_keys(keys, dtype):
+    """Inverse of `_get_sort_keys`, returning float64 values."""
+    sign = keys.dtype.type(1) << keys.dtype.type(8 * keys.dtype.itemsize - 1)
+    return np.where(keys & sign, keys & ~sign, ~keys).view(dtype).astype(np.float64)
+
+
+def _shorten_text(text, length_limit):
+    if len(text) > length_limit:
+        return text[: length_limit - 3] + "..."
+    return text
+
+
+def interaction_summary_plot(
+    values,
+    features,
+    feature_names=None,
+    max_display=None,
+    plot_type=None,
+    title=None,
+    show=True,
+):
+    """`shap.summary_plot` of SHAP interaction values, from packed values.
+
+    The dense values are never materialised: only one `(n_samples, n_features)`
+    slice is passed to `shap.summary_plot` at a time.
+
+    Args:
+        values (PackedInteractionValues): Interaction values.
+        features (pandas DataFrame or array): Feature values.
+        feature_names (list of str or None): Feature names. Defaults to the columns
+            of `features`.
+        max_display (int or None): Number of features (or pairs for 'compact_dot')
+            to display.
+        plot_type (str or None): None for the full interaction plot, or
+            'compact_dot'.
+        title (str or None): Title, for 'compact_dot' only (as in `shap`).
+        show (bool): Show the figure.
+
+    """
+    if isinstance(features, pd.DataFrame):
+        if feature_names is None:
+            feature_names = list(features.columns)
+        features = features.to_numpy()
+    if feature_names is None:
+        feature_names = values.columns
+    n_features = values.n_features
+
+    if plot_type == "compact_dot":
+        if max_display is None:
+            max_display = 20
+        # Only the pairs which would be displayed by `shap` (from the dense values
+        # reshaped to `(n_samples, n_features**2)`) are selected.
+        order = np.argsort(values.mean_abs().ravel(), kind="stable")
+        pairs = [divmod(int(index), n_features) for index in order[-max_display:]]
+        return shap.summary_plot(
+            np.stack([values.pair(i, j) for i, j in pairs], axis=1),
+            np.stack([features[:, j] for i, j in pairs], axis=1),
+            feature_names=[
+                feature_names[i]
+                if i == j
+                else f"{feature_names[i]}* - {feature_names[j]}"
+                for i, j in pairs
+            ],
+            max_display=max_display,
+            plot_type="dot",
+            title=title,
+            show=show,
+            color_bar_label="*Feature value",
+        )
+    elif plot_type is not None:
+        raise ValueError(f"Unsupported plot_type '{plot_type}'.")
+
+    max_display = 7 if max_display is None else min(n_features, max_display)
+    sort_inds = np.argsort(-values.abs_feature_sums())
+
+    delta = 1.0 / (n_features**2)
+    slow, shigh = values.percentile([delta, 100 - delta])
+    v = max(abs(slow), abs(shigh))
+    slow, shigh = -v, v
+
+    title_length_limit = 11
+    plt.figure(figsize=(1.5 * max_display + 1, 0.8 * max_display + 1))
+    for i in range(min(n_features, max_display)):
+        ind = sort_inds[i]
+        plt.subplot(1, max_display, i + 1)
+        proj_values = values.feature(ind)[:, sort_inds].astype(np.float64)
+        # Off-diagonal effects are split in half.
+        if i == 0:
+            proj_values[:, 1:] *= 2
+        else:
+            proj_values *= 2
+            proj_values[:, i] /= 2
+        shap.summary_plot(
+            proj_values,
+            features[:, sort_inds],
+            feature_names=(
+                np.asarray(feature_names)[sort_inds].tolist()
+                if i == 0
+                else ["" for _ in range(n_features)]
+            ),
+            sort=False,
+            show=False,
+            color_bar=False,
+            plot_size=None,
+            max_display=max_display,
+        )
+        plt.xlim((slow, shigh))
+        plt.xlabel("")
+        if i == max_display // 2:
+            plt.xlabel("SHAP interaction value")
+        plt.title(_shorten_text(feature_names[ind], title_length_limit))
+    plt.tight_layout(pad=0, w_pad=0, h_pad=0.0)
+    plt.subplots_adjust(hspace=0, wspace=0.1)
+    if show:
+        plt.show()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Consolidated store for SHAP (interaction) values written by many jobs.
+
+A `ShapStore` is a directory containing a single preallocated .npy file holding the
+values of all samples (rows), along with a marker file for each row range that has
+been written:
+
+ - Jobs write their row ranges concurrently using positional writes of exactly the
+   bytes of their rows (not memory maps, which would write back whole pages
+   overlapping neighbouring row ranges). The marker is only written once the rows
+   have been synced to disk.
+ - `values` memory-maps the array read-only, so that rows or features can be sliced
+   without reading the whole array into memory.
+ - `get_complete_rows` and `get_missing_ranges` report which rows have been written.
+
+The .npy file is created sparse, so unwritten rows do not take up disk space on
+most filesystems.
+
+"""
+import json
+import logging
+import os
+import socket
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ShapStore:
+    """Array of SHAP (interaction) values, written in row ranges.
+
+    Args:
+        directory (str or Path): Store directory, as set up by `create`.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with (self.directory / "store.json").open() as f:
+            self.metadata = json.load(f)
+        self.shape = tuple(self.metadata["shape"])
+        self.dtype = np.dtype(self.metadata["dtype"])
+        self.columns = self.metadata["columns"]
+
+    def __repr__(self):
+        return f"ShapStore('{self.directory}', shape={self.shape})"
+
+    @property
+    def path(self):
+        return self.directory / "values.npy"
+
+    @property
+    def rows_dir(self):
+        return self.directory / "rows"
+
+    @classmethod
+    def create(cls, directory, shape, dtype=np.float64, columns=None):
+        """Set up a store, unless it already exists.
+
+        Args:
+            directory (str or Path): Store directory.
+            shape (tuple of int): Shape of the values, starting with the number of
+                rows, e.g. `(n_samples, n_features)` or `(n_samples, n_features,
+                n_features)` for interaction values.
+            dtype (numpy dtype): Data type of the values.
+            columns (list of str or None): Feature names.
+
+        Returns:
+            ShapStore
+
+        """
+        directory = Path(directory)
+        if not (directory / "store.json").is_file():
+            directory.parent.mkdir(parents=True, exist_ok=True)
+            tmp_dir = directory.parent / (
+                f".{directory.name}.{socket.gethostname()}.{os.getpid()}.tmp"
+            )
+            (tmp_dir / "rows").mkdir(parents=True, exist_ok=True)
+            values = np.lib.format.open_memmap(
+                tmp_dir / "values.npy", mode="w+", dtype=dtype, shape=tuple(shape)
+            )
+            offset = values.offset
+            del values
+            with (tmp_dir / "store.json").open("w") as f:
+                json.dump(
+                    {
+                        "shape": list(shape),
+                        "dtype": np.dtype(dtype).str,
+                        "columns": None if columns is None else list(map(str, columns)),
+                        "offset": offset,
+                    },
+                    f,
+                )
+            try:
+                os.rename(tmp_dir, directory)
+            except OSError:
+                # Another job created the store first.
+                for name in ("values.npy", "store.json"):
+                    (tmp_dir / name).unlink()
+                (tmp_dir / "rows").rmdir()
+                tmp_dir.rmdir()
+            else:
+                logger.info(f"Created SHAP store {directory} with shape {shape}.")
+        store = cls(directory)
+        if store.shape != tuple(shape):
+            raise ValueError(
+                f"Store {directory} has shape {store.shape}, expected {tuple(shape)}."
+            )
+        return store
+
+    def write(self, start, values):
+        """Write the rows `start:start + len(values)` and mark them as complete."""
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        stop = start + values.shape[0]
+        if (
+            values.shape[1:] != self.shape[1:]
+            or not 0 <= start <= stop <= self.shape[0]
+        ):
+            raise ValueError(
+                f"Cannot write values of shape {values.shape} to rows {start}:{stop} "
+                f"of a store with shape {self.shape}."
+            )
+        row_bytes = self.dtype.itemsize * int(np.prod(self.shape[1:]))
+        fd = os.open(self.path, os.O_WRONLY)
+        try:
+            data = memoryview(values.reshape(-1).view(np.uint8))
+            position = self.metadata["offset"] + start * row_bytes
+            while data:
+                written = os.pwrite(fd, data, position)
+                data = data[written:]
+                position += written
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # The marker is empty, its name defines the rows.
+        with NamedTemporaryFile(
+            "w", dir=self.rows_dir, suffix=".tmp", delete=False
+        ) as f:
+            pass
+        os.replace(f.name, self.rows_dir / f"{start}_{stop}")
+
+    def get_complete_rows(self):
+        """Boolean mask of the rows which have been written."""
+        complete = np.zeros(self.shape[0], dtype=np.bool_)
+        for path in self.rows_dir.iterdir():
+            if path.suffix != ".tmp":
+                start, stop = map(int, path.name.split("_"))
+                complete[start:stop] = True
+        return complete
+
+    def get_missing_ranges(self):
+        """List of `(start, stop)` row ranges which have not been written."""
+        incomplete = np.concatenate(([False], ~self.get_complete_rows(), [False]))
+        edges = np.flatnonzero(np.diff(incomplete.astype(np.int8)))
+        return [(int(start), int(stop)) for start, stop in zip(edges[::2], edges[1::2])]
+
+    def is_complete(self, start=0, stop=None):
+        """Whether all rows in `start:stop` have been written."""
+        return bool(np.all(self.get_complete_rows()[start:stop]))
+
+    @property
+    def values(self):
+        """Read-only, memory-mapped values."""
+        return np.load(self.path, mmap_mode="r")
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""Content-addressed, checkpointed data processing stages.
+
+A processing pipeline is expressed as a chain (or more generally a DAG) of `Stage`
+instances. The key of each stage is derived from its name, the source code of the
+function carrying out the stage, the parameters given to the stage and the keys of
+its input stages - but never from the (potentially very large) data itself. The
+output of every stage is persisted under this key, so that changing a parameter only
+invalidates the stage using it and the stages downstream of it.
+
+Only the source code of the stage function itself is part of the key. Changes to
+the helper functions it calls (or to installed packages) are not detected unless
+these helpers (or modules) are given as `depends`, or the stage `version` is
+changed. Otherwise, stale outputs will be loaded as if they were still valid.
+
+Outputs are only loaded or computed when `Stage.value` is accessed. Upstream stages
+are therefore not even loaded from disk if a downstream stage is already cached.
+
+Stages which do not depend on paper-specific settings can be persisted in a
+`SharedStageStore`, which is shared across papers. This additionally deduplicates
+identical outputs by their content and enforces a size budget by evicting the least
+recently used outputs.
+
+Examples:
+    >>> store = StageStore(cache_dir)  # doctest: +SKIP
+    >>> loaded = store.stage("load", load_func)  # doctest: +SKIP
+    >>> filled = store.stage("fill", fill_func, loaded, k=4)  # doctest: +SKIP
+    >>> filled = store.stage(
+    ...     "fill", fill_func, loaded, k=4, depends=(fill_helper,), version=2
+    ... )  # doctest: +SKIP
+    >>> filled.value  # doctest: +SKIP
+
+"""
+import hashlib
+import inspect
+import logging
+import os
+from functools import partial
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import cloudpickle
+from joblib import hash as joblib_hash
+
+logger = logging.getLogger(__name__)
+
+_NOT_SET = object()
+
+
+def get_func_source(func):
+    """Return a representation of `func` which changes when its code changes.
+
+    Only the code of `func` itself is described, not the code of any functions it
+    calls.
+
+    Args:
+        func (callable or module): Function to describe. `functools.partial`
+            instances are described using their underlying function and bound
+            arguments. Modules are described using their entire source code.
+
+    Returns:
+        str or tuple: The source code if it is available, the qualified name
+            otherwise.
+
+    """
+    if isinstance(func, partial):
+        return (get_func_source(func.func), func.args, sorted(func.keywords.items()))
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        # E.g. for interactively defined functions.
+        return getattr(func, "__qualname__", repr(func))
+
+
+class StageStore:
+    """Persistent storage of stage outputs.
+
+    Outputs are stored as individual cloudpickle files at
+    `cache_dir / <stage name> / <stage key>.pickle`.
+
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def get_path(self, name, key):
+        return self.cache_dir / name / f"{key}.pickle"
+
+    def contains(self, name, key):
+        return self.get_path(name, key).is_file()
+
+    def load(self, name, key):
+        """Load a stored stage output.
+
+        Raises:
+            KeyError: If no output is stored for the given stage name and key.
+
+        """
+        path = self.get_path(name, key)
+        try:
+            with path.open("rb") as f:
+                value = cloudpickle.load(f)
+        except FileNotFoundError:
+            raise KeyError((name, key))
+        logger.info(f"Loaded stage '{name}' from {path}.")
+        return value
+
+    def save(self, name, key, value):
+        """Store a stage output.
+
+        The output is written to a temporary file first, so that concurrent readers
+        never see partially written files.
+
+        """
+        path = self.get_path(name, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            cloudpickle.dump(value, f, protocol=-1)
+        os.replace(f.name, path)
+        logger.info(f"Saved stage '{name}' to {path}.")
+
+    def stage(
+        self,
+        name,
+        func,
+        *inputs,
+        options=None,
+        persist=True,
+        depends=(),
+        version=None,
+        **params,
+    ):
+        """Define a stage whose output is persisted in this store.
+
+        Args:
+            name (str): Stage name.
+            func (callable): Called as `func(*input_values, **params, **options)` to
+                compute the stage output.
+            *inputs (Stage): Upstream stages whose values are passed to `func`.
+            options (dict): Additional keyword arguments for `func` which do not
+                affect its output (e.g. the number of workers) and are therefore
+                not part of the stage key.
+            persist (bool): If False, the output is neither loaded from nor saved
+                to the store, e.g. for outputs holding lazy data.
+            depends (iterable of callable or module): Helpers used by `func` whose
+                source code is made part of the stage key, so that changing them
+                invalidates the stage.
+            version (hashable): Made part of the stage key. Change it to invalidate
+                stored outputs after changes which are not otherwise detected, e.g.
+                in installed packages.
+            **params: Additional parameters passed to `func`. These have to be
+                hashable using `joblib.hash`.
+
+        Returns:
+            Stage: The (lazy) stage.
+
+        """
+        return Stage(
+            self, name, func, inputs, params, options, persist, depends, version
+        )
+
+
+class _HashingWriter:
+    """File wrapper which computes the SHA-256 digest of the written data."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self.f.write(data)
+
+
+class SharedStageStore(StageStore):
+    """Content-addressed storage of stage outputs with a size budget.
+
+    Layout of `cache_dir`:
+        objects/<sha256>.pickle: Stage outputs, named after the hash of their
+            contents, so identical outputs are only stored once.
+        refs/<stage name>/<stage key>: The hash of the output of a stage.
+
+    The modification time of an object is updated whenever it is used. If the
+    objects take up more than `max_size` bytes, the least recently used objects are
+    removed. References to removed objects are treated as missing outputs.
+
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        super().__init__(cache_dir)
+        self.max_size = max_size
+        self.objects_dir = self.cache_dir / "objects"
+
+    def get_ref_path(self, name, key):
+        return self.cache_dir / "refs" / name / key
+
+    def get_object_path(self, digest):
+        return self.objects_dir / f"{digest}.pickle"
+
+    def get_path(self, name, key):
+        """Return the path of the stored output, or None if there is none."""
+        try:
+            digest = self.get_ref_path(name, key).read_text().strip()
+        except FileNotFoundError:
+            return None
+        path = self.get_object_path(digest)
+        if not path.is_file():
+            return None
+        return path
+
+    def contains(self, name, key):
+        return self.get_path(name, key) is not None
+
+    def load(self, name, key):
+        """Load a stored stage output.
+
+        Raises:
+            KeyError: If no output is stored for the given stage name and key.
+
+        """
+        path = self.get_path(name, key)
+        if path is None:
+            raise KeyError((name, key))
+        try:
+            with path.open("rb") as f:
+                value = cloudpickle.load(f)
+            # Mark as recently used.
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted concurrently.
+            raise KeyError((name, key))
+        logger.info(f"Loaded stage '{name}' from {path}.")
+        return value
+
+    def save(self, name, key, value):
+        """Store a stage output, reusing an identical stored output if possible."""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=self.objects_dir, suffix=".tmp", delete=False) as f:
+            writer = _HashingWriter(f)
+            cloudpickle.dump(value, writer, protocol=-1)
+        digest = writer.sha256.hexdigest()
+        path = self.get_object_path(digest)
+        if path.is_file():
+            os.remove(f.name)
+            os.utime(path)
+            logger.info(f"Stage '{name}' output already stored at {path}.")
+        else:
+            os.replace(f.name, path)
+            logger.info(f"Saved stage '{name}' to {path}.")
+
+        ref_path = self.get_ref_path(name, key)
+        ref_path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            "w", dir=ref_path.parent, suffix=".tmp", delete=False
+        ) as f:
+            f.write(digest)
+        os.replace(f.name, ref_path)
+
+        self.evict(keep=(path,))
+
+    def evict(self, keep=()):
+        """Remove the least recently used objects until within `max_size`.
+
+        Args:
+            keep (iterable of Path): Objects which are never removed.
+
+        """
+        if self.max_size is None:
+            return
+        objects = []
+        for path in self.objects_dir.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            objects.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in objects)
+        keep = set(keep)
+        for _, size, path in sorted(objects):
+            if total_size <= self.max_size:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            logger.info(f"Evicted {path} ({size / 1e9:0.2f} GB).")
+
+
+class Stage:
+    """Lazy handle on the output of a single pipeline stage.
+
+    Stage functions are allowed to modify their inputs in place. The in-memory
+    values of the input stages are therefore released after they have been
+    consumed. Subsequent accesses will reload them from the store.
+
+    """
+
+    def __init__(
+        self,
+        store,
+        name,
+        func,
+        inputs=(),
+        params=None,
+        options=None,
+        persist=True,
+        depends=(),
+        version=None,
+    ):
+        self.store = store
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.options = dict(options or {})
+        self.persist = persist
+        key_data = (
+            name,
+            get_func_source(func),
+            [stage.key for stage in self.inputs],
+            sorted(self.params.items()),
+        )
+        # Only included if given, so that existing keys remain valid.
+        if depends:
+            key_data += (tuple(get_func_source(helper) for helper in depends),)
+        if version is not None:
+            key_data += (("version", version),)
+        self.key = joblib_hash(key_data)
+        self._value = _NOT_SET
+
+    def __repr__(self):
+        return f"Stage(name={self.name!r}, key={self.key!r}, cached={self.cached})"
+
+    @property
+    def cached(self):
+        """True if the output of this stage has already been persisted."""
+        return self.persist and self.store.contains(self.name, self.key)
+
+    @property
+    def value(self):
+        """Load or compute (and persist) the output of this stage."""
+        if self._value is _NOT_SET:
+            if self.cached:
+                try:
+                    self._value = self.store.load(self.name, self.key)
+                    return self._value
+                except KeyError:
+                    # Removed concurrently.
+                    pass
+            logger.info(f"Running stage '{self.name}' ({self.key}).")
+            self._value = self.func(
+                *(stage.value for stage in self.inputs),
+                **self.params,
+                **self.options,
+            )
+            for stage in self.inputs:
+                stage.release()
+            if self.persist:
+                self.store.save(self.name, self.key, self._value)
+        return self._value
+
+    def release(self):
+        """Drop the in-memory output of this stage."""
+        self._value = _NOT_SET
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Temporally shifted datasets which share the data of the original dataset.
+
+Shifting a monthly dataset by a number of months only changes its time coordinate,
+while the data itself is unchanged. `get_shifted_view_dataset` therefore uses
+`Dataset.get_temporally_shifted_dataset` on a single grid cell of each cube only (to
+obtain the shifted time coordinate and the new names), and combines the result with
+the original data array.
+
+Each shifted cube holds a new `MaskedArray` which references the original data
+without copying it. Only the (boolean) mask is copied, so that masking a shifted cube
+does not affect the original cube. The data is shared, however, and must not be
+modified in place.
+
+Note that views are copied when pickled. Shifted datasets should therefore be
+created from the persisted original datasets right before they are used.
+
+"""
+import logging
+
+import iris
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _get_template_cube(cube):
+    """Return the first grid cell of `cube` along all non-temporal dimensions."""
+    if cube.coord_dims("time") != (0,):
+        raise ValueError(f"Expected time as the leading dimension of '{cube.name()}'.")
+    return cube[(slice(None),) + (slice(0, 1),) * (cube.ndim - 1)]
+
+
+def _get_shifted_view_cube(cube, shifted_template):
+    """Combine the data of `cube` with the time coordinate of `shifted_template`."""
+    if shifted_template.shape[0] != cube.shape[0]:
+        raise ValueError(f"Shifting changed the number of times of '{cube.name()}'.")
+    data = cube.core_data()
+    if cube.has_lazy_data():
+        # Dask arrays are immutable and can be shared as they are.
+        pass
+    elif isinstance(data, np.ma.MaskedArray):
+        # Share the data, but not the mask.
+        data = np.ma.MaskedArray(data.data, mask=np.ma.getmaskarray(data).copy())
+    else:
+        data = data.view()
+
+    dim_coords_and_dims = [(shifted_template.coord("time").copy(), 0)]
+    aux_coords_and_dims = [
+        (coord.copy(), (0,))
+        for coord in shifted_template.aux_coords
+        if shifted_template.coord_dims(coord) == (0,)
+    ]
+    for coord in cube.dim_coords:
+        dims = cube.coord_dims(coord)
+        if dims != (0,):
+            dim_coords_and_dims.append((coord.copy(), dims[0]))
+    for coord in cube.aux_coords:
+        dims = cube.coord_dims(coord)
+        if 0 not in dims:
+            aux_coords_and_dims.append((coord.copy(), dims))
+
+    view_cube = iris.cube.Cube(
+        data,
+        dim_coords_and_dims=dim_coords_and_dims,
+        aux_coords_and_dims=aux_coords_and_dims,
+    )
+    view_cube.metadata = shifted_template.metadata
+    return view_cube
+
+
+def get_shifted_view_dataset(dataset, months):
+    """Equivalent of `dataset.get_temporally_shifted_dataset(months)` without copies.
+
+    Args:
+        dataset (Dataset): Dataset with monthly cubes with time as their leading
+            dimension.
+        months (int): Number of months to shift by, see
+            `Dataset.get_temporally_shifted_dataset`.
+
+    Returns:
+        Dataset: Shifted dataset whose cubes reference the data of `dataset`.
+
+    """
+    template = dataset.copy(deep=False)
+    template.cubes = iris.cube.CubeList(
+        _get_template_cube(cube) for cube in dataset.cubes
+    )
+    shifted = template.get_temporally_shifted_dataset(months=months, deep=False)
+    if len(shifted.cubes) != len(dataset.cubes):
+        raise ValueError("Shifting changed the number of cubes.")
+    shifted.cubes = iris.cube.CubeList(
+        _get_shifted_view_cube(cube, shifted_template)
+        for cube, shifted_template in zip(dataset.cubes, shifted.cubes)
+    )
+    return shifted
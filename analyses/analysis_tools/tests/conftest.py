@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+try:
+    import numba
+except ImportError:
+    pass
+else:
+    # Worker processes are forked by some tests (see `analysis_tools.tree_shap`),
+    # after which the TBB threading layer can hang the test process on exit.
+    numba.config.THREADING_LAYER = "workqueue"
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from analysis_tools.ale import first_order_ale, get_ale_quantiles
+from analysis_tools.flat_forest import FlatForest
+from analysis_tools.forest_predict import predict_perturbed
+
+
+def reference_ale(predict, X, feature, bins):
+    """Brute-force ALE by predicting modified copies of `X` (as `alepython`)."""
+    quantiles = get_ale_quantiles(X[feature], bins)
+    indices = np.clip(np.digitize(X[feature], quantiles, right=True) - 1, 0, None)
+    predictions = []
+    for offset in range(2):
+        mod_X = X.copy()
+        mod_X[feature] = quantiles[indices + offset]
+        predictions.append(predict(mod_X))
+    index_groupby = pd.DataFrame(
+        {"index": indices, "effects": predictions[1] - predictions[0]}
+    ).groupby("index")
+    ale = np.array([0, *np.cumsum(index_groupby.mean().to_numpy().flatten())])
+    ale = (ale[1:] + ale[:-1]) / 2
+    ale -= np.sum(ale * index_groupby.size() / X.shape[0])
+    return quantiles, ale
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+@pytest.mark.parametrize("feature", ["a", "discrete"])
+def test_first_order_ale(engine, feature):
+    pytest.importorskip(engine)
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "a": rng.normal(size=2000),
+            "b": rng.random(2000),
+            "discrete": rng.integers(0, 4, size=2000).astype(np.float64),
+        }
+    )
+    y = X["a"] ** 2 + X["b"] * X["discrete"] + rng.normal(scale=0.1, size=2000)
+    rf = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+
+    quantiles, ale = first_order_ale(
+        FlatForest.from_forest(rf), X, feature, bins=20, engine=engine, n_threads=1
+    )
+    ref_quantiles, ref_ale = reference_ale(rf.predict, X, feature, bins=20)
+    np.testing.assert_array_equal(quantiles, ref_quantiles)
+    np.testing.assert_allclose(ale, ref_ale, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+def test_predict_perturbed(engine):
+    """Compare with predicting perturbed copies of the samples."""
+    pytest.importorskip(engine)
+    rng = np.random.default_rng(0)
+    X = rng.random((500, 3))
+    y = X[:, 0] * X[:, 1] + X[:, 2] + rng.normal(scale=0.1, size=500)
+    rf = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    forest = FlatForest.from_forest(rf)
+
+    grid = np.linspace(-0.1, 1.1, 7)
+    replacements = {0: grid[:, None], 2: rng.random((7, 500))}
+    predictions = predict_perturbed(forest, X, replace=replacements, engine=engine)
+    assert predictions.shape == (7, 500)
+    for i in range(7):
+        mod_X = X.copy()
+        mod_X[:, 0] = grid[i]
+        mod_X[:, 2] = replacements[2][i]
+        np.testing.assert_allclose(
+            predictions[i], rf.predict(mod_X), rtol=1e-12, atol=0
+        )
+    np.testing.assert_allclose(
+        predict_perturbed(forest, X, engine=engine)[0], rf.predict(X), rtol=1e-12
+    )
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from copy import deepcopy
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from analysis_tools.binning import FeatureBinner
+
+
+def make_data(n_samples, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        {
+            "continuous": rng.normal(size=n_samples),
+            "skewed": rng.lognormal(size=n_samples),
+            # Fewer distinct values than bins.
+            "discrete": rng.integers(0, 5, size=n_samples).astype(np.float64),
+        }
+    )
+    y = X["continuous"] * X["skewed"] + X["discrete"] + rng.normal(size=n_samples)
+    return X, y
+
+
+@pytest.mark.parametrize("max_bins", [8, 256])
+def test_unbin_trees(max_bins):
+    X_train, y_train = make_data(5000, seed=0)
+    # Includes values outside of the training range and between bin edges.
+    X_test, _ = make_data(2000, seed=1)
+
+    binner = FeatureBinner(max_bins=max_bins, subsample=1000).fit(X_train)
+    binned_rf = RandomForestRegressor(
+        n_estimators=10, min_samples_leaf=3, random_state=0
+    ).fit(binner.transform(X_train), y_train)
+    rf = deepcopy(binned_rf)
+    binner.unbin_trees(rf.estimators_)
+
+    for X in (X_train, X_test):
+        np.testing.assert_array_equal(
+            rf.predict(X.astype(np.float32)),
+            binned_rf.predict(binner.transform(X)),
+        )
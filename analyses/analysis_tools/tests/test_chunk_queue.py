@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+from time import sleep
+
+import pytest
+
+from analysis_tools.chunk_queue import ChunkManifest, run_chunks
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return ChunkManifest.create(tmp_path / "manifest", 5, is_done=lambda i: i == 0)
+
+
+def test_create(tmp_path, manifest):
+    assert manifest.get_indices("pending") == [1, 2, 3, 4]
+    assert manifest.get_indices("done") == [0]
+    # Existing manifests are reused.
+    assert ChunkManifest.create(tmp_path / "manifest", 5).get_counts() == (
+        manifest.get_counts()
+    )
+    with pytest.raises(ValueError):
+        ChunkManifest.create(tmp_path / "manifest", 6)
+
+
+def test_create_once(tmp_path):
+    checked = []
+
+    def is_done(index):
+        checked.append(index)
+        sleep(0.01)
+        return False
+
+    threads = [
+        threading.Thread(
+            target=ChunkManifest.create,
+            args=(tmp_path / "manifest", 10),
+            kwargs={"is_done": is_done},
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(checked) == list(range(10))
+    assert ChunkManifest(tmp_path / "manifest").get_indices("pending") == list(
+        range(10)
+    )
+
+
+def test_claim(manifest):
+    claimed = {manifest.claim("worker") for _ in range(4)}
+    assert claimed == {1, 2, 3, 4}
+    assert manifest.claim("worker") is None
+    assert manifest.get_indices("running") == [1, 2, 3, 4]
+
+    manifest.complete(1)
+    assert manifest.get_indices("done") == [0, 1]
+    assert manifest.get_indices("running") == [2, 3, 4]
+
+
+def test_fail(manifest):
+    for target in ("pending", "failed"):
+        indices = [manifest.claim("worker") for _ in range(4)]
+        for index in indices:
+            manifest.fail(index, "error", max_attempts=2)
+        assert manifest.get_indices(target) == [1, 2, 3, 4]
+    assert manifest._read("failed", 1)["attempts"] == 2
+    assert manifest._read("failed", 1)["error"] == "error"
+
+    manifest.reset_failed()
+    assert manifest.get_indices("pending") == [1, 2, 3, 4]
+    assert manifest._read("pending", 1)["attempts"] == 0
+
+
+def test_requeue_stale(manifest):
+    stale = manifest.claim("dead")
+    alive = manifest.claim("alive")
+    os.utime(manifest._path("running", stale), (0, 0))
+
+    assert manifest.requeue_stale(timeout=60, max_attempts=2) == 1
+    assert manifest.get_indices("running") == [alive]
+    assert stale in manifest.get_indices("pending")
+
+    # The stale worker finishes after all.
+    manifest.complete(stale)
+    assert stale in manifest.get_indices("done")
+    assert stale not in manifest.get_indices("pending")
+
+    # Timed-out attempts count towards `max_attempts`.
+    os.utime(manifest._path("running", alive), (0, 0))
+    assert manifest.requeue_stale(timeout=60, max_attempts=1) == 1
+    assert manifest.get_indices("failed") == [alive]
+
+
+def test_run_chunks(manifest):
+    calls = []
+
+    def func(index):
+        calls.append(index)
+        if index == 2:
+            raise RuntimeError("Always fails.")
+        if calls.count(index) == 1 and index == 3:
+            raise RuntimeError("Fails once.")
+
+    processed = run_chunks(manifest, func, heartbeat_interval=0.01, max_attempts=2)
+    assert sorted(processed) == [1, 3, 4]
+    assert sorted(calls) == [1, 2, 2, 3, 3, 4]
+    assert manifest.get_indices("done") == [0, 1, 3, 4]
+    assert manifest.get_indices("failed") == [2]
+    assert "Always fails." in manifest._read("failed", 2)["error"]
+
+
+def test_retry_failed(manifest):
+    fixed = False
+
+    def func(index):
+        if index == 2 and not fixed:
+            raise RuntimeError("Fails until fixed.")
+
+    run_chunks(manifest, func, heartbeat_interval=0.01, max_attempts=2)
+    assert manifest.get_indices("failed") == [2]
+
+    # Failed chunks are only retried on request.
+    fixed = True
+    assert run_chunks(manifest, func, heartbeat_interval=0.01) == []
+    assert manifest.get_indices("failed") == [2]
+
+    assert run_chunks(manifest, func, heartbeat_interval=0.01, retry_failed=True) == [2]
+    assert manifest.get_indices("done") == list(range(5))
+    assert manifest.get_indices("failed") == []
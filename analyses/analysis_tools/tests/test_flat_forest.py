@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from analysis_tools.flat_forest import FlatForest, as_flat_forest, get_flat_forest
+from analysis_tools.forest_predict import engines
+
+
+@pytest.fixture(scope="module")
+def forest_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "a": rng.normal(size=1000),
+            "b": rng.random(1000),
+            "discrete": rng.integers(0, 4, size=1000).astype(np.float64),
+        }
+    )
+    y = X["a"] ** 2 + X["b"] * X["discrete"] + rng.normal(scale=0.1, size=1000)
+    rf = RandomForestRegressor(n_estimators=10, min_samples_leaf=2, random_state=0).fit(
+        X, y
+    )
+    # Includes values outside of the training range.
+    X_test = pd.DataFrame(rng.normal(scale=2, size=(300, 3)), columns=X.columns)
+    return rf, X, X_test
+
+
+@pytest.mark.parametrize("engine", list(engines))
+def test_predict(forest_data, engine):
+    rf, X, X_test = forest_data
+    flat = as_flat_forest(rf)
+    assert flat.n_trees == 10
+    assert flat.n_features_in_ == 3
+    for samples in (X, X_test):
+        np.testing.assert_array_equal(
+            flat.predict(samples, engine=engine), rf.predict(samples)
+        )
+
+
+@pytest.mark.parametrize("mmap_mode", [True, False])
+def test_save_load(forest_data, tmp_path, mmap_mode):
+    rf, X, X_test = forest_data
+    flat = FlatForest.from_forest(rf)
+    flat.save(tmp_path / "rf.forest")
+    loaded = FlatForest.load(tmp_path / "rf.forest", mmap_mode=mmap_mode)
+    assert loaded.attrs == flat.attrs
+    for name, array in flat.arrays.items():
+        np.testing.assert_array_equal(loaded.arrays[name], array)
+        assert not loaded.arrays[name].flags.writeable
+    np.testing.assert_array_equal(loaded.predict(X_test), rf.predict(X_test))
+
+    # The existing file is loaded instead of converting the forest again.
+    assert get_flat_forest(tmp_path / "rf.forest", lambda: pytest.fail()).n_trees == 10
+
+
+def test_shap(forest_data):
+    shap = pytest.importorskip("shap")
+    rf, X, X_test = forest_data
+    explainer = shap.TreeExplainer(rf)
+    flat_explainer = shap.TreeExplainer(FlatForest.from_forest(rf).to_shap_model())
+    np.testing.assert_allclose(
+        flat_explainer.expected_value, explainer.expected_value, rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        flat_explainer.shap_values(X_test),
+        explainer.shap_values(X_test),
+        rtol=1e-10,
+        atol=1e-12,
+    )
+    np.testing.assert_allclose(
+        flat_explainer.shap_interaction_values(X_test[:20]),
+        explainer.shap_interaction_values(X_test[:20]),
+        rtol=1e-10,
+        atol=1e-12,
+    )
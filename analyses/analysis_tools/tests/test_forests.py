@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import logging
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from analysis_tools.forests import (
+    ForestSizeIndex,
+    get_forest,
+    get_forest_key,
+    get_model_key,
+)
+
+
+class MemoryCache:
+    """In-memory stand-in for `CachedResults`."""
+
+    def __init__(self):
+        self.estimators = {}
+
+    def get_estimator(self, key):
+        return pickle.loads(self.estimators[key])
+
+    def store_estimator(self, key, estimator):
+        self.estimators[key] = pickle.dumps(estimator)
+
+
+@pytest.fixture(scope="module")
+def forest_data():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 3))
+    y = X[:, 0] * X[:, 1] + X[:, 2] + rng.normal(scale=0.1, size=X.shape[0])
+    return X, y
+
+
+def make_model(n_estimators, **kwargs):
+    return RandomForestRegressor(
+        n_estimators=n_estimators, **{"max_depth": 5, "random_state": 0, **kwargs}
+    )
+
+
+def test_grow_truncate(forest_data, tmp_path, caplog):
+    X, y = forest_data
+    X_test = np.random.default_rng(1).random((50, 3))
+    expected = {
+        n_estimators: make_model(n_estimators).fit(X, y).predict(X_test)
+        for n_estimators in (10, 20)
+    }
+    caplog.set_level(logging.INFO, logger="analysis_tools.forests")
+
+    cached = MemoryCache()
+    get_forest(cached, ForestSizeIndex(tmp_path / "grow"), make_model(10), X, y)
+    grown = get_forest(cached, ForestSizeIndex(tmp_path / "grow"), make_model(20), X, y)
+    assert "Growing cached forest from 10 to 20 trees." in caplog.messages
+    assert not grown.warm_start
+    np.testing.assert_array_equal(grown.predict(X_test), expected[20])
+
+    cached = MemoryCache()
+    get_forest(cached, ForestSizeIndex(tmp_path / "truncate"), make_model(20), X, y)
+    # No training data is needed.
+    truncated = get_forest(
+        cached, ForestSizeIndex(tmp_path / "truncate"), make_model(10)
+    )
+    assert "Truncating cached forest from 20 to 10 trees." in caplog.messages
+    assert truncated.n_estimators == len(truncated.estimators_) == 10
+    np.testing.assert_array_equal(truncated.predict(X_test), expected[10])
+
+
+def test_size_index(forest_data, tmp_path, caplog):
+    X, y = forest_data
+    cached = MemoryCache()
+    index = ForestSizeIndex(tmp_path)
+    for n_estimators in (5, 15, 30):
+        get_forest(cached, index, make_model(n_estimators), X, y)
+    forest_key = get_forest_key(make_model(1))
+    assert index.get_sizes(forest_key) == [5, 15, 30]
+    # Parameters other than the size are distinguished.
+    assert index.get_sizes(get_forest_key(make_model(15, max_depth=4))) == []
+
+    caplog.set_level(logging.INFO, logger="analysis_tools.forests")
+    # The smallest cached forest which is large enough is truncated.
+    get_forest(cached, index, make_model(12))
+    assert caplog.messages[-1] == "Truncating cached forest from 15 to 12 trees."
+    caplog.clear()
+    get_forest(cached, index, make_model(15))
+    assert not caplog.messages
+    # Forests missing from the cache are skipped.
+    del cached.estimators[get_model_key(make_model(15))]
+    get_forest(cached, index, make_model(12))
+    assert caplog.messages[-1] == "Truncating cached forest from 30 to 12 trees."
+    # Derived forests are not added to the index.
+    assert index.get_sizes(forest_key) == [5, 15, 30]
+
+
+@pytest.mark.filterwarnings("ignore:Some inputs do not have OOB scores")
+def test_oob_prediction(forest_data, tmp_path):
+    X, y = forest_data
+    cached = MemoryCache()
+    index = ForestSizeIndex(tmp_path)
+
+    def check(forest):
+        expected = (
+            make_model(len(forest.estimators_), oob_score=True)
+            .fit(X, y)
+            .oob_prediction_
+        )
+        # Samples which were used to fit all trees are NaN rather than 0.
+        missing = expected == 0
+        np.testing.assert_array_equal(np.isnan(forest.oob_prediction_), missing)
+        np.testing.assert_allclose(
+            forest.oob_prediction_[~missing], expected[~missing], rtol=1e-12
+        )
+        return missing.sum()
+
+    # Fit, grow using warm start, and load from the cache.
+    assert check(get_forest(cached, index, make_model(4), X, y, oob=True))
+    check(get_forest(cached, index, make_model(8), X, y, oob=True))
+    check(get_forest(cached, index, make_model(8), oob=True))
+
+    # Truncate, either removing trees from the stored sums or summing the kept trees.
+    for n_estimators in (6, 3):
+        assert check(get_forest(cached, index, make_model(n_estimators), X, oob=True))
+
+    # OOB sums are computed once for forests fit without them.
+    cached = MemoryCache()
+    assert not hasattr(get_forest(cached, index, make_model(5), X, y), "oob_sums_")
+    check(get_forest(cached, index, make_model(5), X, oob=True))
+    check(get_forest(cached, index, make_model(5), oob=True))
+    # Stored OOB sums are kept up to date when the forest is grown.
+    get_forest(cached, index, make_model(7), X, y)
+    check(get_forest(cached, index, make_model(7), oob=True))
+
+
+def test_oob_invalid(forest_data, tmp_path):
+    X, y = forest_data
+    cached = MemoryCache()
+    index = ForestSizeIndex(tmp_path)
+    get_forest(cached, index, make_model(2), X, y)
+    with pytest.raises(ValueError):
+        get_forest(cached, index, make_model(2), oob=True)
+    with pytest.raises(ValueError):
+        get_forest(cached, index, make_model(2, bootstrap=False), X, y, oob=True)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_tools.offset_features import get_offset_features
+
+columns = [
+    "Dry Day Period",
+    "FAPAR",
+    "FAPAR -1 Month",
+    "FAPAR -6 Month",
+    "FAPAR -12 Month",
+    "VOD Ku-band",
+    "VOD Ku-band -6 Month",
+    "FAPAR -18 Month",
+    "VOD Ku-band -18 Month",
+    "Dry Day Period -3 Month",
+    "FAPAR -24 Month",
+    "VOD Ku-band -12 Month",
+    "Dry Day Period -15 Month",
+]
+
+
+def original_offset_features(exog_data):
+    """The per-offset loop previously found in each `get_offset_data`."""
+    exog_data = exog_data.copy()
+    to_delete = []
+
+    for column in exog_data:
+        match = re.search(r"-\d{1,2}", column)
+        if match:
+            span = match.span()
+            # Change the string to reflect the shift.
+            original_offset = int(column[slice(*span)])
+            if original_offset > -12:
+                # Only shift months that are 12 or more months before the current month.
+                continue
+            comp = -(-original_offset % 12)
+            new_column = " ".join(
+                (
+                    column[: span[0] - 1],
+                    f"{original_offset} - {comp}",
+                    column[span[1] + 1 :],
+                )
+            )
+            if comp == 0:
+                comp_column = column[: span[0] - 1]
+            else:
+                comp_column = " ".join(
+                    (column[: span[0] - 1], f"{comp}", column[span[1] + 1 :])
+                )
+            exog_data[new_column] = exog_data[column] - exog_data[comp_column]
+            to_delete.append(column)
+
+    for column in to_delete:
+        del exog_data[column]
+    return exog_data
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("n_columns", [len(columns), 4])
+def test_offset_features(dtype, n_columns):
+    rng = np.random.default_rng(0)
+    exog_data = pd.DataFrame(
+        rng.random((50, n_columns)).astype(dtype),
+        columns=columns[:n_columns],
+        index=pd.RangeIndex(100, 150, name="sample"),
+    )
+    original = original_offset_features(exog_data)
+    offset_data = get_offset_features(exog_data)
+    assert list(offset_data.columns) == list(original.columns)
+    if n_columns == len(columns):
+        assert "FAPAR -18 - -6 Month" in offset_data
+        assert "VOD Ku-band -12 - 0 Month" in offset_data
+    pd.testing.assert_frame_equal(offset_data, original, check_exact=True)
+    # The input is left unchanged.
+    assert list(exog_data.columns) == columns[:n_columns]
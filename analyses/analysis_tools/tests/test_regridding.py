@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+iris = pytest.importorskip("iris")
+pytest.importorskip("wildfires")
+
+import iris.analysis
+import iris.coords
+import iris.cube
+
+from analysis_tools.regridding import RegridWeightCache, get_target_grid
+
+
+def make_cube(latitudes, longitudes, lazy=False, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = iris.coords.DimCoord(latitudes, standard_name="latitude", units="degrees")
+    lon = iris.coords.DimCoord(
+        longitudes, standard_name="longitude", units="degrees", circular=True
+    )
+    for coord in (lat, lon):
+        coord.guess_bounds()
+    time = iris.coords.DimCoord(
+        np.arange(3), standard_name="time", units="days since 2000-01-01"
+    )
+    data = np.ma.MaskedArray(
+        rng.random((3, latitudes.size, longitudes.size)),
+        mask=rng.random((3, latitudes.size, longitudes.size)) < 0.05,
+    )
+    cube = iris.cube.Cube(data, dim_coords_and_dims=[(time, 0), (lat, 1), (lon, 2)])
+    if lazy:
+        cube.data = cube.lazy_data().rechunk((1, -1, -1))
+    return cube
+
+
+def get_target(latitudes, longitudes):
+    lat, lon = get_target_grid(latitudes, longitudes)
+    return (lat, lon), iris.cube.Cube(
+        np.zeros((latitudes.size, longitudes.size)),
+        dim_coords_and_dims=[(lat, 0), (lon, 1)],
+    )
+
+
+def assert_equivalent(new, ref):
+    assert new.shape == ref.shape
+    np.testing.assert_array_equal(
+        np.ma.getmaskarray(new.data), np.ma.getmaskarray(ref.data)
+    )
+    np.testing.assert_allclose(
+        new.data.compressed(), ref.data.compressed(), rtol=0, atol=1e-12
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_linear(tmp_path, lazy):
+    # Coarse source grid, so that the edge rows of the target grid are
+    # extrapolated.
+    cube = make_cube(np.linspace(-87.5, 87.5, 36), np.linspace(-177.5, 177.5, 72))
+    target_grid, target = get_target(
+        np.linspace(-89.5, 89.5, 180), np.linspace(-179.5, 179.5, 360)
+    )
+    ref = cube.regrid(target, iris.analysis.Linear())
+    new = RegridWeightCache(tmp_path).regrid(
+        make_cube(
+            np.linspace(-87.5, 87.5, 36), np.linspace(-177.5, 177.5, 72), lazy=lazy
+        ),
+        target_grid,
+        scheme="linear",
+    )
+    assert new.has_lazy_data() == lazy
+    assert_equivalent(new, ref)
+
+
+@pytest.mark.parametrize("mdtol", [0, 0.5, 1])
+def test_area_weighted(tmp_path, mdtol):
+    cube = make_cube(np.linspace(-89.75, 89.75, 360), np.linspace(-179.75, 179.75, 720))
+    target_grid, target = get_target(
+        np.linspace(-89, 89, 90), np.linspace(-179, 179, 180)
+    )
+    ref = cube.regrid(target, iris.analysis.AreaWeighted(mdtol=mdtol))
+    new = RegridWeightCache(tmp_path).regrid(
+        cube, target_grid, scheme="area_weighted", mdtol=mdtol
+    )
+    assert_equivalent(new, ref)
+
+
+def test_weights_cached(tmp_path):
+    cube = make_cube(np.linspace(-87.5, 87.5, 36), np.linspace(-177.5, 177.5, 72))
+    target_grid, target = get_target(
+        np.linspace(-89, 89, 90), np.linspace(-179, 179, 180)
+    )
+    RegridWeightCache(tmp_path).regrid(cube, target_grid, scheme="linear")
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    # The weights stored on disk are used by a new cache.
+    new = RegridWeightCache(tmp_path).regrid(cube, target_grid, scheme="linear")
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    assert_equivalent(new, cube.regrid(target, iris.analysis.Linear()))
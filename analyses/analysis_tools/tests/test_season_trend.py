@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+iris = pytest.importorskip("iris")
+pytest.importorskip("wildfires")
+
+import iris.analysis
+import iris.coord_categorisation
+import iris.coords
+import iris.cube
+
+from analysis_tools.season_trend import (
+    get_persistent_season_trend_dataset,
+    get_persistent_season_trend_sweep,
+    get_season_trend_basis,
+    season_trend_fill_cube,
+)
+
+params = [(50, 1), (50, 4), (80, 3)]
+
+
+def make_cube(n_years=4, shape=(7, 9), seed=0):
+    """Monthly cube with random, persistent and complete gaps."""
+    rng = np.random.default_rng(seed)
+    n_times = 12 * n_years
+    t = np.arange(n_times)[:, None, None]
+    data = (
+        rng.random(shape)
+        + 0.01 * rng.random(shape) * t
+        + rng.random(shape) * np.sin(2 * np.pi * t / 12 + rng.random(shape))
+        + 0.1 * rng.random((n_times, *shape))
+    )
+    mask = rng.random((n_times, *shape)) < 0.15
+    # January is missing in 3 out of 4 years, February in 2 out of 4.
+    mask[[0, 12, 24], :3] = True
+    mask[[1, 13], :3] = True
+    # No valid data.
+    mask[:, 4, 4] = True
+    # No gaps.
+    mask[:, 5, 5] = False
+
+    time = iris.coords.DimCoord(
+        [365.25 / 12 * (i + 0.5) for i in range(n_times)],
+        standard_name="time",
+        units="days since 2000-01-01",
+    )
+    lat = iris.coords.DimCoord(
+        np.linspace(-60, 60, shape[0]), standard_name="latitude", units="degrees"
+    )
+    lon = iris.coords.DimCoord(
+        np.linspace(-160, 160, shape[1]), standard_name="longitude", units="degrees"
+    )
+    return iris.cube.Cube(
+        np.ma.MaskedArray(data, mask=mask),
+        long_name="synthetic",
+        dim_coords_and_dims=[(time, 0), (lat, 1), (lon, 2)],
+    )
+
+
+def reference_fill(cube, persistent_perc, k):
+    """Straightforward per-location persistent and season-trend filling."""
+    data = np.ma.getdata(cube.data).copy()
+    mask = np.ma.getmaskarray(cube.data).copy()
+    months = np.array([cell.point.month for cell in cube.coord("time").cells()])
+    basis = get_season_trend_basis(data.shape[0], k)
+    for i, j in np.ndindex(data.shape[1:]):
+        loc_data = data[:, i, j]
+        loc_mask = mask[:, i, j]
+        if loc_mask.all() or not loc_mask.any():
+            continue
+        minimum = loc_data[~loc_mask].min()
+        for month in range(1, 13):
+            month_mask = loc_mask[months == month]
+            if month_mask.mean() + 1e-5 >= persistent_perc / 100:
+                loc_data[(months == month) & loc_mask] = minimum
+                loc_mask[months == month] = False
+        if loc_mask.any():
+            coefs, *_ = np.linalg.lstsq(
+                basis[~loc_mask], loc_data[~loc_mask], rcond=None
+            )
+            loc_data[loc_mask] = (basis @ coefs)[loc_mask]
+            loc_mask[:] = False
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+def assert_filled_equal(filled, reference):
+    np.testing.assert_array_equal(
+        np.ma.getmaskarray(filled), np.ma.getmaskarray(reference)
+    )
+    np.testing.assert_allclose(
+        filled.compressed(), reference.compressed(), rtol=1e-8, atol=1e-8
+    )
+
+
+@pytest.mark.parametrize("tile_shape", [(3, 4), (90, 180)])
+def test_fill(tile_shape):
+    cube = make_cube()
+    filled = season_trend_fill_cube(cube, params, tile_shape=tile_shape, n_workers=2)
+    assert set(filled) == set(params)
+    for (persistent_perc, k), filled_data in filled.items():
+        assert_filled_equal(filled_data, reference_fill(cube, persistent_perc, k))
+    # Only the location without valid data remains masked.
+    assert np.all(np.ma.getmaskarray(filled[params[0]])[:, 4, 4])
+    assert np.ma.getmaskarray(filled[params[0]]).sum() == cube.shape[0]
+
+
+def test_fill_lazy():
+    cube = make_cube()
+    filled = season_trend_fill_cube(cube, params, n_workers=1)
+    cube.data = cube.lazy_data().rechunk((-1, 2, 2))
+    lazy_filled = season_trend_fill_cube(cube, params, tile_shape=(3, 4))
+    for combination in params:
+        assert_filled_equal(lazy_filled[combination].compute(), filled[combination])
+
+
+class SyntheticDataset:
+    """Minimal stand-in for a `wildfires` Dataset."""
+
+    def __init__(self, cubes):
+        self.cubes = iris.cube.CubeList(cubes)
+
+    def copy(self, deep=False):
+        return SyntheticDataset(
+            [cube.copy() for cube in self.cubes] if deep else self.cubes
+        )
+
+
+def season_trend_model(t, params, k):
+    """Offset, linear trend and `k` harmonics of the annual cycle."""
+    model = params[0] + params[1] * t
+    for j in range(1, k + 1):
+        model = model + params[2 * j] * np.sin(2 * np.pi * j * t / 12)
+        model = model + params[2 * j + 1] * np.cos(2 * np.pi * j * t / 12)
+    return model
+
+
+def original_fill(cube, persistent_perc, k):
+    """Untiled, serial reference for `get_persistent_season_trend_dataset`.
+
+    Vendored from the logic of `Dataset.get_persistent_season_trend_dataset`, which
+    processes the whole cube at once: persistent gaps are found from the monthly
+    missing fractions of the entire cube and filled with the minimum at each
+    location, before the season-trend model is fit at every location which still has
+    gaps.
+
+    """
+    cube = cube.copy()
+    iris.coord_categorisation.add_month_number(cube, "time")
+    months = cube.coord("month_number").points
+    data = np.ma.getdata(cube.data).copy()
+    mask = np.ma.getmaskarray(cube.data).copy()
+    has_valid = ~np.all(mask, axis=0)
+
+    minima = cube.collapsed("time", iris.analysis.MIN).data
+    missing_frac = cube.copy(data=mask.astype(np.float64)).aggregated_by(
+        "month_number", iris.analysis.MEAN
+    )
+    for month, frac in zip(
+        missing_frac.coord("month_number").points, missing_frac.data
+    ):
+        persistent = ((frac + 1e-5) >= persistent_perc / 100) & has_valid
+        for index in np.where(months == month)[0]:
+            fill = persistent & mask[index]
+            data[index][fill] = np.ma.getdata(minima)[fill]
+            mask[index][fill] = False
+
+    t = np.arange(data.shape[0], dtype=np.float64)
+    design = np.stack(
+        [season_trend_model(t, np.eye(2 + 2 * k)[i], k) for i in range(2 + 2 * k)],
+        axis=1,
+    )
+    for i, j in zip(*np.where(np.any(mask, axis=0) & np.any(~mask, axis=0))):
+        valid = ~mask[:, i, j]
+        params, *_ = np.linalg.lstsq(design[valid], data[valid, i, j], rcond=None)
+        data[~valid, i, j] = season_trend_model(t, params, k)[~valid]
+        mask[:, i, j] = False
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+@pytest.mark.parametrize("tile_shape", [(2, 5), (3, 4), (1, 1)])
+def test_original(tile_shape):
+    """Compare the tiled, parallel filling with the untiled original."""
+    cube = make_cube()
+    sweep = get_persistent_season_trend_sweep(
+        SyntheticDataset([cube]), params, tile_shape=tile_shape, n_workers=2
+    )
+    for persistent_perc, k in params:
+        filled = get_persistent_season_trend_dataset(
+            SyntheticDataset([cube]),
+            persistent_perc=persistent_perc,
+            k=k,
+            tile_shape=tile_shape,
+            n_workers=2,
+        )
+        original = original_fill(cube, persistent_perc, k)
+        for filled_cube in (filled.cubes[0], sweep[(persistent_perc, k)].cubes[0]):
+            assert filled_cube.name() == f"synthetic {persistent_perc}P {k}k"
+            assert filled_cube.coords() == cube.coords()
+            assert_filled_equal(filled_cube.data, original)
+    # The input is left unchanged.
+    assert_filled_equal(cube.data, make_cube().data)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from analysis_tools.shap_aggregation import ShapMapAggregator
+
+grid_shape = (8, 3, 4)
+n_features = 2
+
+
+@pytest.fixture
+def samples():
+    """Flat grid indices and SHAP values of samples in shuffled order."""
+    rng = np.random.default_rng(0)
+    valid = rng.random(grid_shape) < 0.7
+    # Cells without samples.
+    valid[:, 0, 0] = False
+    valid[:, 2, 3] = False
+    flat_indices = rng.permutation(np.flatnonzero(valid))
+    values = rng.normal(size=(flat_indices.size, n_features))
+    # Ties in magnitude over time within a cell.
+    times, cells = np.divmod(flat_indices, np.prod(grid_shape[1:]))
+    values[cells == 5, 0] = np.where(times[cells == 5] % 2, 1.5, -1.5)
+    return flat_indices, values
+
+
+def dense_maps(flat_indices, values, feature):
+    """Maps calculated from the dense `(time, lat, lon)` values."""
+    dense = np.ma.MaskedArray(
+        np.zeros(np.prod(grid_shape)), mask=np.ones(np.prod(grid_shape), np.bool_)
+    )
+    dense[flat_indices] = values[:, feature]
+    dense = dense.reshape(grid_shape)
+    abs_max = np.take_along_axis(
+        dense, np.ma.argmax(np.abs(dense), axis=0, fill_value=-1)[None], axis=0
+    )[0]
+    return {
+        "mean": np.ma.mean(dense, axis=0),
+        "std": np.ma.std(dense, axis=0),
+        "abs_mean": np.ma.mean(np.abs(dense), axis=0),
+        "abs_std": np.ma.std(np.abs(dense), axis=0),
+        "abs_max": np.ma.MaskedArray(abs_max, mask=np.all(dense.mask, axis=0)),
+    }
+
+
+def assert_maps_equal(aggregator, flat_indices, values):
+    for feature in range(n_features):
+        maps = aggregator.get_maps(feature)
+        expected = dense_maps(flat_indices, values, feature)
+        assert set(maps) == set(expected)
+        for name, expected_map in expected.items():
+            np.testing.assert_array_equal(
+                np.ma.getmaskarray(maps[name]), np.ma.getmaskarray(expected_map)
+            )
+            np.testing.assert_allclose(
+                maps[name].compressed(), expected_map.compressed(), atol=1e-12
+            )
+
+
+def get_cells(flat_indices):
+    return np.unique(flat_indices % np.prod(grid_shape[1:]))
+
+
+def test_update(samples):
+    flat_indices, values = samples
+    aggregator = ShapMapAggregator(grid_shape, get_cells(flat_indices), n_features)
+    for chunk, start in enumerate(range(0, flat_indices.size, 13)):
+        assert aggregator.update(
+            flat_indices[start : start + 13], values[start : start + 13], chunk=chunk
+        )
+    # Chunks are only added once.
+    assert not aggregator.update(flat_indices[:13], values[:13], chunk=0)
+    assert aggregator.n_samples == flat_indices.size
+    assert_maps_equal(aggregator, flat_indices, values)
+
+
+def test_merge_save_load(samples, tmp_path):
+    flat_indices, values = samples
+    cells = get_cells(flat_indices)
+    split = flat_indices.size // 3
+    aggregators = []
+    for chunk, rows in enumerate((slice(None, split), slice(split, None))):
+        aggregator = ShapMapAggregator(grid_shape, cells, n_features)
+        aggregator.update(flat_indices[rows], values[rows], chunk=chunk)
+        aggregator.save(tmp_path / f"{chunk}.npz")
+        aggregators.append(ShapMapAggregator.load(tmp_path / f"{chunk}.npz"))
+
+    assert aggregators[0].chunks == {0}
+    merged = aggregators[0].merge(aggregators[1])
+    assert merged.chunks == {0, 1}
+    assert_maps_equal(merged, flat_indices, values)
+    with pytest.raises(ValueError):
+        merged.merge(aggregators[1])
+
+
+def test_invalid(samples):
+    flat_indices, values = samples
+    aggregator = ShapMapAggregator(grid_shape, [1, 2], n_features)
+    with pytest.raises(ValueError):
+        aggregator.update(flat_indices, values)
+    with pytest.raises(ValueError):
+        aggregator.merge(ShapMapAggregator(grid_shape, [1, 2, 3], n_features))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+pytest.importorskip("shap")
+
+from analysis_tools.shap_interaction import (
+    PackedInteractionValues,
+    get_n_features,
+    get_n_packed,
+    pack_interactions,
+)
+
+
+def make_values(n_samples=50, n_features=5, seed=0):
+    """Symmetric interaction values with ties (zeros) and NaNs."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n_samples, n_features, n_features))
+    values[rng.random(values.shape) < 0.2] = 0
+    values[3:7, 1, 2] = np.nan
+    values[10, 0, 0] = np.nan
+    return (values + values.transpose(0, 2, 1)) / 2
+
+
+def test_n_packed():
+    for n_features in range(1, 60):
+        assert get_n_features(get_n_packed(n_features)) == n_features
+    with pytest.raises(ValueError):
+        get_n_features(4)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_round_trip(dtype):
+    dense = make_values().astype(dtype)
+    packed = PackedInteractionValues(pack_interactions(dense), columns=list("abcde"))
+    assert packed.shape == dense.shape
+    assert packed.dtype == dtype
+    np.testing.assert_array_equal(packed.to_dense(), dense)
+    np.testing.assert_array_equal(packed.to_dense([3, 1]), dense[[3, 1]])
+    np.testing.assert_array_equal(
+        np.concatenate([block for _, block in packed.iter_dense(block_size=7)]),
+        dense,
+    )
+    np.testing.assert_array_equal(
+        packed.main_effects, np.diagonal(dense, axis1=1, axis2=2)
+    )
+    np.testing.assert_array_equal(packed.pair(1, 3), dense[:, 3, 1])
+    np.testing.assert_array_equal(packed.pair("e", "a"), dense[:, 0, 4])
+    np.testing.assert_array_equal(packed.feature("c"), dense[:, 2])
+    np.testing.assert_array_equal(
+        packed.unpack_matrix(pack_interactions(dense[:1])[0]), dense[0]
+    )
+
+
+def test_reductions():
+    dense = np.nan_to_num(make_values())
+    packed = PackedInteractionValues(pack_interactions(dense))
+    np.testing.assert_allclose(
+        packed.mean_abs(block_size=7), np.mean(np.abs(dense), axis=0)
+    )
+    np.testing.assert_allclose(
+        packed.abs_feature_sums(block_size=7),
+        np.sum(np.abs(np.sum(dense, axis=1)), axis=0),
+    )
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("block_size", [7, 1000])
+def test_percentile(dtype, block_size):
+    dense = make_values(n_samples=200).astype(dtype)
+    packed = PackedInteractionValues(pack_interactions(dense))
+    delta = 1 / packed.n_features**2
+    q = [0, delta, 1, 12.5, 50, 97.3, 100 - delta, 100]
+    np.testing.assert_array_equal(
+        packed.percentile(q, block_size=block_size),
+        np.nanpercentile(dense.astype(np.float64), q),
+    )
+    assert packed.percentile(50) == np.nanpercentile(dense.astype(np.float64), 50)
+
+
+def test_percentile_all_nan():
+    packed = PackedInteractionValues(np.full((4, 3), np.nan))
+    assert np.all(np.isnan(packed.percentile([1, 99])))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from analysis_tools.shap_store import ShapStore
+
+shape = (23, 3, 3)
+
+
+def get_values(start, stop):
+    return np.random.default_rng(start).random((stop - start, *shape[1:]))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ShapStore.create(tmp_path / "store", shape, columns=["a", "b", "c"])
+
+
+def test_empty(store):
+    assert not store.get_complete_rows().any()
+    assert store.get_missing_ranges() == [(0, 23)]
+    assert not store.is_complete()
+
+
+def test_ranges(store):
+    for start, stop in [(5, 10), (10, 12), (20, 23), (0, 1)]:
+        store.write(start, get_values(start, stop))
+    assert np.array_equal(
+        np.flatnonzero(store.get_complete_rows()),
+        [0, 5, 6, 7, 8, 9, 10, 11, 20, 21, 22],
+    )
+    assert store.get_missing_ranges() == [(1, 5), (12, 20)]
+    assert store.is_complete(5, 12)
+    assert not store.is_complete(5, 13)
+    assert store.is_complete(20)
+
+    # Rewriting rows (e.g. a chunk that timed out) is harmless.
+    store.write(5, get_values(5, 10))
+    for start, stop in [(1, 5), (12, 20)]:
+        store.write(start, get_values(start, stop))
+    assert store.get_missing_ranges() == []
+    assert store.is_complete()
+
+    values = ShapStore.create(store.directory, shape).values
+    assert not values.flags.writeable
+    expected = np.concatenate(
+        [
+            get_values(start, stop)
+            for start, stop in [(0, 1), (1, 5), (5, 10), (10, 12), (12, 20), (20, 23)]
+        ]
+    )
+    np.testing.assert_array_equal(values, expected)
+
+
+def test_invalid(store):
+    with pytest.raises(ValueError):
+        store.write(20, get_values(0, 4))
+    with pytest.raises(ValueError):
+        store.write(0, np.zeros((2, 3, 4)))
+    with pytest.raises(ValueError):
+        ShapStore.create(store.directory, (24, 3, 3))
+    assert store.get_missing_ranges() == [(0, 23)]
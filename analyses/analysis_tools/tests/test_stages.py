@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from analysis_tools.stages import StageStore
+
+
+def helper_a(x):
+    return x + 1
+
+
+def helper_b(x):
+    return x + 2
+
+
+def add_one(x=0):
+    return helper_a(x)
+
+
+def test_caching(tmp_path):
+    calls = []
+
+    def func(x):
+        calls.append(x)
+        return x * 2
+
+    store = StageStore(tmp_path)
+    assert store.stage("double", func, x=2).value == 4
+    stage = store.stage("double", func, x=2)
+    assert stage.cached
+    assert stage.value == 4
+    assert calls == [2]
+    assert not store.stage("double", func, x=3).cached
+
+
+def test_key_depends(tmp_path):
+    store = StageStore(tmp_path)
+    plain = store.stage("add", add_one)
+    # Helpers are only part of the key if given.
+    assert store.stage("add", add_one).key == plain.key
+    with_a = store.stage("add", add_one, depends=(helper_a,))
+    with_b = store.stage("add", add_one, depends=(helper_b,))
+    assert len({plain.key, with_a.key, with_b.key}) == 3
+
+
+def test_key_version(tmp_path):
+    store = StageStore(tmp_path)
+    keys = {
+        store.stage("add", add_one).key,
+        store.stage("add", add_one, version=1).key,
+        store.stage("add", add_one, version=2).key,
+    }
+    assert len(keys) == 3
+
+
+def test_key_inputs(tmp_path):
+    store = StageStore(tmp_path)
+    first = store.stage("add", add_one, version=1)
+    second = store.stage("add", add_one, version=2)
+    assert (
+        store.stage("add2", helper_a, first).key
+        != store.stage("add2", helper_a, second).key
+    )
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+shap = pytest.importorskip("shap")
+
+from analysis_tools.tree_shap import get_parallel_shap_values, shap_worker_pool
+
+
+@pytest.fixture(scope="module")
+def explainer_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((101, 4)), columns=list("abcd"))
+    y = X["a"] * X["b"] + X["c"] + rng.normal(scale=0.1, size=X.shape[0])
+    rf = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0).fit(X, y)
+    return shap.TreeExplainer(rf), X
+
+
+@pytest.mark.parametrize("interaction", [False, True])
+def test_parallel_shap_values(explainer_data, interaction):
+    explainer, X = explainer_data
+    if interaction:
+        X = X[:23]
+        expected = explainer.shap_interaction_values(X)
+    else:
+        expected = explainer.shap_values(X)
+
+    for n_jobs in (1, 3):
+        np.testing.assert_array_equal(
+            get_parallel_shap_values(
+                explainer, X, interaction=interaction, n_jobs=n_jobs
+            ),
+            expected,
+        )
+
+    with shap_worker_pool(explainer, 3) as executor:
+        # Repeated calls, e.g. for consecutive chunks.
+        for start, stop in [(0, 10), (10, X.shape[0])]:
+            np.testing.assert_array_equal(
+                get_parallel_shap_values(
+                    explainer,
+                    X[start:stop],
+                    interaction=interaction,
+                    n_jobs=3,
+                    executor=executor,
+                ),
+                expected[start:stop],
+            )
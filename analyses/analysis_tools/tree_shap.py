@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Parallel TreeSHAP over blocks of samples.
+
+SHAP (interaction) values of each sample are calculated independently of all other
+samples, so that splitting the samples into blocks yields results identical to a
+single call. The TreeSHAP implementation of `shap` holds the GIL, however, so the
+blocks are processed by worker processes rather than threads.
+
+Worker processes are forked after the explainer (and thereby the model) has been
+set up, so that they share its memory (copy-on-write) rather than each receiving
+and loading a copy of the model. Only the samples of each block and the resulting
+values are exchanged.
+
+Processes must not be forked while other threads of the parent may hold locks, e.g.
+the heartbeat thread of `analysis_tools.chunk_queue.run_chunks`. For repeated calls
+from such a context, the workers are forked once beforehand using
+`shap_worker_pool`. Similarly, processes which have started numba's TBB threads
+(e.g. in `analysis_tools.forest_predict`) may hang on exit after forking, so that
+another numba threading layer should be used there.
+
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Explainer and samples shared with forked worker processes.
+_shared = {}
+
+
+def _explain(explainer, X, interaction):
+    if interaction:
+        return explainer.shap_interaction_values(X)
+    return explainer.shap_values(X)
+
+
+def _explain_samples(X, interaction):
+    return _explain(_shared["explainer"], X, interaction)
+
+
+def _explain_block(bounds, interaction):
+    start, stop = bounds
+    return _explain_samples(_shared["X"][start:stop], interaction)
+
+
+def _get_n_jobs(n_jobs, n_samples=None):
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_samples is not None:
+        n_jobs = min(n_jobs, n_samples)
+    return max(1, n_jobs)
+
+
+def _get_edges(n_samples, n_jobs, n_blocks):
+    if n_blocks is None:
+        n_blocks = 4 * n_jobs
+    return np.linspace(0, n_samples, min(n_blocks, n_samples) + 1).astype(np.int64)
+
+
+@contextmanager
+def shap_worker_pool(explainer, n_jobs):
+    """Fork worker processes sharing `explainer` for `get_parallel_shap_values`.
+
+    All workers are forked when entering the context, e.g. before starting threads.
+
+    Args:
+        explainer (shap.TreeExplainer): Explainer.
+        n_jobs (int): Number of worker processes. -1 uses all CPUs.
+
+    Yields:
+        ProcessPoolExecutor or None: The workers, or None if `n_jobs` is 1.
+
+    """
+    n_jobs = _get_n_jobs(n_jobs)
+    if n_jobs == 1:
+        yield None
+        return
+    _shared.update(explainer=explainer)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            # All workers of a fork-based pool are started with the first task.
+            executor.submit(int).result()
+            yield executor
+    finally:
+        _shared.clear()
+
+
+def get_parallel_shap_values(
+    explainer, X, interaction=False, n_jobs=1, n_blocks=None, executor=None
+):
+    """Calculate SHAP (interaction) values for blocks of samples in parallel.
+
+    Args:
+        explainer (shap.TreeExplainer): Explainer.
+        X (pandas DataFrame or array): Samples to explain.
+        interaction (bool): Calculate SHAP interaction values.
+        n_jobs (int): Number of worker processes. -1 uses all CPUs.
+        n_blocks (int or None): Number of blocks of samples. Defaults to
+            `4 * n_jobs` (but at most one block per sample) for load balancing.
+        executor (ProcessPoolExecutor or None): Workers forked for `explainer` by
+            `shap_worker_pool` (with `n_jobs` workers), used instead of forking new
+            workers. The samples of each block are sent to the workers.
+
+    Returns:
+        array: SHAP values, identical to those calculated by `explainer` directly.
+
+    """
+    if executor is not None and _shared.get("explainer") is not explainer:
+        raise ValueError("The workers were not forked for this explainer.")
+    n_samples = X.shape[0]
+    n_jobs = _get_n_jobs(n_jobs, n_samples)
+    if n_jobs == 1:
+        return _explain(explainer, X, interaction)
+    edges = _get_edges(n_samples, n_jobs, n_blocks)
+    if executor is not None:
+        return np.concatenate(
+            list(
+                executor.map(
+                    _explain_samples,
+                    (X[start:stop] for start, stop in zip(edges[:-1], edges[1:])),
+                    repeat(interaction),
+                )
+            )
+        )
+    _shared.update(explainer=explainer, X=X)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            blocks = list(
+                executor.map(
+                    _explain_block, zip(edges[:-1], edges[1:]), repeat(interaction)
+                )
+            )
+        return np.concatenate(blocks)
+    finally:
+        _shared.clear()
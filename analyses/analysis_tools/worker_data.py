@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Training data shared by all dask workers on a node.
+
+Scattering `X_train` with `broadcast=True` sends a full copy to every worker, and
+tasks fitting column subsets each hold another copy of their subset. Instead,
+`WorkerTrainingData` writes the training data once (as float32, column-major .npy
+files) and workers memory-map these files read-only. All workers on a node thereby
+share the same pages, and tasks only need to be sent the small `WorkerTrainingData`
+handle along with the indices of their columns.
+
+The memory maps are kept open for the lifetime of each worker process, so the data
+is only paged in once per node, independent of the number of tasks.
+
+Note that scikit-learn trees require a contiguous float32 array. `project` therefore
+gathers the selected columns (and rows) into a new array, which is the only
+per-task copy. Since the stored data is column-major, each column is read
+contiguously.
+
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+from joblib import hash as joblib_hash
+from wildfires.data import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+default_worker_data_dir = Path(DATA_DIR) / ".pickle" / "worker_data"
+
+# Memory-mapped arrays of the current process, keyed by path.
+_loaded = {}
+
+
+def _save_array(path, array):
+    """Write `array` to `path` atomically."""
+    with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+        np.save(f, array)
+    os.replace(f.name, path)
+
+
+def _load_array(path):
+    path = str(path)
+    if path not in _loaded:
+        _loaded[path] = np.load(path, mmap_mode="r")
+    return _loaded[path]
+
+
+class WorkerTrainingData:
+    """Handle to training data stored for memory-mapping by workers.
+
+    Args:
+        directory (str or Path): Directory containing 'X.npy', 'y.npy' and
+            'columns.json', as written by `create`.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with (self.directory / "columns.json").open() as f:
+            self.columns = json.load(f)
+
+    def __repr__(self):
+        return f"WorkerTrainingData('{self.directory}')"
+
+    @classmethod
+    def create(cls, X, y, cache_dir=default_worker_data_dir):
+        """Store the training data, unless identical data is already stored.
+
+        Args:
+            X (pandas DataFrame): Features.
+            y (pandas Series or array): Targets.
+            cache_dir (str or Path): Directory containing the stored data sets.
+
+        Returns:
+            WorkerTrainingData
+
+        """
+        directory = Path(cache_dir) / joblib_hash((X, y))
+        if not (directory / "columns.json").is_file():
+            directory.mkdir(parents=True, exist_ok=True)
+            values = np.empty(X.shape, dtype=np.float32, order="F")
+            for i, column in enumerate(X.columns):
+                values[:, i] = X[column].to_numpy()
+            _save_array(directory / "X.npy", values)
+            _save_array(directory / "y.npy", np.asarray(y))
+            # Written last, marking the data as complete.
+            with NamedTemporaryFile(
+                "w", dir=directory, suffix=".tmp", delete=False
+            ) as f:
+                json.dump([str(column) for column in X.columns], f)
+            os.replace(f.name, directory / "columns.json")
+            logger.info(f"Stored training data {X.shape} in {directory}.")
+        return cls(directory)
+
+    @property
+    def X(self):
+        """Read-only, memory-mapped features."""
+        return _load_array(self.directory / "X.npy")
+
+    @property
+    def y(self):
+        """Read-only, memory-mapped targets."""
+        return _load_array(self.directory / "y.npy")
+
+    def get_column_indices(self, columns):
+        """Convert column names to the column indices expected by `project`."""
+        return [self.columns.index(str(column)) for column in columns]
+
+    def project(self, column_indices, rows=None):
+        """Gather the given columns and rows.
+
+        Args:
+            column_indices (list of int): Columns, see `get_column_indices`.
+            rows (array or None): Row indices. All rows are used if None.
+
+        Returns:
+            X (float32 array): Fortran-ordered array of shape (n_rows, n_columns).
+            y (array): Targets of the selected rows.
+
+        """
+        X = self.X
+        y = self.y
+        n_rows = X.shape[0] if rows is None else len(rows)
+        projected = np.empty((n_rows, len(column_indices)), dtype=X.dtype, order="F")
+        for i, column_index in enumerate(column_indices):
+            column = X[:, column_index]
+            projected[:, i] = column if rows is None else column[rows]
+        return projected, (np.array(y) if rows is None else y[rows])
@@ -114,6 +114,12 @@ mpl.rc("font", size=9.0)
 register_cl_backend()
 data_memory = get_memory("analysis_lags_rf_cross_val", backend="cloudpickle", verbose=2)
 
+# Make the shared `analysis_tools` package importable.
+if str(Path(__file__).resolve().parent.parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis_tools.offset_features import get_offset_features
+
 map_figure_saver_kwargs = {"dpi": 1200}
 
 # 9 colors used to differentiate varying the lags throughout.
@@ -261,37 +267,7 @@ def get_offset_data(
         shift_months=shift_months, selection_variables=selection_variables, masks=masks
     )
 
-    to_delete = []
-
-    for column in exog_data:
-        match = re.search(r"-\d{1,2}", column)
-        if match:
-            span = match.span()
-            # Change the string to reflect the shift.
-            original_offset = int(column[slice(*span)])
-            if original_offset > -12:
-                # Only shift months that are 12 or more months before the current month.
-                continue
-            comp = -(-original_offset % 12)
-            new_column = " ".join(
-                (
-                    column[: span[0] - 1],
-                    f"{original_offset} - {comp}",
-                    column[span[1] + 1 :],
-                )
-            )
-            if comp == 0:
-                comp_column = column[: span[0] - 1]
-            else:
-                comp_column = " ".join(
-                    (column[: span[0] - 1], f"{comp}", column[span[1] + 1 :])
-                )
-            print(column, comp_column)
-            exog_data[new_column] = exog_data[column] - exog_data[comp_column]
-            to_delete.append(column)
-
-    for column in to_delete:
-        del exog_data[column]
+    exog_data = get_offset_features(exog_data)
 
     return (
         endog_data,
@@ -124,6 +124,13 @@ register_cl_backend()
 PAPER_DIR = Path(__file__).resolve().parent
 data_memory = get_memory(PAPER_DIR.name, backend="cloudpickle", verbose=2)
 
+# Make the shared `analysis_tools` package importable.
+if str(PAPER_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(PAPER_DIR.parent))
+
+from analysis_tools.forests import ForestSizeIndex, get_forest
+from analysis_tools.offset_features import get_offset_features
+
 map_figure_saver_kwargs = {"dpi": 1200}
 
 figure_saver = FigureSaver(directories=Path("~") / "tmp" / PAPER_DIR.name, debug=True)
@@ -194,20 +201,30 @@ param_dict = {
 }
 
 
-def common_get_model(cache_dir, X_train=None, y_train=None):
+def common_get_model(cache_dir, X_train=None, y_train=None, n_estimators=None):
+    """Get the cached model, fitting it if needed.
+
+    A cached model with the same parameters, but a different number of trees is
+    truncated or grown to `n_estimators` trees instead of fitting a new model, see
+    `analysis_tools.forests`.
+
+    Args:
+        n_estimators (int or None): Number of trees. Defaults to
+            `param_dict['n_estimators']`.
+
+    """
     cached = CachedResults(
         estimator_class=DaskRandomForestRegressor,
         n_splits=n_splits,
         cache_dir=cache_dir,
     )
     model = DaskRandomForestRegressor(**param_dict)
-    model_key = tuple(sorted(model.get_params().items()))
-    try:
-        model = cached.get_estimator(model_key)
-    except KeyError:
-        with parallel_backend("dask"):
-            model.fit(X_train, y_train)
-        cached.store_estimator(model_key, model)
+    if n_estimators is not None:
+        model.set_params(n_estimators=n_estimators)
+    with parallel_backend("dask"):
+        model = get_forest(
+            cached, ForestSizeIndex(cache_dir), model, X_train=X_train, y_train=y_train
+        )
     model.n_jobs = get_ncpus()
     return model
 
@@ -457,37 +474,7 @@ def get_offset_data(
         n_months=n_months,
     )
 
-    to_delete = []
-
-    for column in exog_data:
-        match = re.search(r"-\d{1,2}", column)
-        if match:
-            span = match.span()
-            # Change the string to reflect the shift.
-            original_offset = int(column[slice(*span)])
-            if original_offset > -12:
-                # Only shift months that are 12 or more months before the current month.
-                continue
-            comp = -(-original_offset % 12)
-            new_column = " ".join(
-                (
-                    column[: span[0] - 1],
-                    f"{original_offset} - {comp}",
-                    column[span[1] + 1 :],
-                )
-            )
-            if comp == 0:
-                comp_column = column[: span[0] - 1]
-            else:
-                comp_column = " ".join(
-                    (column[: span[0] - 1], f"{comp}", column[span[1] + 1 :])
-                )
-            print(column, comp_column)
-            exog_data[new_column] = exog_data[column] - exog_data[comp_column]
-            to_delete.append(column)
-
-    for column in to_delete:
-        del exog_data[column]
+    exog_data = get_offset_features(exog_data)
 
     return (
         endog_data,
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compare scikit-learn and flat forest predictions on the training data.
+
+Run after the model has been fit, e.g. using `model.ipynb`.
+
+"""
+import sys
+from pathlib import Path
+from time import time
+
+import numpy as np
+import pandas as pd
+from joblib import parallel_backend
+from wildfires.qstat import get_ncpus
+
+PROJECT_DIR = Path(__file__).resolve().parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+from specific import data_split_cache, get_model
+
+from analysis_tools.forest_predict import engines
+
+# Number of grid points for the PDP-style perturbed predictions.
+n_grid = 20
+# Number of samples used for the perturbed predictions.
+n_perturbed_samples = 20000
+
+
+def timed(func, *args, **kwargs):
+    start = time()
+    out = func(*args, **kwargs)
+    return out, time() - start
+
+
+if __name__ == "__main__":
+    X_train, X_test, y_train, y_test = data_split_cache.load()
+    rf = get_model()
+    flat_rf, load_time = timed(get_model, flat=True)
+    print(f"Loaded {flat_rf!r} in {load_time:0.2f} s.")
+
+    timings = {}
+
+    # Plain predictions. Predictions from scikit-learn are only reproducible bit for
+    # bit if the trees are summed sequentially.
+    rf.n_jobs = 1
+    reference, timings[("predict", "sklearn (1 thread)")] = timed(rf.predict, X_train)
+    rf.n_jobs = get_ncpus()
+    with parallel_backend("threading", n_jobs=get_ncpus()):
+        _, timings[("predict", f"sklearn ({get_ncpus()} threads)")] = timed(
+            rf.predict, X_train
+        )
+    for engine in engines:
+        flat_rf.predict(X_train.iloc[:10], engine=engine)  # JIT compilation.
+        predicted, timings[("predict", engine)] = timed(
+            flat_rf.predict, X_train, engine=engine
+        )
+        assert np.array_equal(predicted, reference), engine
+
+    # PDP-style predictions, with one feature set to each grid value in turn.
+    X = X_train.iloc[:n_perturbed_samples]
+    column = X.columns[0]
+    grid = np.quantile(X[column], np.linspace(0, 1, n_grid))
+
+    def predict_copies():
+        predictions = []
+        for value in grid:
+            X_copy = X.copy()
+            X_copy[column] = value
+            predictions.append(rf.predict(X_copy))
+        return np.array(predictions)
+
+    with parallel_backend("threading", n_jobs=get_ncpus()):
+        reference, timings[("pdp", f"sklearn ({get_ncpus()} threads)")] = timed(
+            predict_copies
+        )
+    for engine in engines:
+        predicted, timings[("pdp", engine)] = timed(
+            flat_rf.predict_perturbed,
+            X,
+            {0: grid[:, np.newaxis]},
+            engine=engine,
+        )
+        assert np.allclose(predicted, reference, rtol=0, atol=1e-12), engine
+
+    timings = pd.Series(timings, name="time (s)")
+    print(f"Samples: {X_train.shape[0]} (predict), {X.shape[0]} x {n_grid} (pdp).")
+    print(timings.to_string())
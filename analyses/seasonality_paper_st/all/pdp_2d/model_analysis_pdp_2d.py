@@ -39,7 +39,7 @@ def func():
         figure_saver.save_figure(fig, "__".join(features), sub_directory="pdp_2d")
 
     X_train, X_test, y_train, y_test = data_split_cache.load()
-    rf = get_model()
+    rf = get_model(flat=True)
     columns_list = list(combinations(X_train.columns, 2))
 
     index = int(os.environ["PBS_ARRAY_INDEX"])
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import os
 from pathlib import Path
 
 from wildfires.utils import handle_array_job_args
@@ -9,53 +8,46 @@ try:
     # This will only work after the path modification carried out in the job script.
     from specific import (
         CACHE_DIR,
-        SimpleCache,
-        get_model,
         data_split_cache,
-        get_shap_values,
+        get_model,
+        get_ncpus,
+        parse_walltime,
+        run_shap_chunk_worker,
+        shap_params,
     )
 except ImportError:
     """Not running as an HPC job yet."""
 
 
-# About 2 s / sample
-# Expect ~ 1 hr per job -> 2000 samples in 2 hrs each (allowing for poor performance)
+walltime = "06:00:00"
 
 
 def func():
-    # Used to re-compute specific failed jobs, `None` otherwise.
-    indices = None
-
-    index = int(os.environ["PBS_ARRAY_INDEX"])
-
-    if indices is not None:
-        index = indices[index]
-
-    print("Index:", index)
-
     X_train, X_test, y_train, y_test = data_split_cache.load()
-    rf = get_model()
-
-    job_samples = 2000
+    # Memory-mapped flat forest, see `analysis_tools.flat_forest`.
+    rf = get_model(flat=True)
 
-    tree_path_dependent_shap_cache = SimpleCache(
-        f"tree_path_dependent_shap_{index}_{job_samples}",
-        cache_dir=os.path.join(CACHE_DIR, "shap"),
+    # Chunks are pulled from a queue shared by all array jobs until none are left.
+    # Failed or timed-out chunks are retried and stored chunks are skipped.
+    run_shap_chunk_worker(
+        CACHE_DIR,
+        rf,
+        X_train,
+        job_samples=shap_params["job_samples"],
+        n_chunks=shap_params["max_index"] + 1,
+        max_time=parse_walltime(walltime),
+        # Explain the samples of each chunk using all CPUs of the node.
+        n_jobs=get_ncpus(),
     )
 
-    @tree_path_dependent_shap_cache
-    def cached_get_shap_values(model, X):
-        return get_shap_values(model, X, interaction=False)
-
-    cached_get_shap_values(rf, X_train[index * job_samples : (index + 1) * job_samples])
-
 
 if __name__ == "__main__":
     handle_array_job_args(
         Path(__file__).resolve(),
         func,
-        ncpus=1,
-        mem="7gb",
-        walltime="06:00:00",
-        max_index=609,
+        ncpus=32,
+        mem="64gb",
+        walltime=walltime,
+        # Number of workers (array jobs) minus one.
+        max_index=19,
     )
@@ -61,17 +61,18 @@ shap_interact_params["total_samples"] = (
     shap_interact_params["max_index"] + 1
 ) * shap_interact_params["job_samples"]
 
-# SHAP cache.
-shap_cache = SimpleCache("shap_cache", cache_dir=CACHE_DIR / Path("shap"))
-shap_interact_cache = SimpleCache(
-    "shap_interact_cache", cache_dir=CACHE_DIR / Path("shap_interaction")
-)
-
 interact_data_cache = SimpleCache("SHAP_interact_data", cache_dir=CACHE_DIR)
 
 
-def get_model(X_train=None, y_train=None):
-    return common_get_model(cache_dir=CACHE_DIR, X_train=X_train, y_train=y_train)
+def get_model(X_train=None, y_train=None, flat=False, oob=False, max_bins=None):
+    return common_get_model(
+        cache_dir=CACHE_DIR,
+        X_train=X_train,
+        y_train=y_train,
+        flat=flat,
+        oob=oob,
+        max_bins=max_bins,
+    )
 
 
 def uninterp_get_model(X_train=None, y_train=None):
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark model fitting and interpretation on synthetic data.
+
+Times `common_get_model` fits, predictions (scikit-learn and `FlatForest`), SHAP
+values, SHAP interaction values, 1D ALE (also using `alepython` for reference), 2D
+ALE and 1D and 2D PDP for each number of samples and threads. The data is generated
+by `analysis_tools.benchmark.get_synthetic_data` and models are cached in a
+temporary directory, so no processed data is needed.
+
+Results are saved as JSON (by default in `~/tmp/benchmarks`, named after the current
+commit) and can be compared across commits:
+
+    ./benchmarks.py --samples 10000 100000 --threads 1 4
+    ./benchmarks.py --compare old.json new.json
+
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from alepython.ale import first_order_ale_quant, second_order_ale_quant
+from dask.distributed import Client, LocalCluster
+
+PAPER_DIR = Path(__file__).resolve().parent
+if str(PAPER_DIR) not in sys.path:
+    sys.path.insert(0, str(PAPER_DIR))
+
+from common import *
+
+from analysis_tools.ale import first_order_ale
+from analysis_tools.benchmark import (
+    BenchmarkResults,
+    compare_benchmarks,
+    get_synthetic_data,
+    time_call,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def set_numba_threads(n_threads):
+    try:
+        import numba
+    except ImportError:
+        return
+    numba.set_num_threads(min(n_threads, numba.config.NUMBA_NUM_THREADS))
+
+
+def repeat(n, func, *args, **kwargs):
+    """Time `n` calls of `func`."""
+    return [time_call(func, *args, **kwargs)[1] for _ in range(n)]
+
+
+def run_benchmarks(results, n_samples, n_features, n_threads, args):
+    params = dict(n_samples=n_samples, n_features=n_features, n_threads=n_threads)
+    X, y = get_synthetic_data(n_samples, n_features)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, **train_test_split_kwargs)
+    features = list(X.columns[:2])
+
+    with LocalCluster(
+        n_workers=1, threads_per_worker=n_threads, processes=False
+    ) as cluster, Client(cluster), TemporaryDirectory() as cache_dir:
+        rf, fit_time = time_call(
+            common_get_model,
+            cache_dir,
+            X_train,
+            y_train,
+            n_estimators=args.n_estimators,
+        )
+    results.add("fit", [fit_time], **params)
+
+    rf.n_jobs = n_threads
+    set_numba_threads(n_threads)
+    flat_rf = as_flat_forest(rf)
+    # JIT compilation.
+    flat_rf.predict(X_test.iloc[:10])
+
+    with parallel_backend("threading", n_jobs=n_threads):
+        results.add(
+            "predict (sklearn)", repeat(args.repeat, rf.predict, X_test), **params
+        )
+        results.add(
+            "predict (flat)", repeat(args.repeat, flat_rf.predict, X_test), **params
+        )
+        results.add(
+            "shap",
+            repeat(
+                args.repeat,
+                get_shap_values,
+                rf,
+                X_test.iloc[: args.shap_samples],
+                n_jobs=n_threads,
+            ),
+            n_explained=args.shap_samples,
+            **params,
+        )
+        results.add(
+            "shap interaction",
+            repeat(
+                args.repeat,
+                get_shap_values,
+                rf,
+                X_test.iloc[: args.shap_interact_samples],
+                interaction=True,
+                n_jobs=n_threads,
+            ),
+            n_explained=args.shap_interact_samples,
+            **params,
+        )
+        results.add(
+            "ale 1d",
+            repeat(
+                args.repeat,
+                first_order_ale,
+                flat_rf,
+                X_train,
+                features[0],
+                bins=20,
+                n_threads=n_threads,
+            ),
+            **params,
+        )
+        # Reference implementation replaced by `first_order_ale`.
+        results.add(
+            "ale 1d alepython",
+            repeat(
+                args.repeat,
+                first_order_ale_quant,
+                flat_rf.predict,
+                X_train,
+                features[0],
+                bins=20,
+            ),
+            **params,
+        )
+        results.add(
+            "ale 2d",
+            repeat(
+                args.repeat,
+                second_order_ale_quant,
+                flat_rf.predict,
+                X_train,
+                features,
+                bins=20,
+            ),
+            **params,
+        )
+        results.add(
+            "pdp 1d",
+            repeat(
+                args.repeat,
+                pdp.pdp_isolate,
+                model=flat_rf,
+                dataset=X_train,
+                model_features=X_train.columns,
+                feature=features[0],
+                num_grid_points=20,
+            ),
+            **params,
+        )
+        results.add(
+            "pdp 2d",
+            repeat(
+                args.repeat,
+                pdp.pdp_interact,
+                model=flat_rf,
+                dataset=X_train,
+                model_features=X_train.columns,
+                features=features,
+                num_grid_points=[20, 20],
+            ),
+            **params,
+        )
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--samples", type=int, nargs="+", default=[10000, 100000], help="Rows."
+    )
+    parser.add_argument("--features", type=int, default=15, help="Columns.")
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, get_ncpus()], help="Threads."
+    )
+    parser.add_argument("--n-estimators", type=int, default=50, help="Number of trees.")
+    parser.add_argument(
+        "--shap-samples", type=int, default=200, help="Samples explained by SHAP."
+    )
+    parser.add_argument(
+        "--shap-interact-samples",
+        type=int,
+        default=10,
+        help="Samples explained by SHAP interaction values.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Repetitions (except for fits)."
+    )
+    parser.add_argument("--output", type=Path, help="Results file (JSON).")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("OLD", "NEW"),
+        help="Compare two results files instead of running the benchmarks.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+
+    if args.compare:
+        print(compare_benchmarks(*args.compare).to_string())
+        sys.exit(0)
+
+    config = {
+        key: value for key, value in vars(args).items() if key not in ("compare",)
+    }
+    config["output"] = None if args.output is None else str(args.output)
+    config["param_dict"] = {**param_dict, "n_estimators": args.n_estimators}
+    results = BenchmarkResults(config)
+
+    for n_samples in args.samples:
+        for n_threads in sorted(set(args.threads)):
+            run_benchmarks(results, n_samples, args.features, n_threads, args)
+
+    output = args.output
+    if output is None:
+        commit = results.data["commit"] or "no_commit"
+        output = (
+            Path("~").expanduser()
+            / "tmp"
+            / "benchmarks"
+            / f"{commit[:10]}_{results.data['date'].replace(':', '')}.json"
+        )
+    results.save(output)
+    print(results.to_frame().to_string())
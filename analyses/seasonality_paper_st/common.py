@@ -34,12 +34,13 @@ import pandas as pd
 import scipy
 import seaborn as sns
 import shap
-from alepython.ale import _sci_format, ale_plot, first_order_ale_quant
+from alepython.ale import _sci_format, ale_plot
 from dask.distributed import Client
 from dateutil.relativedelta import relativedelta
 from hsluv import hsluv_to_rgb, rgb_to_hsluv
 from iris.time import PartialDateTime
 from joblib import Parallel, delayed, parallel_backend
+from joblib import hash as joblib_hash
 from loguru import logger as loguru_logger
 from matplotlib.colors import LogNorm, SymLogNorm, from_levels_and_colors
 from matplotlib.lines import Line2D
@@ -141,6 +142,52 @@ register_cl_backend()
 PAPER_DIR = Path(__file__).resolve().parent
 data_memory = get_memory(PAPER_DIR.name, backend="cloudpickle", verbose=2)
 
+# Make the shared `analysis_tools` package importable.
+if str(PAPER_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(PAPER_DIR.parent))
+
+from analysis_tools import regridding, season_trend, temporal_shift
+from analysis_tools.ale import first_order_ale
+from analysis_tools.binning import FeatureBinner
+from analysis_tools.chunk_queue import ChunkManifest, parse_walltime, run_chunks
+from analysis_tools.compact import get_compact_data
+from analysis_tools.feature_store import FeatureStore
+from analysis_tools.flat_forest import FlatForest, as_flat_forest, get_flat_forest
+from analysis_tools.forests import (
+    ForestSizeIndex,
+    get_forest,
+    get_forest_key,
+    get_model_key,
+)
+from analysis_tools.halving import dask_fit_combinations_halving
+from analysis_tools.lazy import apply_lazy_mask, get_lazy_mask, lazify_cube
+from analysis_tools.loco import LocoStore, dask_fit_loco_resumable
+from analysis_tools.offset_features import get_offset_features
+from analysis_tools.regridding import RegridWeightCache, regrid_datasets
+from analysis_tools.season_trend import get_persistent_season_trend_sweep
+from analysis_tools.shap_aggregation import ShapMapAggregator
+from analysis_tools.shap_interaction import (
+    PackedInteractionValues,
+    get_n_packed,
+    interaction_summary_plot,
+    pack_interactions,
+)
+from analysis_tools.shap_store import ShapStore
+from analysis_tools.stages import SharedStageStore, StageStore
+from analysis_tools.temporal_shift import get_shifted_view_dataset
+from analysis_tools.tree_shap import get_parallel_shap_values, shap_worker_pool
+from analysis_tools.worker_data import WorkerTrainingData
+
+# Persistent outputs of the individual `get_data` stages.
+stage_store = StageStore(Path(DATA_DIR) / ".pickle" / PAPER_DIR.name / "stages")
+# Outputs of stages which do not depend on paper-specific settings, shared across
+# papers. The least recently used outputs are removed beyond 200 GB.
+shared_stage_store = SharedStageStore(
+    Path(DATA_DIR) / ".pickle" / "shared_stages", max_size=200e9
+)
+# Columnar storage of the processed data.
+feature_store_dir = Path(DATA_DIR) / ".pickle" / PAPER_DIR.name / "feature_store"
+
 map_figure_saver_kwargs = {"dpi": 1200}
 
 
@@ -259,6 +306,9 @@ shap_interact_params = {
     "job_samples": 50,  # Samples per job.
     "max_index": 5999,  # Maximum job array index (inclusive).
 }
+# Interaction values are stored packed (upper triangles) with this data type, see
+# `analysis_tools.shap_interaction`.
+shap_interact_dtype = np.float32
 
 # Feature importance shelve.
 fi_shelve_file = str(Path(DATA_DIR) / PAPER_DIR.name / "feature_importances" / "frames")
@@ -280,44 +330,147 @@ param_dict = {
 }
 
 
-def common_get_model(cache_dir, X_train=None, y_train=None):
+def common_get_model(
+    cache_dir,
+    X_train=None,
+    y_train=None,
+    n_estimators=None,
+    flat=False,
+    oob=False,
+    max_bins=None,
+):
+    """Get the cached model, fitting it if needed.
+
+    A cached model with the same parameters, but a different number of trees is
+    truncated or grown to `n_estimators` trees instead of fitting a new model, see
+    `analysis_tools.forests`.
+
+    Args:
+        n_estimators (int or None): Number of trees. Defaults to
+            `param_dict['n_estimators']`.
+        flat (bool): If True, return a read-only, memory-mapped `FlatForest` (written
+            alongside the cached model on first use) instead of the model. This
+            loads much faster and uses less memory, e.g. for SHAP array jobs.
+        oob (bool): If True, set the out-of-bag predictions for `X_train` as
+            `oob_prediction_`. These are collected as the trees are grown and stored
+            with the model, see `common_get_model_scores`.
+        max_bins (int or None): If given, fit the trees on features quantised into
+            at most `max_bins` bins, see `analysis_tools.binning`. Binned models
+            (and their flat forests) are cached separately.
+
+    The returned model (or flat forest) carries a `model_id_` identifying its
+    parameters, number of trees and binning, see `get_model_id`.
+
+    """
+    model_cache_dir = Path(cache_dir)
+    if max_bins is not None:
+        model_cache_dir /= f"binned_{max_bins}"
     cached = CachedResults(
         estimator_class=DaskRandomForestRegressor,
         n_splits=n_splits,
-        cache_dir=cache_dir,
+        cache_dir=model_cache_dir,
     )
     model = DaskRandomForestRegressor(**param_dict)
-    model_key = tuple(sorted(model.get_params().items()))
-    try:
-        model = cached.get_estimator(model_key)
-    except KeyError:
-        with parallel_backend("dask"):
-            model.fit(X_train, y_train)
-        cached.store_estimator(model_key, model)
+    if n_estimators is not None:
+        model.set_params(n_estimators=n_estimators)
+    model_key = get_model_key(model)
+    # Shared by the model and its flat forest, which make identical predictions.
+    model_id = joblib_hash(
+        (get_forest_key(model), model.get_params()["n_estimators"], max_bins)
+    )
+    if flat:
+        if oob:
+            raise ValueError("Out-of-bag predictions are not stored in flat forests.")
+        flat_forest = get_flat_forest(
+            model_cache_dir / "flat_forests" / f"{joblib_hash(model_key)}.forest",
+            partial(
+                common_get_model,
+                cache_dir,
+                X_train=X_train,
+                y_train=y_train,
+                n_estimators=n_estimators,
+                max_bins=max_bins,
+            ),
+        )
+        flat_forest.attrs["model_id_"] = model_id
+        return flat_forest
+    with parallel_backend("dask"):
+        model = get_forest(
+            cached,
+            ForestSizeIndex(model_cache_dir),
+            model,
+            X_train=X_train,
+            y_train=y_train,
+            binner=None if max_bins is None else FeatureBinner(max_bins=max_bins),
+            oob=oob,
+        )
     model.n_jobs = get_ncpus()
+    model.model_id_ = model_id
     return model
 
 
-def common_get_model_scores(rf, X_test, X_train, y_test, y_train):
-    rf.n_jobs = get_ncpus()
-    with parallel_backend("threading", n_jobs=get_ncpus()):
-        y_pred = rf.predict(X_test)
-        y_train_pred = rf.predict(X_train)
-    return {
+def get_model_id(rf):
+    """Key identifying a model returned by `common_get_model`.
+
+    The key depends on the model parameters, the number of trees and the binning, but
+    not on whether `rf` is the model or its `FlatForest`.
+
+    Raises:
+        ValueError: If `rf` was not returned by `common_get_model`.
+
+    """
+    model_id = getattr(rf, "model_id_", None)
+    if model_id is None:
+        raise ValueError("Models need to be obtained using 'get_model()'.")
+    return model_id
+
+
+def common_get_model_scores(rf, X_test, X_train, y_test, y_train, oob=False):
+    """Score the model on the test and training data.
+
+    Args:
+        rf (forest or FlatForest): Model. Pass the cached flat forest (see
+            `common_get_model`) to avoid converting a forest for the batched
+            prediction. Must be a forest if `oob` is True.
+        oob (bool): If True, the training data is scored using the out-of-bag
+            predictions `rf.oob_prediction_` (see `common_get_model`) instead of
+            predicting `X_train`, which is then not needed. The scores are returned as
+            'oob_r2' and 'oob_mse' instead of 'train_r2' and 'train_mse'.
+
+    """
+    # Batched prediction, see `analysis_tools.forest_predict`.
+    flat_rf = as_flat_forest(rf)
+    y_pred = flat_rf.predict(X_test)
+    scores = {
         "test_r2": r2_score(y_test, y_pred),
         "test_mse": mean_squared_error(y_test, y_pred),
-        "train_r2": r2_score(y_train, y_train_pred),
-        "train_mse": mean_squared_error(y_train, y_train_pred),
     }
+    if oob:
+        valid = ~np.isnan(rf.oob_prediction_)
+        y_oob = np.asarray(y_train)[valid]
+        scores["oob_r2"] = r2_score(y_oob, rf.oob_prediction_[valid])
+        scores["oob_mse"] = mean_squared_error(y_oob, rf.oob_prediction_[valid])
+    else:
+        y_train_pred = flat_rf.predict(X_train)
+        scores["train_r2"] = r2_score(y_train, y_train_pred)
+        scores["train_mse"] = mean_squared_error(y_train, y_train_pred)
+    return scores
 
 
 # Training and validation test splitting.
 train_test_split_kwargs = dict(random_state=1, shuffle=True, test_size=0.3)
 
 
+# 'weight_cache' uses `analysis_tools.regridding.RegridWeightCache`, 'wildfires'
+# `wildfires.data.regrid` (with its own regridding schemes and masking).
+regrid_method = "weight_cache"
+
 # Data filling params.
 st_persistent_perc = 50
 st_k = 4
+# 'tiled' uses `analysis_tools.season_trend`, 'wildfires' the original (serial)
+# `Dataset.get_persistent_season_trend_dataset`.
+st_fill_method = "tiled"
 
 filled_variables = {"SWI(1)", "FAPAR", "LAI", "VOD Ku-band", "SIF"}
 filled_variables.update(shorten_features(filled_variables))
@@ -385,19 +538,18 @@ no_fill_feature_order["GFED4 BA"] = -1
 no_fill_feature_order["BA"] = -2
 
 # Creating the Data Structures used for Fitting
-@data_memory.cache
-def get_data(
-    shift_months=[1, 3, 6, 9, 12, 18, 24],
-    selection_variables=None,
-    masks=None,
-    st_persistent_perc=st_persistent_perc,
-    st_k=st_k,
-):
-    target_variable = "GFED4 BA"
 
-    # Variables required for the above.
-    required_variables = [target_variable]
 
+def _get_data_limit(lazy=False):
+    """Load the datasets and limit them to the shared temporal extent.
+
+    Args:
+        lazy (bool): If True, make the data of all monthly cubes lazy.
+
+    Returns:
+        dict of list of Dataset: The dataset groups used by `get_data`.
+
+    """
     # Dataset selection.
 
     selection_datasets = [
@@ -457,14 +609,47 @@ def get_data(
             for cube in dataset:
                 assert cube.shape[0] == 64
 
-    for dataset in all_datasets:
-        # Regrid each dataset to the common grid.
-        dataset.regrid()
+    if lazy:
+        for dataset in all_datasets:
+            if dataset.frequency == "monthly":
+                for cube in dataset.cubes:
+                    lazify_cube(cube)
+
+    return {
+        "selection": selection_datasets,
+        "temporal_interp": temporal_interp_datasets,
+        "shift_and_interp": shift_and_interp_datasets,
+        "to_shift": datasets_to_shift,
+    }
+
+
+def _get_data_regrid(dataset_groups, regrid_method="weight_cache", n_workers=None):
+    # Regrid all datasets to the common grid in parallel.
+    if regrid_method == "weight_cache":
+        # Using regridding weights shared between all analyses.
+        weight_cache = RegridWeightCache()
+    elif regrid_method == "wildfires":
+        weight_cache = None
+    else:
+        raise ValueError(f"Unknown regrid_method '{regrid_method}'.")
+    regrid_datasets(
+        [dataset for datasets in dataset_groups.values() for dataset in datasets],
+        n_workers=n_workers,
+        weight_cache=weight_cache,
+    )
+    return dataset_groups
+
+
+def _get_data_mask(dataset_groups, lazy=False):
+    if lazy:
+        return _get_data_mask_lazy(dataset_groups)
 
     # Calculate and apply the shared mask.
     total_masks = []
 
-    for dataset in temporal_interp_datasets + shift_and_interp_datasets:
+    for dataset in (
+        dataset_groups["temporal_interp"] + dataset_groups["shift_and_interp"]
+    ):
         for cube in dataset.cubes:
             # Ignore areas that are always masked, e.g. water.
             ignore_mask = np.all(cube.data.mask, axis=0)
@@ -480,28 +665,215 @@ def get_data(
     combined_mask = reduce(np.logical_or, total_masks)
 
     # Apply mask to all datasets.
-    for dataset in all_datasets:
-        dataset.apply_masks(combined_mask)
+    for datasets in dataset_groups.values():
+        for dataset in datasets:
+            dataset.apply_masks(combined_mask)
+    return dataset_groups
 
-    # Carry out the minima and season-trend filling.
-    for datasets in (temporal_interp_datasets, shift_and_interp_datasets):
-        for i, dataset in enumerate(datasets):
-            datasets[i] = dataset.get_persistent_season_trend_dataset(
-                persistent_perc=st_persistent_perc, k=st_k
+
+def _get_data_mask_lazy(dataset_groups):
+    # Lazy equivalent of `_get_data_mask`. Only the combined mask is computed.
+    total_masks = []
+
+    for dataset in (
+        dataset_groups["temporal_interp"] + dataset_groups["shift_and_interp"]
+    ):
+        for cube in dataset.cubes:
+            mask = get_lazy_mask(cube)
+            # Ignore areas that are always masked, e.g. water.
+            ignore_mask = mask.all(axis=0)
+
+            # Also ignore those areas with low data availability.
+            ignore_mask |= mask.sum(axis=0) > (
+                7 * 6  # Up to 6 months for each of the 7 complete years.
+                + 10  # Additional Jan, Feb, Mar, Apr, + 6 extra.
             )
 
-    datasets_to_shift.extend(shift_and_interp_datasets)
-    selection_datasets += datasets_to_shift
-    selection_datasets += temporal_interp_datasets
+            total_masks.append(ignore_mask)
+
+    (combined_mask,) = dask.compute(reduce(np.logical_or, total_masks))
+
+    # Apply mask to all datasets.
+    for datasets in dataset_groups.values():
+        for dataset in datasets:
+            for cube in dataset.cubes:
+                if cube.has_lazy_data():
+                    apply_lazy_mask(cube, combined_mask)
+                else:
+                    cube.data = np.ma.MaskedArray(
+                        cube.data,
+                        mask=np.ma.getmaskarray(cube.data)
+                        | np.broadcast_to(combined_mask, cube.shape),
+                    )
+    return dataset_groups
+
+
+def _get_data_fill_sweep(dataset_groups, params, n_workers=None):
+    """Carry out the minima and season-trend filling for all `params`.
+
+    Returns:
+        dict: Mapping from `(st_persistent_perc, st_k)` to the filled dataset groups.
+
+    """
+    filled_groups = {combination: dict(dataset_groups) for combination in params}
+    for group in ("temporal_interp", "shift_and_interp"):
+        filled = [
+            get_persistent_season_trend_sweep(dataset, params, n_workers=n_workers)
+            for dataset in dataset_groups[group]
+        ]
+        for combination in params:
+            filled_groups[combination][group] = [
+                combination_datasets[combination] for combination_datasets in filled
+            ]
+    return filled_groups
+
+
+def _get_data_fill(
+    dataset_groups, st_persistent_perc, st_k, st_fill_method="tiled", n_workers=None
+):
+    # Carry out the minima and season-trend filling.
+    if st_fill_method == "wildfires":
+        dataset_groups = dict(dataset_groups)
+        for group in ("temporal_interp", "shift_and_interp"):
+            dataset_groups[group] = [
+                dataset.get_persistent_season_trend_dataset(
+                    persistent_perc=st_persistent_perc, k=st_k
+                )
+                for dataset in dataset_groups[group]
+            ]
+        return dataset_groups
+    if st_fill_method != "tiled":
+        raise ValueError(f"Unknown st_fill_method '{st_fill_method}'.")
+    return _get_data_fill_sweep(
+        dataset_groups, [(st_persistent_perc, st_k)], n_workers=n_workers
+    )[(st_persistent_perc, st_k)]
+
+
+# Helpers of the 'fill' stage, see `StageStore.stage`.
+_fill_depends = (_get_data_fill_sweep, season_trend)
+
+
+def _get_data_shift(dataset_groups, shift_months):
+    datasets_to_shift = dataset_groups["to_shift"] + dataset_groups["shift_and_interp"]
+    if shift_months is not None:
+        # Realise (lazy) data which is shared by the shifted views below.
+        for dataset in datasets_to_shift:
+            for cube in dataset.cubes:
+                cube.data
+    selection_datasets = (
+        dataset_groups["selection"]
+        + datasets_to_shift
+        + dataset_groups["temporal_interp"]
+    )
 
     if shift_months is not None:
         for shift in shift_months:
             for shift_dataset in datasets_to_shift:
+                # Shifted datasets share the data of `shift_dataset`.
                 selection_datasets.append(
-                    shift_dataset.get_temporally_shifted_dataset(
-                        months=-shift, deep=False
-                    )
+                    get_shifted_view_dataset(shift_dataset, months=-shift)
                 )
+    return selection_datasets
+
+
+def _get_data_select(selection_datasets, selection_variables):
+    return Datasets(selection_datasets).select_variables(selection_variables)
+
+
+def _get_data_process(
+    dataset_groups, shift_months, selection_variables, target_variable, masks
+):
+    # Shifting and selection are carried out here instead of in separate persisted
+    # stages, since pickling would materialise every shifted view.
+    selection = _get_data_select(
+        _get_data_shift(dataset_groups, shift_months), selection_variables
+    )
+    return data_processing(
+        selection,
+        which="climatology",
+        transformations={},
+        deletions=[],
+        use_lat_mask=False,
+        use_fire_mask=False,
+        target_variable=target_variable,
+        masks=masks,
+    )
+
+
+def get_data(
+    shift_months=[1, 3, 6, 9, 12, 18, 24],
+    selection_variables=None,
+    masks=None,
+    st_persistent_perc=st_persistent_perc,
+    st_k=st_k,
+    st_fill_method=st_fill_method,
+    regrid_method=regrid_method,
+    columnar=False,
+    compact=False,
+    lazy=False,
+    n_regrid_workers=None,
+    n_fill_workers=None,
+):
+    """Get the data used for fitting.
+
+    The processing is split into the 'limit', 'regrid', 'mask', 'fill' and 'process'
+    stages. The output of each stage is persisted under a key derived from the
+    stage's own parameters and the keys of its input stages, in `shared_stage_store`
+    up to 'mask' and in `stage_store` otherwise. Changing e.g. `st_k` therefore only
+    recomputes the stages from 'fill' onwards.
+    Temporally shifted datasets are created as views in the 'process' stage.
+
+    Args:
+        columnar (bool): If True, return data backed by a `FeatureStore`. In this
+            case `exog_data` is a `LazyFrame` which only reads the selected columns
+            and `filled_datasets` and `masked_datasets` are only loaded when used.
+        compact (bool): If True, store features as float32 and index rows by their
+            (uint32) flat index into `master_mask`. See `analysis_tools.compact`.
+        lazy (bool): If True, the 'limit', 'regrid', 'mask' and 'fill' stages operate
+            on lazy (dask) data, which is only computed chunk by chunk as it is
+            needed by `data_processing` in the 'process' stage. The outputs of these
+            stages are not persisted in this case. Only the datasets which are
+            temporally shifted are realised (once each, see
+            `analysis_tools.temporal_shift`).
+        n_regrid_workers (int or None): Number of workers used for regridding.
+            Defaults to `get_ncpus()`.
+        n_fill_workers (int or None): Number of processes used for the minima and
+            season-trend filling. Defaults to `get_ncpus()`.
+        st_fill_method (str): 'tiled' (`analysis_tools.season_trend`) or 'wildfires'
+            (the original `Dataset.get_persistent_season_trend_dataset`, which
+            ignores `n_fill_workers`).
+        regrid_method (str): 'weight_cache' (`analysis_tools.regridding`) or
+            'wildfires' (`wildfires.data.regrid`). The regridded (and masked)
+            datasets are stored separately for each.
+
+    Returns:
+        endog_data, exog_data, master_mask, filled_datasets, masked_datasets,
+        land_mask: See `wildfires.analysis.data_processing`.
+
+    """
+    if columnar:
+        return get_feature_store(
+            "data",
+            partial(
+                get_data,
+                lazy=lazy,
+                n_regrid_workers=n_regrid_workers,
+                n_fill_workers=n_fill_workers,
+            ),
+            shift_months=shift_months,
+            selection_variables=selection_variables,
+            masks=masks,
+            st_persistent_perc=st_persistent_perc,
+            st_k=st_k,
+            st_fill_method=st_fill_method,
+            regrid_method=regrid_method,
+            compact=compact,
+        ).get_data()
+
+    target_variable = "GFED4 BA"
+
+    # Variables required for the above.
+    required_variables = [target_variable]
 
     if selection_variables is None:
         selection_variables = get_filled_names(
@@ -534,9 +906,33 @@ def get_data(
                     ]
                 )
 
-    selection_variables = list(set(selection_variables).union(required_variables))
+    # Sort to get a deterministic order (and stage key).
+    selection_variables = sorted(set(selection_variables).union(required_variables))
 
-    selection = Datasets(selection_datasets).select_variables(selection_variables)
+    masked = _get_masked_stage(
+        regrid_method=regrid_method, n_regrid_workers=n_regrid_workers, lazy=lazy
+    )
+    filled = stage_store.stage(
+        "fill",
+        _get_data_fill,
+        masked,
+        st_persistent_perc=st_persistent_perc,
+        st_k=st_k,
+        st_fill_method=st_fill_method,
+        options=dict(n_workers=n_fill_workers),
+        persist=not lazy,
+        depends=_fill_depends,
+    )
+    processed = stage_store.stage(
+        "process",
+        _get_data_process,
+        filled,
+        shift_months=shift_months,
+        selection_variables=selection_variables,
+        target_variable=target_variable,
+        masks=masks,
+        depends=(_get_data_shift, _get_data_select, temporal_shift),
+    )
     (
         endog_data,
         exog_data,
@@ -544,16 +940,9 @@ def get_data(
         filled_datasets,
         masked_datasets,
         land_mask,
-    ) = data_processing(
-        selection,
-        which="climatology",
-        transformations={},
-        deletions=[],
-        use_lat_mask=False,
-        use_fire_mask=False,
-        target_variable=target_variable,
-        masks=masks,
-    )
+    ) = processed.value
+    if compact:
+        endog_data, exog_data = get_compact_data(endog_data, exog_data, master_mask)
     return (
         endog_data,
         exog_data,
@@ -564,13 +953,139 @@ def get_data(
     )
 
 
-@data_memory.cache
+def _get_masked_stage(regrid_method=regrid_method, n_regrid_workers=None, lazy=False):
+    # The loaded, regridded and masked datasets are shared across papers. Lazy data
+    # is not persisted, since this would store the task graphs instead of the data.
+    limited = shared_stage_store.stage(
+        "limit", _get_data_limit, options=dict(lazy=lazy), persist=not lazy
+    )
+    regridded = shared_stage_store.stage(
+        "regrid",
+        _get_data_regrid,
+        limited,
+        regrid_method=regrid_method,
+        options=dict(n_workers=n_regrid_workers),
+        persist=not lazy,
+        depends=(regridding,),
+    )
+    return shared_stage_store.stage(
+        "mask",
+        _get_data_mask,
+        regridded,
+        options=dict(lazy=lazy),
+        persist=not lazy,
+        depends=(_get_data_mask_lazy,),
+    )
+
+
+def fill_sweep(
+    params, regrid_method=regrid_method, n_regrid_workers=None, n_fill_workers=None
+):
+    """Precompute the 'fill' stage of `get_data` for multiple parameters at once.
+
+    All `(st_persistent_perc, st_k)` combinations are computed in a single pass over
+    the data. The results are stored as the 'fill' stage outputs used by `get_data`
+    for the respective `st_persistent_perc` and `st_k` arguments.
+
+    Args:
+        params (iterable of tuple): `(st_persistent_perc, st_k)` combinations.
+        regrid_method (str): See `get_data`.
+        n_regrid_workers (int or None): Number of workers used for regridding.
+        n_fill_workers (int or None): Number of processes used for filling.
+
+    """
+    masked = _get_masked_stage(
+        regrid_method=regrid_method, n_regrid_workers=n_regrid_workers
+    )
+    fill_stages = {
+        (st_persistent_perc, st_k): stage_store.stage(
+            "fill",
+            _get_data_fill,
+            masked,
+            st_persistent_perc=st_persistent_perc,
+            st_k=st_k,
+            st_fill_method="tiled",
+            depends=_fill_depends,
+        )
+        for st_persistent_perc, st_k in params
+    }
+    missing = [
+        combination
+        for combination, fill_stage in fill_stages.items()
+        if not fill_stage.cached
+    ]
+    if not missing:
+        return
+    for combination, dataset_groups in _get_data_fill_sweep(
+        masked.value, missing, n_workers=n_fill_workers
+    ).items():
+        fill_stage = fill_stages[combination]
+        stage_store.save(fill_stage.name, fill_stage.key, dataset_groups)
+
+
+def get_feature_store(name, data_func, **kwargs):
+    """Get a `FeatureStore` holding the output of `data_func(**kwargs)`.
+
+    The store is written on first use.
+
+    Args:
+        name (str): Name of the data, e.g. 'offset_data'.
+        data_func (callable): `get_data`-like function.
+        **kwargs: Keyword arguments for `data_func`. All arguments should be given
+            explicitly, since they are used to identify the store.
+
+    Returns:
+        FeatureStore
+
+    """
+    store = FeatureStore(feature_store_dir / name / joblib_hash(sorted(kwargs.items())))
+    if not store.complete:
+        store.write(*data_func(**kwargs))
+    return store
+
+
 def get_offset_data(
     shift_months=[1, 3, 6, 9, 12, 18, 24],
     selection_variables=None,
     masks=None,
     st_persistent_perc=st_persistent_perc,
     st_k=st_k,
+    st_fill_method=st_fill_method,
+    regrid_method=regrid_method,
+    columnar=False,
+    compact=False,
+):
+    """Get the data used for fitting, including offset features.
+
+    See `get_data` for a description of `st_fill_method`, `regrid_method`, `columnar`
+    and `compact`.
+
+    """
+    kwargs = dict(
+        shift_months=shift_months,
+        selection_variables=selection_variables,
+        masks=masks,
+        st_persistent_perc=st_persistent_perc,
+        st_k=st_k,
+        st_fill_method=st_fill_method,
+        regrid_method=regrid_method,
+        compact=compact,
+    )
+    if columnar:
+        return get_feature_store("offset_data", _get_offset_data, **kwargs).get_data()
+    return _get_offset_data(**kwargs)
+
+
+@data_memory.cache
+def _get_offset_data(
+    shift_months,
+    selection_variables,
+    masks,
+    st_persistent_perc,
+    st_k,
+    st_fill_method="tiled",
+    regrid_method="weight_cache",
+    compact=False,
 ):
     (
         endog_data,
@@ -585,39 +1100,15 @@ def get_offset_data(
         masks=masks,
         st_persistent_perc=st_persistent_perc,
         st_k=st_k,
+        st_fill_method=st_fill_method,
+        regrid_method=regrid_method,
     )
 
-    to_delete = []
-
-    for column in exog_data:
-        match = re.search(r"-\d{1,2}", column)
-        if match:
-            span = match.span()
-            # Change the string to reflect the shift.
-            original_offset = int(column[slice(*span)])
-            if original_offset > -12:
-                # Only shift months that are 12 or more months before the current month.
-                continue
-            comp = -(-original_offset % 12)
-            new_column = " ".join(
-                (
-                    column[: span[0] - 1],
-                    f"{original_offset} - {comp}",
-                    column[span[1] + 1 :],
-                )
-            )
-            if comp == 0:
-                comp_column = column[: span[0] - 1]
-            else:
-                comp_column = " ".join(
-                    (column[: span[0] - 1], f"{comp}", column[span[1] + 1 :])
-                )
-            print(column, comp_column)
-            exog_data[new_column] = exog_data[column] - exog_data[comp_column]
-            to_delete.append(column)
+    exog_data = get_offset_features(exog_data)
 
-    for column in to_delete:
-        del exog_data[column]
+    if compact:
+        # Only convert after computing the offsets at full precision.
+        endog_data, exog_data = get_compact_data(endog_data, exog_data, master_mask)
 
     return (
         endog_data,
@@ -629,24 +1120,203 @@ def get_offset_data(
     )
 
 
-def get_shap_values(rf, X, data=None, interaction=False):
+def get_shap_explainer(rf, data=None):
+    """Get the `shap.TreeExplainer` of `rf`, see `get_shap_values`."""
+    if data is None:
+        feature_perturbation = "tree_path_dependent"
+    else:
+        feature_perturbation = "interventional"
+
+    if isinstance(rf, FlatForest):
+        rf = rf.to_shap_model()
+
+    return shap.TreeExplainer(rf, data=data, feature_perturbation=feature_perturbation)
+
+
+def get_shap_values(rf, X, data=None, interaction=False, n_jobs=1):
     """Calculate SHAP values for `X`.
 
     When `data` is None, `feature_perturbation='tree_path_dependent'` by default.
+    `rf` may also be a `FlatForest`.
+
+    With `n_jobs > 1` (or -1 for all CPUs), blocks of samples are explained by
+    worker processes sharing the explainer, see `analysis_tools.tree_shap`. The
+    results are identical to those of a single process.
 
     """
-    if data is None:
-        feature_perturbation = "tree_path_dependent"
-    else:
-        feature_perturbation = "interventional"
+    explainer = get_shap_explainer(rf, data=data)
+
+    return get_parallel_shap_values(
+        explainer, X, interaction=interaction, n_jobs=n_jobs
+    )
+
+
+def _get_shap_run(rf, X, job_samples, n_chunks, interaction=False):
+    """Name and key of the SHAP run of `rf` on the first `n_chunks` chunks of `X`."""
+    name = "tree_path_dependent_shap" + (
+        f"_interact_packed_{np.dtype(shap_interact_dtype).name}" if interaction else ""
+    )
+    n_rows = min(n_chunks * job_samples, X.shape[0])
+    # One run per (model, dataset) combination.
+    run_key = joblib_hash((get_model_id(rf), joblib_hash(X[:n_rows])))
+    return name, n_rows, run_key
 
-    explainer = shap.TreeExplainer(
-        rf, data=data, feature_perturbation=feature_perturbation
+
+def get_shap_store(cache_dir, rf, X, job_samples, n_chunks, interaction=False):
+    """Get the `ShapStore` of the SHAP run on the first `n_chunks` chunks of `X`.
+
+    See `analysis_tools.shap_store`. Interaction values are stored packed, see
+    `analysis_tools.shap_interaction`.
+
+    Args:
+        cache_dir (str or Path): Experiment cache directory.
+        rf: Explained model (or its `FlatForest`), see `get_model_id`.
+        X (pandas DataFrame): Samples to explain.
+        job_samples (int): Samples per chunk.
+        n_chunks (int): Number of chunks.
+        interaction (bool): Store SHAP interaction values.
+
+    """
+    name, n_rows, run_key = _get_shap_run(rf, X, job_samples, n_chunks, interaction)
+    n_features = X.shape[1]
+    return ShapStore.create(
+        Path(cache_dir) / "shap_stores" / f"{name}_{run_key}",
+        (n_rows, get_n_packed(n_features)) if interaction else (n_rows, n_features),
+        dtype=shap_interact_dtype if interaction else np.float64,
+        columns=X.columns,
     )
 
+
+def _import_shap_chunk(cache_dir, store, index, job_samples, interaction=False):
+    """Copy a chunk stored as an individual `SimpleCache` file into `store`.
+
+    Returns:
+        bool: True if the chunk was found.
+
+    """
+    name = "tree_path_dependent_shap" + ("_interact" if interaction else "")
+    try:
+        values = SimpleCache(
+            f"{name}_{index}_{job_samples}",
+            cache_dir=os.path.join(
+                cache_dir, "shap_interaction" if interaction else "shap"
+            ),
+            verbose=0,
+        ).load()
+    except NoCachedDataError:
+        return False
+    store.write(
+        index * job_samples, pack_interactions(values) if interaction else values
+    )
+    return True
+
+
+def run_shap_chunk_worker(
+    cache_dir,
+    rf,
+    X,
+    job_samples,
+    n_chunks,
+    interaction=False,
+    max_time=None,
+    n_jobs=1,
+    retry_failed=False,
+):
+    """Calculate SHAP values for chunks of `X` until all chunks are done.
+
+    Chunks are pulled from a `ChunkManifest` shared by all workers (i.e. array jobs)
+    of the run, see `analysis_tools.chunk_queue`. Failed and timed-out chunks are
+    retried automatically, and chunks stored by previous runs are skipped.
+
+    The results of each chunk are written to the rows of the run's `ShapStore`, see
+    `get_shap_store`. Chunks stored as individual `SimpleCache` files by earlier
+    versions of the job scripts are copied into the store instead of being
+    recalculated.
+
+    Args:
+        cache_dir (str or Path): Experiment cache directory.
+        rf: Model, see `get_shap_values`.
+        X (pandas DataFrame): Samples to explain.
+        job_samples (int): Samples per chunk.
+        n_chunks (int): Number of chunks, covering the first
+            `n_chunks * job_samples` samples.
+        interaction (bool): Calculate SHAP interaction values.
+        max_time (float or None): Time available to this worker (in s).
+        n_jobs (int): Number of processes used for each chunk, see
+            `get_shap_values`. The processes are started once for all chunks.
+        retry_failed (bool): Retry chunks which failed repeatedly in previous runs,
+            see `analysis_tools.chunk_queue.run_chunks`.
+
+    """
+    name, n_rows, run_key = _get_shap_run(rf, X, job_samples, n_chunks, interaction)
+    store = get_shap_store(cache_dir, rf, X, job_samples, n_chunks, interaction)
+    complete_rows = store.get_complete_rows()
+
+    def is_done(index):
+        chunk_rows = slice(index * job_samples, min((index + 1) * job_samples, n_rows))
+        return np.all(complete_rows[chunk_rows]) or _import_shap_chunk(
+            cache_dir, store, index, job_samples, interaction
+        )
+
+    manifest = ChunkManifest.create(
+        Path(cache_dir) / "chunk_manifests" / f"{name}_{job_samples}_{run_key}",
+        n_chunks,
+        metadata={"name": name, "job_samples": job_samples},
+        is_done=is_done,
+    )
+    explainer = get_shap_explainer(rf)
+    # Fork the worker processes before `run_chunks` starts its heartbeat thread.
+    with shap_worker_pool(explainer, n_jobs) as executor:
+
+        def process_chunk(index):
+            start = index * job_samples
+            values = get_parallel_shap_values(
+                explainer,
+                X[start : min(start + job_samples, n_rows)],
+                interaction=interaction,
+                n_jobs=n_jobs,
+                executor=executor,
+            )
+            store.write(start, pack_interactions(values) if interaction else values)
+
+        return run_chunks(
+            manifest, process_chunk, max_time=max_time, retry_failed=retry_failed
+        )
+
+
+def load_shap_values(cache_dir, rf, X, job_samples, n_chunks, interaction=False):
+    """Load the SHAP values calculated by `run_shap_chunk_worker`.
+
+    The arguments are those given to `run_shap_chunk_worker`, where `rf` may also be
+    the model if the values were calculated using its `FlatForest`.
+
+    Returns:
+        numpy memmap or PackedInteractionValues: Read-only, memory-mapped values of
+            the first `n_chunks * job_samples` samples of `X`. Interaction values
+            are returned packed, see `analysis_tools.shap_interaction`.
+
+    Raises:
+        ValueError: If any rows are missing.
+
+    """
+    store = get_shap_store(cache_dir, rf, X, job_samples, n_chunks, interaction)
+    missing = store.get_missing_ranges()
+    if missing:
+        # Copy chunks calculated by earlier versions of the job scripts.
+        for index in sorted(
+            {
+                index
+                for start, stop in missing
+                for index in range(start // job_samples, (stop - 1) // job_samples + 1)
+            }
+        ):
+            _import_shap_chunk(cache_dir, store, index, job_samples, interaction)
+        missing = store.get_missing_ranges()
+    if missing:
+        raise ValueError(f"Missing SHAP values for rows {missing} in {store!r}.")
     if interaction:
-        return explainer.shap_interaction_values(X)
-    return explainer.shap_values(X)
+        return PackedInteractionValues(store.values, columns=store.columns)
+    return store.values
 
 
 def save_ale_2d_and_get_importance(
@@ -659,7 +1329,7 @@ def save_ale_2d_and_get_importance(
     plot_samples=True,
     figsize=None,
 ):
-    model.n_jobs = n_jobs
+    model = as_flat_forest(model)
 
     if figsize is None:
         figsize = (10, 4.5)
@@ -832,7 +1502,7 @@ def save_ale_2d_and_get_importance(
 
 
 def save_pdp_plot_2d(model, X_train, features, n_jobs, figure_saver=None):
-    model.n_jobs = n_jobs
+    model = as_flat_forest(model)
     with parallel_backend("threading", n_jobs=n_jobs):
         pdp_interact_out = pdp.pdp_interact(
             model=model,
@@ -862,7 +1532,7 @@ def save_ale_plot_1d_with_ptp(
     center=False,
     figure_saver=None,
 ):
-    model.n_jobs = n_jobs
+    model = as_flat_forest(model)
     with parallel_backend("threading", n_jobs=n_jobs):
         fig, ax = plt.subplots(
             figsize=(7.5, 4.5)
@@ -909,7 +1579,7 @@ def save_pdp_plot_1d(model, X_train, column, n_jobs, CACHE_DIR, figure_saver=Non
     data_file = os.path.join(CACHE_DIR, "pdp_data", column)
 
     if not os.path.isfile(data_file):
-        model.n_jobs = n_jobs
+        model = as_flat_forest(model)
         with parallel_backend("threading", n_jobs=n_jobs):
             pdp_isolate_out = pdp.pdp_isolate(
                 model=model,
@@ -972,6 +1642,12 @@ def multi_ale_plot_1d(
     bins=20,
     x_rotation=20,
 ):
+    """Plot the first-order ALEs of `columns` on a common quantile axis.
+
+    The ALEs are calculated using `analysis_tools.ale.first_order_ale` with `n_jobs`
+    prediction threads and cached in `CACHE_DIR`.
+
+    """
     if fig is None and ax is None:
         fig, ax = plt.subplots(
             figsize=(7, 3)
@@ -981,6 +1657,9 @@ def multi_ale_plot_1d(
     if ax is None:
         ax = plt.axes()
 
+    # Converted once (and only if needed). Pass the cached flat forest (see
+    # `common_get_model`) to avoid the conversion entirely.
+    flat_model = None
     quantile_list = []
     ale_list = []
     for feature in tqdm(columns, desc="Calculating feature ALEs", disable=not verbose):
@@ -992,13 +1671,12 @@ def multi_ale_plot_1d(
         try:
             quantiles, ale = cache.load()
         except NoCachedDataError:
-            model.n_jobs = n_jobs
-
-            with parallel_backend("threading", n_jobs=n_jobs):
-                quantiles, ale = first_order_ale_quant(
-                    model.predict, X_train, feature, bins=bins
-                )
-                cache.save((quantiles, ale))
+            if flat_model is None:
+                flat_model = as_flat_forest(model)
+            quantiles, ale = first_order_ale(
+                flat_model, X_train, feature, bins=bins, n_threads=n_jobs
+            )
+            cache.save((quantiles, ale))
 
         quantile_list.append(quantiles)
         ale_list.append(ale)
@@ -1212,58 +1890,172 @@ def plot_and_list_importances(importances, methods, print_n=15, N=15, verbose=Tr
     return combined[:N]
 
 
+def _get_shap_map_samples(master_mask, n_rows, kind="train", additional_mask=None):
+    """Flat grid indices of the first `n_rows` samples of `kind`.
+
+    Returns:
+        flat_indices (array): Index into `master_mask` of each sample.
+        valid (array): Mask of samples which are not masked by `additional_mask`.
+
+    """
+    mm_valid_indices, mm_valid_train_indices, mm_valid_val_indices = get_mm_indices(
+        master_mask
+    )
+    if kind == "train":
+        mm_kind_indices = mm_valid_train_indices[:n_rows]
+    elif kind == "val":
+        mm_kind_indices = mm_valid_val_indices[:n_rows]
+    else:
+        raise ValueError(f"Unknown kind: {kind}.")
+
+    if additional_mask is None:
+        valid = np.ones(mm_kind_indices.size, dtype=np.bool_)
+    else:
+        valid = ~match_shape(additional_mask, master_mask.shape).ravel()[
+            mm_kind_indices
+        ]
+    return mm_kind_indices, valid
+
+
+def _get_shap_map_aggregator(master_mask, n_features):
+    """Empty `ShapMapAggregator` of the cells with any valid samples."""
+    return ShapMapAggregator(
+        master_mask.shape,
+        np.flatnonzero(~np.all(master_mask, axis=0)),
+        n_features,
+    )
+
+
 def calculate_2d_masked_shap_values(
     X_train,
     master_mask,
     shap_values,
     kind="train",
     additional_mask=None,
+    block_size=100000,
 ):
-    shap_results = {}
+    """Aggregate SHAP values over time for each grid cell.
 
-    def time_abs_max(x):
-        out = np.take_along_axis(
-            x, np.argmax(np.abs(x), axis=0).reshape(1, *x.shape[1:]), axis=0
-        )
-        assert out.shape[0] == 1
-        return out[0]
-
-    agg_keys, agg_funcs = zip(
-        ("masked_shap_arrs", lambda arr: np.mean(arr, axis=0)),
-        ("masked_shap_arrs_std", lambda arr: np.std(arr, axis=0)),
-        ("masked_abs_shap_arrs", lambda arr: np.mean(np.abs(arr), axis=0)),
-        ("masked_abs_shap_arrs_std", lambda arr: np.std(np.abs(arr), axis=0)),
-        ("masked_max_shap_arrs", time_abs_max),
-    )
-    for key in agg_keys:
-        shap_results[key] = dict(data=[], vmins=[], vmaxs=[])
+    The SHAP values (e.g. memory-mapped, see `load_shap_values`) are read in blocks
+    of `block_size` samples, see `analysis_tools.shap_aggregation`.
 
-    mm_valid_indices, mm_valid_train_indices, mm_valid_val_indices = get_mm_indices(
-        master_mask
+    Returns:
+        dict: Maps and their ranges, see `get_shap_map_results`.
+
+    """
+    flat_indices, valid = _get_shap_map_samples(
+        master_mask, shap_values.shape[0], kind=kind, additional_mask=additional_mask
     )
-    if kind == "train":
-        mm_kind_indices = mm_valid_train_indices[: shap_values.shape[0]]
-    elif kind == "val":
-        mm_kind_indices = mm_valid_val_indices[: shap_values.shape[0]]
-    else:
-        raise ValueError(f"Unknown kind: {kind}.")
+    aggregator = _get_shap_map_aggregator(master_mask, len(X_train.columns))
+    for start in tqdm(
+        range(0, shap_values.shape[0], block_size), desc="Aggregating SHAP values"
+    ):
+        rows = slice(start, start + block_size)
+        aggregator.update(
+            flat_indices[rows][valid[rows]], shap_values[rows][valid[rows]]
+        )
+    return get_shap_map_results(aggregator, X_train.columns)
 
-    for i in tqdm(range(len(X_train.columns)), desc="Aggregating SHAP values"):
-        # Convert 1D shap values into 3D array (time, lat, lon).
-        masked_shap_comp = np.ma.MaskedArray(
-            np.zeros_like(master_mask, dtype=np.float64), mask=np.ones_like(master_mask)
+
+def aggregate_shap_maps(
+    cache_dir,
+    rf,
+    X,
+    master_mask,
+    job_samples,
+    n_chunks,
+    kind="train",
+    additional_mask=None,
+):
+    """Aggregate the SHAP chunks of a run that are complete so far into maps.
+
+    The aggregator state is checkpointed in `cache_dir`, so that only chunks which
+    have been written to the run's `ShapStore` (see `run_shap_chunk_worker`) since
+    the last call are read. Maps are therefore available while the array jobs are
+    still running, without loading all SHAP values.
+
+    Args:
+        cache_dir (str or Path): Experiment cache directory.
+        rf: Model explained by the run, see `get_shap_store`.
+        X (pandas DataFrame): Samples explained by the run.
+        master_mask (array): Mask of the `(time, lat, lon)` grid.
+        job_samples (int): Samples per chunk.
+        n_chunks (int): Number of chunks.
+        kind ({'train', 'val'}): Samples in `X`.
+        additional_mask (array or None): Excluded samples, broadcastable to
+            `master_mask`.
+
+    Returns:
+        dict: Maps and their ranges, see `get_shap_map_results`.
+
+    """
+    name, n_rows, run_key = _get_shap_run(rf, X, job_samples, n_chunks)
+    store = get_shap_store(cache_dir, rf, X, job_samples, n_chunks)
+    flat_indices, valid = _get_shap_map_samples(
+        master_mask, n_rows, kind=kind, additional_mask=additional_mask
+    )
+    mask_key = joblib_hash(
+        (
+            kind,
+            np.asarray(master_mask),
+            None if additional_mask is None else np.asarray(additional_mask),
+        )
+    )
+    checkpoint = (
+        Path(cache_dir) / "shap_maps" / f"{name}_{job_samples}_{run_key}_{mask_key}.npz"
+    )
+    try:
+        aggregator = ShapMapAggregator.load(checkpoint)
+    except FileNotFoundError:
+        aggregator = _get_shap_map_aggregator(master_mask, X.shape[1])
+
+    complete_rows = store.get_complete_rows()
+    values = store.values
+    n_added = 0
+    for index in tqdm(range(n_chunks), desc="Aggregating SHAP chunks"):
+        rows = slice(index * job_samples, min((index + 1) * job_samples, n_rows))
+        if index in aggregator.chunks or not np.all(complete_rows[rows]):
+            continue
+        aggregator.update(
+            flat_indices[rows][valid[rows]], values[rows][valid[rows]], chunk=index
         )
-        masked_shap_comp.ravel()[mm_kind_indices] = shap_values[:, i]
+        n_added += 1
+    if n_added:
+        aggregator.save(checkpoint)
+    logger.info(
+        f"Aggregated {len(aggregator.chunks)} of {n_chunks} chunks "
+        f"({n_added} new): {aggregator!r}."
+    )
+    return get_shap_map_results(aggregator, X.columns)
 
-        if additional_mask is not None:
-            masked_shap_comp.mask |= match_shape(
-                additional_mask, masked_shap_comp.shape
-            )
 
-        # Calculate different aggregations over time.
+def get_shap_map_results(aggregator, columns):
+    """Maps of aggregated SHAP values, as plotted by `plot_shap_value_maps`.
+
+    Args:
+        aggregator (ShapMapAggregator): Aggregated SHAP values.
+        columns (list of str): Feature names.
+
+    Returns:
+        dict: For each aggregation, a dict with a (lat, lon) map for each feature
+            ('data'), along with their ranges ('vmins', 'vmaxs', 'vmin', 'vmax').
+
+    """
+    shap_results = {}
+    agg_keys = {
+        "masked_shap_arrs": "mean",
+        "masked_shap_arrs_std": "std",
+        "masked_abs_shap_arrs": "abs_mean",
+        "masked_abs_shap_arrs_std": "abs_std",
+        "masked_max_shap_arrs": "abs_max",
+    }
+    for key in agg_keys:
+        shap_results[key] = dict(data=[], vmins=[], vmaxs=[])
 
-        for key, agg_func in zip(agg_keys, agg_funcs):
-            agg_shap = agg_func(masked_shap_comp)
+    for i in range(len(columns)):
+        maps = aggregator.get_maps(i)
+        for key, map_key in agg_keys.items():
+            agg_shap = maps[map_key]
             shap_results[key]["data"].append(agg_shap)
             shap_results[key]["vmins"].append(np.min(agg_shap))
             shap_results[key]["vmaxs"].append(np.max(agg_shap))
@@ -1280,7 +2072,7 @@ def calculate_2d_masked_shap_values(
     ]
     for rel_agg_key, rel_agg_sources_key in zip(rel_agg_keys, rel_agg_sources_keys):
         shap_results[rel_agg_key] = dict(data=[], vmins=[], vmaxs=[])
-        for i in range(len(X_train.columns)):
+        for i in range(len(columns)):
             rel_agg_shap = shap_results[rel_agg_sources_key[1]]["data"][i] / np.ma.abs(
                 shap_results[rel_agg_sources_key[0]]["data"][i]
             )
@@ -1425,8 +2217,10 @@ def load_experiment_data(folders, which="all", ignore=()):
     Args:
         folders (iterable of {str, Path}): Folder names corresponding to the
             experiments to load data for.
-        which (iterable of {'all', 'offset_data', 'model', 'data_split', 'model_scores'}):
-            'all' loads everything.
+        which (iterable of {'all', 'offset_data', 'model', 'data_split', 'model_scores', 'binned_model_scores'}):
+            'all' loads everything except 'binned_model_scores', which are stored
+            under the 'binned_model_scores' key since they are only available for
+            some experiments.
         ignore (iterable of str): Subsets of the above to ignore.
 
     Returns:
@@ -1484,6 +2278,8 @@ def load_experiment_data(folders, which="all", ignore=()):
             )
         if "model_scores" in which:
             data[experiment].update(module.get_model_scores())
+        if "binned_model_scores" in which:
+            data[experiment]["binned_model_scores"] = module.get_binned_model_scores()
 
     return data
 
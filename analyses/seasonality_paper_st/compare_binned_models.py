@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compare models fit on binned features to exactly fit models.
+
+Fits (or loads) the binned model of each experiment, see
+`analysis_tools.binning`, and reports its scores alongside those of the exactly fit
+model. Run after the exact models have been fit, e.g. using `model.ipynb`.
+
+Fit times are measured separately by fitting exact and binned forests with
+`n_timing_estimators` trees under the same conditions, bypassing the model cache.
+The binned fit time includes determining the bins, binning the training data and
+mapping the trees back to the original feature values.
+
+"""
+import sys
+from pathlib import Path
+from time import time
+
+import numpy as np
+import pandas as pd
+from joblib import parallel_backend
+from wildfires.dask_cx1 import get_client
+
+PAPER_DIR = Path(__file__).resolve().parent
+if str(PAPER_DIR) not in sys.path:
+    sys.path.insert(0, str(PAPER_DIR))
+
+from common import (
+    DaskRandomForestRegressor,
+    FeatureBinner,
+    load_experiment_data,
+    param_dict,
+)
+
+experiments = ("all", "best_top_15")
+max_bins = 256
+n_timing_estimators = 50
+
+
+def time_fit(X_train, y_train, max_bins=None):
+    """Time an uncached fit of the model with `n_timing_estimators` trees."""
+    model = DaskRandomForestRegressor(
+        **{**param_dict, "n_estimators": n_timing_estimators}
+    )
+    with parallel_backend("dask"):
+        start = time()
+        if max_bins is None:
+            model.fit(X_train, y_train)
+        else:
+            binner = FeatureBinner(max_bins=max_bins)
+            model.fit(binner.fit(X_train).transform(X_train), y_train)
+            binner.unbin_trees(model.estimators_)
+        return time() - start
+
+
+if __name__ == "__main__":
+    client = get_client()
+    comparison = {}
+    for experiment, data in load_experiment_data(
+        experiments, which=("data_split",)
+    ).items():
+        module = data["module"]
+        split_data = (data["X_test"], data["X_train"], data["y_test"], data["y_train"])
+
+        # Cached flat forests, see `common_get_model`.
+        exact_rf = module.get_model(flat=True)
+        exact_scores = module.get_model_scores(exact_rf, *split_data)
+
+        binned_rf = module.get_model(
+            data["X_train"], data["y_train"], flat=True, max_bins=max_bins
+        )
+        binned_scores = module.get_binned_model_scores(binned_rf, *split_data)
+
+        exact_pred = exact_rf.predict(data["X_test"])
+        binned_pred = binned_rf.predict(data["X_test"])
+
+        for key, exact_score in exact_scores.items():
+            comparison[(experiment, key)] = {
+                "exact": exact_score,
+                "binned": binned_scores[key],
+                "binned - exact": binned_scores[key] - exact_score,
+            }
+        comparison[(experiment, "test prediction RMSD")] = {
+            "binned - exact": np.sqrt(np.mean((binned_pred - exact_pred) ** 2))
+        }
+
+        exact_time = time_fit(data["X_train"], data["y_train"])
+        binned_time = time_fit(data["X_train"], data["y_train"], max_bins=max_bins)
+        comparison[(experiment, f"fit time, {n_timing_estimators} trees (s)")] = {
+            "exact": exact_time,
+            "binned": binned_time,
+            "binned - exact": binned_time - exact_time,
+        }
+
+    print(f"Binned models use at most {max_bins} bins per feature.")
+    print(pd.DataFrame(comparison).T.to_string())
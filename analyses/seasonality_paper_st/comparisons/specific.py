@@ -59,16 +59,15 @@ def single_ax_multi_ale_1d(
         try:
             quantiles, ale = cache.load()
         except NoCachedDataError:
-            model = single_experiment_data["model"]
-            model.n_jobs = n_jobs
-
-            X_train = single_experiment_data["X_train"]
-
-            with parallel_backend("threading", n_jobs=n_jobs):
-                quantiles, ale = first_order_ale_quant(
-                    model.predict, X_train, feature, bins=bins
-                )
-                cache.save((quantiles, ale))
+            # The cached flat forest, see `common_get_model`.
+            quantiles, ale = first_order_ale(
+                single_experiment_data["module"].get_model(flat=True),
+                single_experiment_data["X_train"],
+                feature,
+                bins=bins,
+                n_threads=n_jobs,
+            )
+            cache.save((quantiles, ale))
 
         quantile_list.append(quantiles)
         ale_list.append(ale)
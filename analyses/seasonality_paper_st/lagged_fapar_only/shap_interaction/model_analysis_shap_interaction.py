@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import os
 from pathlib import Path
 
 from wildfires.utils import handle_array_job_args
@@ -9,42 +8,37 @@ try:
     # This will only work after the path modification carried out in the job script.
     from specific import (
         CACHE_DIR,
-        SimpleCache,
-        get_model,
         data_split_cache,
-        get_shap_values,
+        get_model,
+        get_ncpus,
+        parse_walltime,
+        run_shap_chunk_worker,
+        shap_interact_params,
     )
 except ImportError:
     """Not running as an HPC job yet."""
 
 
-def func():
-    # Used to re-compute specific failed jobs, `None` otherwise.
-    indices = None
-
-    index = int(os.environ["PBS_ARRAY_INDEX"])
-
-    if indices is not None:
-        index = indices[index]
+walltime = "11:00:00"
 
-    print("Index:", index)
 
+def func():
     X_train, X_test, y_train, y_test = data_split_cache.load()
-    rf = get_model()
+    # Memory-mapped flat forest, see `analysis_tools.flat_forest`.
+    rf = get_model(flat=True)
 
-    job_samples = 50
-
-    tree_path_dependent_shap_interact_cache = SimpleCache(
-        f"tree_path_dependent_shap_interact_{index}_{job_samples}",
-        cache_dir=os.path.join(CACHE_DIR, "shap_interaction"),
-    )
-
-    @tree_path_dependent_shap_interact_cache
-    def cached_get_interact_shap_values(model, X):
-        return get_shap_values(model, X, interaction=True)
-
-    cached_get_interact_shap_values(
-        rf, X_train[index * job_samples : (index + 1) * job_samples]
+    # Chunks are pulled from a queue shared by all array jobs until none are left.
+    # Failed or timed-out chunks are retried and stored chunks are skipped.
+    run_shap_chunk_worker(
+        CACHE_DIR,
+        rf,
+        X_train,
+        job_samples=shap_interact_params["job_samples"],
+        n_chunks=shap_interact_params["max_index"] + 1,
+        interaction=True,
+        max_time=parse_walltime(walltime),
+        # Explain the samples of each chunk using all CPUs of the node.
+        n_jobs=get_ncpus(),
     )
 
 
@@ -52,8 +46,9 @@ if __name__ == "__main__":
     handle_array_job_args(
         Path(__file__).resolve(),
         func,
-        ncpus=1,
-        mem="7gb",
-        walltime="11:00:00",
-        max_index=5999,
+        ncpus=32,
+        mem="64gb",
+        walltime=walltime,
+        # Number of workers (array jobs) minus one.
+        max_index=187,
     )
@@ -60,12 +60,6 @@ shap_interact_params["total_samples"] = (
     shap_interact_params["max_index"] + 1
 ) * shap_interact_params["job_samples"]
 
-# SHAP cache.
-shap_cache = SimpleCache("shap_cache", cache_dir=CACHE_DIR / Path("shap"))
-shap_interact_cache = SimpleCache(
-    "shap_interact_cache", cache_dir=CACHE_DIR / Path("shap_interaction")
-)
-
 interact_data_cache = SimpleCache("SHAP_interact_data", cache_dir=CACHE_DIR)
 
 
@@ -117,6 +111,8 @@ for column in selected_features:
 
 @wraps(_common_get_data)
 def get_data(*args, **kwargs):
+    # Only load the selected columns from the feature store.
+    kwargs.setdefault("columnar", True)
     (
         endog_data,
         exog_data,
@@ -143,6 +139,8 @@ def get_data(*args, **kwargs):
 
 @wraps(_common_get_offset_data)
 def get_offset_data(*args, **kwargs):
+    # Only load the selected columns from the feature store.
+    kwargs.setdefault("columnar", True)
     (
         endog_data,
         exog_data,
@@ -167,8 +165,15 @@ def get_offset_data(*args, **kwargs):
     )
 
 
-def get_model(X_train=None, y_train=None):
-    return common_get_model(cache_dir=CACHE_DIR, X_train=X_train, y_train=y_train)
+def get_model(X_train=None, y_train=None, flat=False, oob=False, max_bins=None):
+    return common_get_model(
+        cache_dir=CACHE_DIR,
+        X_train=X_train,
+        y_train=y_train,
+        flat=flat,
+        oob=oob,
+        max_bins=max_bins,
+    )
 
 
 model_score_cache = SimpleCache("model_scores", cache_dir=CACHE_DIR)
@@ -177,3 +182,11 @@ model_score_cache = SimpleCache("model_scores", cache_dir=CACHE_DIR)
 @model_score_cache
 def get_model_scores(rf=None, X_test=None, X_train=None, y_test=None, y_train=None):
     return common_get_model_scores(rf, X_test, X_train, y_test, y_train)
+
+
+oob_model_score_cache = SimpleCache("oob_model_scores", cache_dir=CACHE_DIR)
+
+
+@oob_model_score_cache
+def get_oob_model_scores(rf=None, X_test=None, y_test=None, y_train=None):
+    return common_get_model_scores(rf, X_test, None, y_test, y_train, oob=True)
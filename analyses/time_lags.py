@@ -3,12 +3,12 @@
 import logging
 import os
 import warnings
-from itertools import product
+from pathlib import Path
 
 import matplotlib as mpl
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import train_test_split
 
 import wildfires.analysis
 from wildfires.analysis import *
@@ -16,6 +16,9 @@ from wildfires.dask_cx1 import get_client
 from wildfires.data import *
 from wildfires.logging_config import enable_logging
 
+from analysis_tools.param_search import dask_param_search
+from analysis_tools.worker_data import WorkerTrainingData
+
 FigureSaver.debug = True
 FigureSaver.directory = os.path.expanduser(os.path.join("~", "tmp", "time_lags"))
 os.makedirs(FigureSaver.directory, exist_ok=True)
@@ -112,31 +115,28 @@ parameters_RF = {
 }
 
 
-def fit_func(X, y, rf_params):
-    rf = RandomForestRegressor(**rf_params)
-    scores = cross_val_score(rf, X, y, cv=5)
-    # XXX: What about the n_jobs parameters for the above two things?
-    # Optionally fit model on all the data and store the fitted model using pickle.
-    return scores
-
-
-parameter_grid = list(
-    dict(zip(parameters_RF, params))
-    for params in product(*list(parameters_RF.values()))
+logger.info("Storing training data for the workers.")
+
+# Memory-mapped by the workers instead of sending a copy to each of them.
+training_data = WorkerTrainingData.create(X_train, y_train)
+
+# Results are written as each configuration finishes, and configurations already
+# stored are skipped when the search is restarted.
+search_results = dask_param_search(
+    client,
+    RandomForestRegressor,
+    training_data,
+    parameters_RF,
+    Path(DATA_DIR)
+    / ".pickle"
+    / "time_lags"
+    / f"param_search_{training_data.directory.name}.jsonl",
+    n_iter=60,
+    proposer="adaptive",
+    cv=5,
 )
 
-logger.info("Scattering training data.")
-
-X_train_fut = client.scatter(X_train, broadcast=True)
-y_train_fut = client.scatter(y_train, broadcast=True)
-
-logger.info("Submitting tasks.")
-
-score_futures = []
-for single_parameters in parameter_grid:
-    score_futures.append(
-        client.submit(fit_func, X_train_fut, y_train_fut, single_parameters)
-    )
-
-logger.info("Waiting for tasks to finish.")
-scores_list = client.gather(score_futures)
+best = search_results.get_best()
+logger.info(
+    f"Best parameters: {best['params']} (mean score {best['mean_score']:0.4f})."
+)